@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Обход сайта для поиска поверхности атаки
+Параллельный обход страниц в пределах одного origin: собирает URL, параметры
+query string и формы (метод, action, поля), чтобы сканеры проверяли реальные
+endpoint'ы, а не только списки путей
+"""
+
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl
+
+from bs4 import BeautifulSoup
+
+# Расширения файлов, которые не являются страницами
+STATIC_EXTENSIONS = (
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico', '.bmp',
+    '.css', '.js', '.woff', '.woff2', '.ttf', '.eot', '.zip', '.rar', '.gz',
+    '.mp4', '.mp3', '.avi', '.doc', '.docx', '.xls', '.xlsx'
+)
+
+def endpoint_of(url):
+    """URL без query string и якоря"""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path or '/', '', ''))
+
+def parse_form(form, page_url):
+    """Описание формы: страница, action, метод, enctype и поля"""
+    action = urljoin(page_url, form.get('action') or page_url)
+    fields = []
+    names = set()
+
+    for field in form.find_all(['input', 'select', 'textarea', 'button']):
+        name = field.get('name')
+        # Группа radio/checkbox - одно поле
+        if not name or name in names:
+            continue
+        names.add(name)
+        fields.append({
+            'name': name,
+            'type': (field.get('type') or field.name).lower(),
+            'value': field.get('value', '')
+        })
+
+    return {
+        'page': page_url,
+        'raw_action': form.get('action') or '',
+        'action': action.split('#', 1)[0],
+        'method': (form.get('method') or 'GET').upper(),
+        'enctype': (form.get('enctype') or 'application/x-www-form-urlencoded').lower(),
+        'fields': fields
+    }
+
+class AttackSurface:
+    """Найденные страницы, параметры endpoint'ов и формы"""
+
+    def __init__(self):
+        self.pages = []
+        self.parameters = {}
+        self.forms = []
+        self.form_keys = set()
+
+    def add_parameters(self, endpoint, names):
+        names = [name for name in names if name]
+        if names:
+            self.parameters.setdefault(endpoint, [])
+            for name in names:
+                if name not in self.parameters[endpoint]:
+                    self.parameters[endpoint].append(name)
+
+    def add_form(self, form):
+        # Одна и та же форма (например, поиск в шапке) есть на каждой странице,
+        # формы без action отправляются на свою страницу, но это тоже одна форма
+        key = (form['raw_action'], form['method'], tuple(field['name'] for field in form['fields']))
+        if key in self.form_keys:
+            return
+        self.form_keys.add(key)
+        self.forms.append(form)
+
+        if form['method'] == 'GET':
+            self.add_parameters(endpoint_of(form['action']), [field['name'] for field in form['fields']])
+
+    def directories(self):
+        """Директории, в которых лежат найденные страницы"""
+        directories = []
+        for page in self.pages:
+            parts = urlsplit(page)
+            segments = parts.path.split('/')[1:-1]
+            for depth in range(len(segments) + 1):
+                path = '/' + ''.join(segment + '/' for segment in segments[:depth])
+                directory = urlunsplit((parts.scheme, parts.netloc, path, '', ''))
+                if directory not in directories:
+                    directories.append(directory)
+        return directories
+
+    def to_dict(self):
+        return {
+            'pages': self.pages,
+            'parameters': self.parameters,
+            'forms': self.forms
+        }
+
+class SurfaceCrawler:
+    """Обход в ширину в пределах origin базового URL
+
+    fetch_all - функция список URL -> список ответов (обычно fetch_all сканера),
+    страницы одного уровня запрашиваются одним пакетом параллельно.
+    """
+
+    def __init__(self, base_url, fetch_all, max_pages=30, max_depth=3):
+        self.base_url = base_url.rstrip('/') + '/'
+        self.origin = urlsplit(self.base_url)[:2]
+        self.fetch_all = fetch_all
+        self.max_pages = max(1, max_pages)
+        self.max_depth = max_depth
+
+    def is_crawlable(self, url):
+        parts = urlsplit(url)
+        if (parts.scheme, parts.netloc) != self.origin:
+            return False
+        return not parts.path.lower().endswith(STATIC_EXTENSIONS)
+
+    def extract(self, html_content, page_url, surface):
+        """Разбирает страницу: формы и параметры в surface, возвращает ссылки"""
+        soup = BeautifulSoup(html_content, 'html.parser')
+        links = []
+
+        for form in soup.find_all('form'):
+            surface.add_form(parse_form(form, page_url))
+
+        for tag, attribute in (('a', 'href'), ('area', 'href'), ('iframe', 'src'), ('form', 'action')):
+            for element in soup.find_all(tag, **{attribute: True}):
+                url = urljoin(page_url, element[attribute]).split('#', 1)[0]
+                if not self.is_crawlable(url):
+                    continue
+                surface.add_parameters(endpoint_of(url), [name for name, _ in parse_qsl(urlsplit(url).query, keep_blank_values=True)])
+                links.append(url)
+
+        return links
+
+    def crawl(self):
+        """Обходит сайт и возвращает AttackSurface"""
+        surface = AttackSurface()
+        seen = {endpoint_of(self.base_url)}
+        level = [self.base_url]
+        depth = 0
+
+        while level and len(surface.pages) < self.max_pages:
+            level = level[:self.max_pages - len(surface.pages)]
+            responses = self.fetch_all(level)
+            next_level = []
+
+            for url, response in zip(level, responses):
+                if response is None or response.status_code != 200:
+                    continue
+                if 'html' not in response.headers.get('Content-Type', 'text/html'):
+                    continue
+
+                surface.pages.append(url)
+                links = self.extract(response.text, response.url or url, surface)
+                if depth >= self.max_depth:
+                    continue
+
+                for link in links:
+                    # Страницы с разными параметрами считаются одной страницей
+                    endpoint = endpoint_of(link)
+                    if endpoint not in seen:
+                        seen.add(endpoint)
+                        next_level.append(link)
+
+            level = next_level
+            depth += 1
+
+        return surface
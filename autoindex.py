@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Разбор страниц directory listing (autoindex)
+Понимает таблицу и <pre> формат Apache mod_autoindex, nginx autoindex и
+простые списки ссылок (python http.server). Для каждой записи возвращает URL,
+признак каталога, размер и время изменения из колонки Last-Modified, если
+сервер их показывает
+"""
+
+import re
+import calendar
+from datetime import datetime
+from html import unescape
+from urllib.parse import urljoin, urlsplit
+
+# Признаки страницы directory listing
+LISTING_MARKERS = ('index of', 'parent directory', 'directory listing')
+
+# Форматы колонки Last-Modified: Apache (2024-01-15 10:30), nginx и старый Apache (15-Jan-2024 10:30)
+DATE_FORMATS = (
+    (re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}'), '%Y-%m-%d %H:%M:%S'),
+    (re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}'), '%Y-%m-%d %H:%M'),
+    (re.compile(r'\d{2}-[A-Za-z]{3}-\d{4} \d{2}:\d{2}:\d{2}'), '%d-%b-%Y %H:%M:%S'),
+    (re.compile(r'\d{2}-[A-Za-z]{3}-\d{4} \d{2}:\d{2}'), '%d-%b-%Y %H:%M'),
+)
+
+SIZE_RE = re.compile(r'^(\d+(?:\.\d+)?)([KMGT]?)$', re.I)
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+# Ссылка и текст после нее до следующей ссылки, конца строки таблицы или строки <pre>
+ENTRY_RE = re.compile(r'<a\s[^>]*href=["\']([^"\']+)["\'][^>]*>.*?</a>(.*?)(?=<a\s|</tr>|\n|$)', re.I | re.S)
+
+def is_listing(html_text):
+    text = html_text.lower()
+    return any(marker in text for marker in LISTING_MARKERS)
+
+def parse_mtime(text):
+    """(время изменения в секундах, остаток текста без даты)
+
+    Часовой пояс сервера в листинге не указан, время читается как UTC - важно
+    только, что оно одинаково при каждом чтении листинга.
+    """
+    for pattern, date_format in DATE_FORMATS:
+        match = pattern.search(text)
+        if match:
+            try:
+                moment = datetime.strptime(match.group(0), date_format)
+            except ValueError:
+                continue
+            return calendar.timegm(moment.timetuple()), text[:match.start()] + text[match.end():]
+    return None, text
+
+def parse_size(text):
+    """(размер в байтах, точный ли он): nginx пишет байты, Apache - 1.2K / 3M"""
+    for token in text.split():
+        match = SIZE_RE.match(token)
+        if match:
+            unit = match.group(2).upper()
+            return int(float(match.group(1)) * SIZE_UNITS[unit]), not unit
+    return None, False
+
+def size_matches(local_size, size, exact):
+    """Совпадает ли размер локального файла с размером из листинга"""
+    if size is None:
+        return False
+    if exact:
+        return local_size == size
+    # Apache округляет до одного знака: 1.2K - это 1178..1280 байт
+    return abs(local_size - size) <= size * 0.05 + 1
+
+def parse_listing(html_text, listing_url):
+    """Записи листинга внутри каталога listing_url
+
+    Ссылки на родительский каталог, сортировку (?C=N;O=D) и за пределы
+    каталога пропускаются. Запись: url, name, is_dir, size, size_exact, mtime.
+    """
+    if not listing_url.endswith('/'):
+        listing_url += '/'
+
+    entries = []
+    seen = set()
+    for href, tail in ENTRY_RE.findall(html_text):
+        href = unescape(href)
+        if href.startswith(('?', '#', 'mailto:', 'javascript:')):
+            continue
+        url = urljoin(listing_url, href).split('#', 1)[0]
+        if urlsplit(url).query or not url.startswith(listing_url) or url == listing_url or url in seen:
+            continue
+        seen.add(url)
+
+        tail = unescape(re.sub(r'<[^>]+>', ' ', tail)).replace('\xa0', ' ')
+        mtime, tail = parse_mtime(tail)
+        is_dir = url.endswith('/')
+        size, exact = (None, False) if is_dir else parse_size(tail)
+
+        entries.append({
+            'url': url,
+            'name': url[len(listing_url):].rstrip('/'),
+            'is_dir': is_dir,
+            'size': size,
+            'size_exact': exact,
+            'mtime': mtime
+        })
+
+    return entries
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк обхода и сканирования на локальном стенде
+Локальный HTTP сервер внутри процесса отдает complete_local_site или
+сгенерированный сайт из N страниц с заданной задержкой и разбросом ответа.
+SiteDownloader, поиск изображений, final_check и EnhancedSecurityScanner
+запускаются против него, каждый в отдельном процессе, чтобы время CPU и пик
+памяти относились только к нему. Результаты дописываются в JSON файл для
+отслеживания регрессий
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import threading
+import contextlib
+import multiprocessing
+from datetime import datetime, timedelta
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urlsplit
+
+try:
+    import resource
+except ImportError:
+    # Windows: пик памяти не измеряется
+    resource = None
+
+DEFAULT_OUTPUT = 'benchmark_results.json'
+WORKLOADS = ('site_downloader', 'image_finder', 'missing_image_finder', 'final_check', 'security_scanner')
+
+# Минимальный PNG 1x1 для изображений сгенерированного сайта
+PNG_PIXEL = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082'
+)
+
+class BenchHandler(SimpleHTTPRequestHandler):
+    """Статика с искусственной задержкой ответа и подсчетом запросов"""
+
+    def handle_one_request(self):
+        server = self.server
+        if server.latency or server.jitter:
+            time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+        super().handle_one_request()
+
+    def do_CONNECT(self):
+        # HTTPS через прокси: стенд не выпускает запросы в сеть
+        self.send_error(502)
+
+    def send_head(self):
+        # Запрос через прокси (абсолютный URL) - это ссылка за пределы стенда
+        if '://' in self.path:
+            self.send_error(502)
+            return None
+        return super().send_head()
+
+    def log_request(self, code='-', size='-'):
+        self.server.count(self.command, self.path, code)
+
+    def log_message(self, format, *args):
+        pass
+
+class BenchServer:
+    """Локальный сервер стенда в фоновом потоке
+
+    latency и jitter (сек) задают задержку каждого ответа: latency ± jitter.
+    Запросы за пределы стенда (через прокси) отклоняются и считаются отдельно.
+    """
+
+    def __init__(self, root, latency=0.0, jitter=0.0, host='127.0.0.1', port=0):
+        self.httpd = ThreadingHTTPServer((host, port), partial(BenchHandler, directory=root))
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.jitter = jitter
+        self.httpd.count = self.count
+        self.lock = threading.Lock()
+        self.thread = None
+        self.reset()
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, method, path, code):
+        with self.lock:
+            self.stats['requests'] += 1
+            if method == 'CONNECT' or '://' in path:
+                self.stats['offsite'] += 1
+            elif str(code).startswith(('4', '5')):
+                self.stats['errors'] += 1
+
+    def reset(self):
+        with self.lock:
+            self.stats = {'requests': 0, 'errors': 0, 'offsite': 0}
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def generate_site(directory, pages=100, links=5, images=20, seed=1):
+    """Сгенерированный сайт: страницы со ссылками, изображения, CSS, формы, sitemap и robots.txt
+
+    Страница i всегда ссылается на i+1, поэтому обход с главной находит все страницы.
+    """
+    rng = random.Random(seed)
+    theme = os.path.join(directory, 'wp-content', 'themes', 'theme', 'assets')
+    os.makedirs(os.path.join(theme, 'css'), exist_ok=True)
+    os.makedirs(os.path.join(directory, 'uploads'), exist_ok=True)
+
+    for i in range(images):
+        with open(os.path.join(directory, 'uploads', f'img-{i}.png'), 'wb') as f:
+            f.write(PNG_PIXEL)
+    with open(os.path.join(theme, 'css', 'main.css'), 'w', encoding='utf-8') as f:
+        for i in range(min(images, 5)):
+            f.write(f".bg-{i} {{ background: url('/uploads/img-{i}.png'); }}\n")
+
+    today = datetime(2026, 1, 1)
+    sitemap = []
+    for i in range(pages):
+        path = '/' if i == 0 else f'/page-{i}/'
+        targets = {(i + 1) % pages} | {rng.randrange(pages) for _ in range(links)}
+        anchors = ''.join(f'<a href="{"/" if t == 0 else f"/page-{t}/"}">Страница {t}</a>\n' for t in sorted(targets))
+        pictures = ''.join(f'<img src="/uploads/img-{rng.randrange(images)}.png" alt="">\n' for _ in range(2))
+        html = (
+            '<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+            f'<title>Страница {i}</title>'
+            '<link rel="stylesheet" href="/wp-content/themes/theme/assets/css/main.css">'
+            '</head><body>\n'
+            f'<h1>Страница {i}</h1>\n{anchors}{pictures}'
+            f'<div style="background-image: url(/uploads/img-{i % images}.png)"></div>\n'
+            '<form action="/search/" method="get"><input name="q"><input name="page" type="hidden" value="1"></form>\n'
+            f'<p>{"Текст страницы. " * 50}</p>\n'
+            '</body></html>\n'
+        )
+        page_dir = os.path.join(directory, path.strip('/'))
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, 'index.html'), 'w', encoding='utf-8') as f:
+            f.write(html)
+        lastmod = (today + timedelta(days=i % 30)).strftime('%Y-%m-%d')
+        sitemap.append(f'<url><loc>{{base}}{path}</loc><lastmod>{lastmod}</lastmod></url>')
+
+    # Адрес сервера неизвестен до запуска, sitemap дописывается в write_sitemap
+    with open(os.path.join(directory, '.sitemap_template'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(sitemap))
+    with open(os.path.join(directory, 'robots.txt'), 'w', encoding='utf-8') as f:
+        f.write('User-agent: *\nDisallow: /wp-admin/\n')
+    return directory
+
+def write_sitemap(directory, base_url):
+    """sitemap.xml сгенерированного сайта с адресом запущенного сервера"""
+    template = os.path.join(directory, '.sitemap_template')
+    if not os.path.exists(template):
+        return
+    with open(template, 'r', encoding='utf-8') as f:
+        entries = f.read().replace('{base}', base_url)
+    with open(os.path.join(directory, 'sitemap.xml'), 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n' + entries + '\n</urlset>\n')
+    with open(os.path.join(directory, 'robots.txt'), 'a', encoding='utf-8') as f:
+        f.write(f'Sitemap: {base_url}/sitemap.xml\n')
+
+def copy_pages(site_dir, destination, extensions=('.html', '.css')):
+    """Копия сайта только с HTML/CSS: изображения для поисковиков изображений "недостающие" """
+    for root, dirs, files in os.walk(site_dir):
+        for file in files:
+            if file.endswith(extensions):
+                source = os.path.join(root, file)
+                target = os.path.join(destination, os.path.relpath(source, site_dir))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(source, target)
+
+# Нагрузки выполняются в рабочей папке дочернего процесса и возвращают
+# (число обработанных элементов, единица) или (None, None)
+
+def bench_site_downloader(base_url, site_dir, options):
+    import download_complete_site
+    download_complete_site.BASE_URL = base_url
+    download_complete_site.BASE_DOMAIN = urlsplit(base_url).netloc
+    # copy_existing_files() читает папку исходного шаблона
+    os.makedirs('agentdom_template', exist_ok=True)
+    downloader = download_complete_site.SiteDownloader(max_rate=options['max_rate'])
+    success_count, _ = downloader.download_complete_site()
+    return success_count, 'pages'
+
+def bench_image_finder(base_url, site_dir, options):
+    import find_and_download_all_images as finder
+    finder.BASE_URL = base_url
+    copy_pages(site_dir, 'complete_local_site')
+    finder.create_missing_directories()
+    all_images = finder.scan_all_files_for_images()
+    finder.download_missing_images(all_images)
+    return len(all_images), 'images'
+
+def bench_missing_image_finder(base_url, site_dir, options):
+    import download_all_missing_images as finder
+    finder.BASE_URL = base_url
+    copy_pages(site_dir, 'complete_local_site')
+    finder.create_missing_directories()
+    # download_missing_images() скачивает фиксированный список с боевого сайта и не запускается
+    return finder.scan_all_pages_for_images(), 'images'
+
+def bench_final_check(base_url, site_dir, options):
+    import final_check
+    shutil.copytree(site_dir, 'complete_local_site')
+    final_check.main()
+    pages = sum(file.endswith('.html') for _, _, files in os.walk('complete_local_site') for file in files)
+    return pages, 'pages'
+
+def bench_security_scanner(base_url, site_dir, options):
+    from enhanced_security_scanner import EnhancedSecurityScanner
+    scanner = EnhancedSecurityScanner(base_url, delay=0, max_threads=options['threads'], rate=options['rate'])
+    scanner.run_comprehensive_scan()
+    return None, None
+
+def run_workload(name, base_url, site_dir, options, verbose, results):
+    """Тело дочернего процесса: подготовка, замер и отправка результата"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    workdir = tempfile.mkdtemp(prefix=f'bench_{name}_')
+    os.chdir(workdir)
+    # Ссылки за пределы стенда идут через "прокси" стенда и отклоняются
+    os.environ['HTTP_PROXY'] = os.environ['HTTPS_PROXY'] = base_url
+    os.environ['NO_PROXY'] = urlsplit(base_url).hostname
+
+    result = {}
+    try:
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))
+        with output:
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            items, unit = globals()[f'bench_{name}'](base_url, site_dir, options)
+            result['cpu_time'] = round(time.process_time() - cpu_start, 3)
+            result['wall_time'] = round(time.perf_counter() - wall_start, 3)
+        result['items'] = items
+        result['unit'] = unit
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        if resource:
+            # Linux: килобайты
+            result['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        shutil.rmtree(workdir, ignore_errors=True)
+        results.put(result)
+
+def measure(name, server, site_dir, options, timeout, verbose):
+    """Запускает нагрузку в отдельном процессе и дополняет замер счетчиками сервера"""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    server.reset()
+    process = context.Process(target=run_workload, args=(name, server.url, site_dir, options, verbose, results))
+    process.start()
+
+    try:
+        result = results.get(timeout=timeout)
+    except Exception:
+        process.terminate()
+        result = {'error': f'превышено время {timeout} сек'}
+    process.join()
+
+    result.update(server.snapshot())
+    wall_time = result.get('wall_time')
+    if wall_time:
+        result['requests_per_sec'] = round(result['requests'] / wall_time, 2)
+        if result.get('items') is not None:
+            result['items_per_sec'] = round(result['items'] / wall_time, 2)
+    return result
+
+def load_runs(filename):
+    if not os.path.exists(filename):
+        return []
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f).get('runs', [])
+
+def previous_result(runs, site, workload):
+    for run in reversed(runs):
+        for entry in run['results']:
+            if entry['site'] == site and entry['workload'] == workload and 'wall_time' in entry:
+                return entry
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк обхода и сканирования на локальном стенде')
+    parser.add_argument('--site', action='append', default=None,
+                        help='Папка сайта для стенда (можно несколько; по умолчанию complete_local_site, если есть)')
+    parser.add_argument('--pages', type=int, action='append', default=None,
+                        help='Сгенерировать сайт из N страниц (можно несколько, по умолчанию: 100)')
+    parser.add_argument('--images', type=int, default=20, help='Уникальных изображений в сгенерированном сайте')
+    parser.add_argument('--latency', type=float, default=0.01, help='Задержка ответа сервера (сек)')
+    parser.add_argument('--jitter', type=float, default=0.005, help='Разброс задержки (сек)')
+    parser.add_argument('--workloads', nargs='+', choices=WORKLOADS, default=list(WORKLOADS), help='Какие нагрузки запускать')
+    parser.add_argument('--max-rate', type=float, default=50.0, help='Потолок темпа SiteDownloader (запросов/сек)')
+    parser.add_argument('--threads', type=int, default=10, help='Потоков EnhancedSecurityScanner')
+    parser.add_argument('--rate', type=float, default=None, help='Лимит запросов/сек EnhancedSecurityScanner (по умолчанию без лимита)')
+    parser.add_argument('--timeout', type=float, default=600, help='Максимум секунд на одну нагрузку')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f'Файл результатов (по умолчанию: {DEFAULT_OUTPUT})')
+    parser.add_argument('--verbose', action='store_true', help='Показывать вывод запускаемых скриптов')
+
+    args = parser.parse_args()
+
+    sites = []
+    for site in args.site or (['complete_local_site'] if os.path.isdir('complete_local_site') else []):
+        if not os.path.isdir(site):
+            print(f"❌ Папка не найдена: {site}")
+            sys.exit(1)
+        sites.append((site, os.path.abspath(site)))
+
+    generated_root = tempfile.mkdtemp(prefix='bench_sites_')
+    for pages in args.pages or ([100] if args.site is None else []):
+        sites.append((f'generated:{pages}', generate_site(os.path.join(generated_root, str(pages)), pages,
+                                                          images=args.images)))
+
+    options = {'max_rate': args.max_rate, 'threads': args.threads, 'rate': args.rate}
+    runs = load_runs(args.output)
+    run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {'latency': args.latency, 'jitter': args.jitter, **options},
+        'results': []
+    }
+
+    print("⏱️  Бенчмарк на локальном стенде")
+    print(f"🐢 Задержка ответа: {args.latency} ± {args.jitter} сек")
+    print("-" * 60)
+
+    try:
+        for site, site_dir in sites:
+            with BenchServer(site_dir, args.latency, args.jitter) as server:
+                if site.startswith('generated:'):
+                    write_sitemap(site_dir, server.url)
+                print(f"🌐 {site} -> {server.url}")
+
+                for workload in args.workloads:
+                    result = measure(workload, server, site_dir, options, args.timeout, args.verbose)
+                    entry = {'site': site, 'workload': workload, **result}
+                    run['results'].append(entry)
+
+                    if 'error' in result:
+                        print(f"   ❌ {workload}: {result['error']}")
+                        continue
+
+                    line = (f"   ✅ {workload}: {result['wall_time']:.2f} сек, CPU {result['cpu_time']:.2f} сек, "
+                            f"{result['requests_per_sec']} запросов/сек")
+                    if result.get('items_per_sec') is not None:
+                        line += f", {result['items_per_sec']} {result['unit']}/сек"
+                    if result.get('peak_rss_kb'):
+                        line += f", пик памяти {result['peak_rss_kb'] / 1024:.0f} МБ"
+                    previous = previous_result(runs, site, workload)
+                    if previous:
+                        change = (result['wall_time'] - previous['wall_time']) / previous['wall_time'] * 100 if previous['wall_time'] else 0
+                        line += f" ({change:+.0f}% к прошлому запуску)"
+                    print(line)
+                    if result['offsite']:
+                        print(f"      ⚠️  Запросов за пределы стенда отклонено: {result['offsite']}")
+    finally:
+        shutil.rmtree(generated_root, ignore_errors=True)
+
+    runs.append(run)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'runs': runs}, f, ensure_ascii=False, indent=2)
+    print(f"📄 Результаты сохранены: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ import os
 import re
 import shutil
 
+from placeholder_images import create_placeholders
+
 def fix_image_paths_in_html():
     """Исправляет пути к изображениям во всех HTML файлах"""
     print("Исправление путей к изображениям в HTML файлах...")
@@ -148,23 +150,8 @@ def create_missing_image_placeholders():
         "complete_local_site/wp-content/themes/theme/assets/fonts/Inter/Inter-Bold.ttf",
     ]
     
-    created_count = 0
-    
-    for image_path in missing_images:
-        if not os.path.exists(image_path):
-            try:
-                # Создаем папку если не существует
-                os.makedirs(os.path.dirname(image_path), exist_ok=True)
-                
-                # Создаем пустой файл как заглушку
-                with open(image_path, 'w') as f:
-                    f.write("")
-                
-                print(f"Создана заглушка: {image_path}")
-                created_count += 1
-                
-            except Exception as e:
-                print(f"Ошибка при создании {image_path}: {e}")
+    # Валидные заглушки с размерами из HTML вместо пустых файлов
+    created_count = create_placeholders(missing_images)
     
     print(f"Создано заглушек: {created_count}")
 
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Начальная очередь обхода из robots.txt и sitemap
+Sitemap'ы (в том числе вложенные sitemap_index.xml и сжатые .xml.gz) читаются
+до начала обхода, их URL сразу попадают в очередь. Очередь упорядочена по
+lastmod и глубине, поэтому при повторном зеркалировании сначала скачиваются
+измененные страницы, а страницы с прежним lastmod можно не скачивать
+"""
+
+import io
+import re
+import gzip
+import heapq
+import itertools
+from datetime import datetime, timezone
+from urllib.parse import urljoin
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+
+# Стандартные расположения sitemap, если robots.txt их не указывает
+SITEMAP_PATHS = ('/sitemap.xml', '/sitemap_index.xml', '/sitemaps.xml', '/sitemap/sitemap.xml')
+
+# Ограничения протокола sitemap: 50 МБ без сжатия на файл; число файлов ограничено от зацикливания
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+MAX_SITEMAPS = 100
+
+def parse_lastmod(value):
+    """lastmod (W3C datetime) в секундах с эпохи, None если не разбирается"""
+    if not value:
+        return None
+    value = value.strip().replace('Z', '+00:00')
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+def sitemap_body(content):
+    """Содержимое sitemap, .xml.gz распаковывается (не больше MAX_SITEMAP_BYTES)"""
+    if content[:2] == b'\x1f\x8b':
+        with gzip.GzipFile(fileobj=io.BytesIO(content)) as f:
+            return f.read(MAX_SITEMAP_BYTES)
+    return content[:MAX_SITEMAP_BYTES]
+
+def parse_sitemap(content):
+    """([(URL страницы, lastmod)], [URL вложенных sitemap]) из urlset или sitemapindex"""
+    body = sitemap_body(content)
+    pages, children = [], []
+
+    try:
+        root = ElementTree.fromstring(body)
+    except ElementTree.ParseError:
+        # Битый XML: достаем хотя бы адреса
+        for loc in re.findall(rb'<loc>\s*(.*?)\s*</loc>', body, re.S):
+            pages.append((loc.decode('utf-8', 'replace'), None))
+        return pages, children
+
+    def local(tag):
+        return tag.rsplit('}', 1)[-1]
+
+    index = local(root.tag) == 'sitemapindex'
+    for entry in root:
+        fields = {local(child.tag): (child.text or '').strip() for child in entry}
+        if not fields.get('loc'):
+            continue
+        if index:
+            children.append(fields['loc'])
+        else:
+            pages.append((fields['loc'], fields.get('lastmod') or None))
+
+    return pages, children
+
+def parse_robots(text, robots_url):
+    """RobotFileParser по тексту robots.txt"""
+    robots = RobotFileParser(robots_url)
+    robots.parse(text.splitlines())
+    return robots
+
+def load_robots(fetch, base_url):
+    """robots.txt сайта или None; fetch(url) возвращает ответ requests или None"""
+    robots_url = base_url.rstrip('/') + '/robots.txt'
+    response = fetch(robots_url)
+    if response is None or response.status_code != 200:
+        return None
+    return parse_robots(response.text, robots_url)
+
+def discover_sitemaps(fetch, base_url, robots=None, max_sitemaps=MAX_SITEMAPS):
+    """Все страницы из sitemap сайта {URL: lastmod}
+
+    Обходит sitemap'ы из robots.txt и стандартных путей, вложенные индексы
+    раскрываются. Каждый файл запрашивается один раз.
+    """
+    base_url = base_url.rstrip('/')
+    queue = list(robots.site_maps() or []) if robots else []
+    queue += [base_url + path for path in SITEMAP_PATHS]
+
+    visited = set()
+    pages = {}
+    while queue and len(visited) < max_sitemaps:
+        sitemap_url = urljoin(base_url + '/', queue.pop(0))
+        if sitemap_url in visited:
+            continue
+        visited.add(sitemap_url)
+
+        response = fetch(sitemap_url)
+        if response is None or response.status_code != 200 or not response.content:
+            continue
+        try:
+            entries, children = parse_sitemap(response.content)
+        except (OSError, EOFError):
+            # Поврежденный gzip
+            continue
+
+        for url, lastmod in entries:
+            pages.setdefault(url, lastmod)
+        queue.extend(children)
+
+    return pages
+
+class CrawlFrontier:
+    """Очередь обхода с приоритетами
+
+    Порядок: страницы с lastmod, изменившимся с прошлого обхода (новые первыми),
+    затем страницы без lastmod по глубине, затем страницы с прежним lastmod.
+    known - {URL: lastmod} прошлого обхода, robots - RobotFileParser или None.
+    Каждый URL попадает в очередь один раз.
+    """
+
+    def __init__(self, known=None, robots=None, user_agent='*'):
+        self.known = known or {}
+        self.robots = robots
+        self.user_agent = user_agent
+        self.heap = []
+        self.seen = set()
+        self.lastmod = {}
+        self.counter = itertools.count()
+        self.disallowed = 0
+
+    def allowed(self, url):
+        return self.robots is None or self.robots.can_fetch(self.user_agent, url)
+
+    def unchanged(self, url):
+        """lastmod страницы известен и не изменился с прошлого обхода"""
+        lastmod = self.lastmod.get(url)
+        return lastmod is not None and self.known.get(url) == lastmod
+
+    def push(self, url, depth=0, lastmod=None):
+        """Добавляет URL, возвращает False для повторов и запрещенных robots.txt"""
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        if not self.allowed(url):
+            self.disallowed += 1
+            return False
+
+        self.lastmod[url] = lastmod
+        if lastmod is None:
+            rank = 1
+        else:
+            rank = 2 if self.unchanged(url) else 0
+        timestamp = parse_lastmod(lastmod) or 0
+        heapq.heappush(self.heap, (rank, -timestamp, depth, next(self.counter), url))
+        return True
+
+    def pop(self):
+        """(URL, глубина, lastmod) следующей страницы"""
+        _, _, depth, _, url = heapq.heappop(self.heap)
+        return url, depth, self.lastmod.get(url)
+
+    def __len__(self):
+        return len(self.heap)
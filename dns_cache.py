@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Общий кэш разрешения имен для всех HTTP запросов процесса
+install_dns_cache() подменяет socket.getaddrinfo кэширующей версией, поэтому
+requests, urllib и TLS проверки используют один кэш. Записи живут ttl секунд,
+неудачные разрешения - negative_ttl секунд. Одновременные запросы одного имени
+выполняются один раз
+"""
+
+import sys
+import time
+import socket
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+# getaddrinfo() не сообщает TTL записей, поэтому срок жизни задается явно
+DEFAULT_TTL = 300
+NEGATIVE_TTL = 30
+
+_system_getaddrinfo = socket.getaddrinfo
+
+def with_port(infos, port):
+    """Результат getaddrinfo с подставленным портом"""
+    port = int(port or 0)
+    return [(family, type, proto, canonname, (sockaddr[0], port) + tuple(sockaddr[2:]))
+            for family, type, proto, canonname, sockaddr in infos]
+
+class DnsCache:
+    """Кэш socket.getaddrinfo с ограниченным временем жизни записей"""
+
+    def __init__(self, ttl=DEFAULT_TTL, negative_ttl=NEGATIVE_TTL):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.entries = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'errors': 0}
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """Совместим с socket.getaddrinfo
+        
+        Адреса кэшируются без учета порта, порт подставляется в результат,
+        поэтому имя, разрешенное для HTTPS, не разрешается заново для HTTP.
+        """
+        if port is not None and not str(port).isdigit():
+            # Имена сервисов ('http') разрешаются системой как есть
+            return _system_getaddrinfo(host, port, family, type, proto, flags)
+        key = (host, family, type, proto, flags)
+
+        while True:
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry and entry[0] > time.monotonic():
+                    self.stats['hits'] += 1
+                    if isinstance(entry[1], Exception):
+                        raise entry[1]
+                    return with_port(entry[1], port)
+
+                waiter = self.pending.get(key)
+                if waiter is None:
+                    # Этот поток разрешает имя, остальные ждут его результата
+                    waiter = self.pending[key] = threading.Event()
+                    self.stats['misses'] += 1
+                    break
+            waiter.wait()
+
+        entry = None
+        try:
+            result = _system_getaddrinfo(host, 0, family, type, proto, flags)
+            entry = (time.monotonic() + self.ttl, result)
+            return with_port(result, port)
+        except socket.gaierror as e:
+            entry = (time.monotonic() + self.negative_ttl, e)
+            raise
+        finally:
+            with self.lock:
+                if entry:
+                    self.entries[key] = entry
+                    if isinstance(entry[1], Exception):
+                        self.stats['errors'] += 1
+                self.pending.pop(key).set()
+
+    def resolve(self, hostname):
+        """Список IP адресов хоста без повторов"""
+        addresses = []
+        for info in self.getaddrinfo(hostname, 0, type=socket.SOCK_STREAM):
+            if info[4][0] not in addresses:
+                addresses.append(info[4][0])
+        return addresses
+
+    def prefetch(self, hostnames, max_workers=16):
+        """Параллельно разрешает имена заранее, возвращает {имя: адреса или None}"""
+        hostnames = list(dict.fromkeys(hostname for hostname in hostnames if hostname))
+
+        def resolve_one(hostname):
+            try:
+                return self.resolve(hostname)
+            except OSError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(hostnames, executor.map(resolve_one, hostnames)))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+# Общий кэш процесса
+DNS_CACHE = DnsCache()
+
+def install_dns_cache(cache=DNS_CACHE):
+    """Направляет все разрешения имен процесса через кэш (повторный вызов ничего не меняет)"""
+    socket.getaddrinfo = cache.getaddrinfo
+    return cache
+
+def main():
+    parser = argparse.ArgumentParser(description='Предварительное разрешение имен списка целей')
+    parser.add_argument('targets', help='Файл со списком целей (формат target_inventory)')
+    parser.add_argument('--threads', type=int, default=16, help='Параллельных разрешений')
+
+    args = parser.parse_args()
+
+    from target_inventory import load_inventory
+
+    hostnames = [urlsplit(target['url']).hostname for target in load_inventory(args.targets)]
+    start_time = time.time()
+    resolved = DNS_CACHE.prefetch(hostnames, args.threads)
+
+    for hostname, addresses in resolved.items():
+        print(f"{'✅' if addresses else '❌'} {hostname}: {', '.join(addresses) if addresses else 'не разрешается'}")
+    print(f"⏱️  {len(resolved)} имен за {time.time() - start_time:.2f} сек")
+
+if __name__ == "__main__":
+    main()
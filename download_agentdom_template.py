@@ -12,6 +12,7 @@ import time
 import re
 from pathlib import Path
 import mimetypes
+from dns_cache import install_dns_cache
 
 class WebsiteDownloader:
     def __init__(self, base_url, output_dir="agentdom_template"):
@@ -206,6 +207,7 @@ def main():
     """Главная функция"""
     base_url = "https://agentdom.100200.ru/"
     output_dir = "agentdom_template"
+    install_dns_cache()
     
     print("=" * 60)
     print("СКАЧИВАНИЕ ШАБЛОНА САЙТА AGENTDOM")
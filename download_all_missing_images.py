@@ -8,7 +8,8 @@ import os
 import re
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
-import time
+from dns_cache import install_dns_cache
+from probe_engine import AdaptiveRateController, controlled_request
 
 BASE_URL = "https://agentdom.100200.ru"
 
@@ -21,12 +22,18 @@ HEADERS = {
     'Connection': 'keep-alive',
 }
 
+# Темп запросов к хосту: с 2 запросов/сек (прежняя пауза 0.5 сек) до MAX_RATE,
+# снижается при 429/503 и росте задержки
+MAX_RATE = 10.0
+SESSION = requests.Session()
+RATE_CONTROL = AdaptiveRateController(2.0, MAX_RATE, max_concurrency=1)
+
 def download_image(url, local_path):
     """Скачивает изображение"""
     try:
         print(f"Скачиваю изображение: {url}")
         
-        response = requests.get(url, headers=HEADERS, timeout=30)
+        response = controlled_request(RATE_CONTROL, SESSION, 'GET', url, retries=1, headers=HEADERS, timeout=30)
         response.raise_for_status()
         
         # Создаем папку если не существует
@@ -67,7 +74,7 @@ def extract_missing_images_from_html(html_content, current_url):
     for link in soup.find_all('link', rel='stylesheet', href=True):
         css_url = urljoin(current_url, link['href'])
         try:
-            css_response = requests.get(css_url, headers=HEADERS, timeout=10)
+            css_response = controlled_request(RATE_CONTROL, SESSION, 'GET', css_url, retries=1, headers=HEADERS, timeout=10)
             if css_response.status_code == 200:
                 css_content = css_response.text
                 css_images = re.findall(r'url\(["\']?([^"\']+)["\']?\)', css_content)
@@ -145,8 +152,6 @@ def download_missing_images():
                 success_count += 1
         else:
             print(f"Уже существует: {local_path}")
-        
-        time.sleep(0.5)  # Пауза между запросами
     
     print(f"Скачано новых изображений: {success_count}")
     return success_count
@@ -200,8 +205,6 @@ def scan_all_pages_for_images():
         if not os.path.exists(local_path):
             if download_image(image_url, local_path):
                 success_count += 1
-        
-        time.sleep(0.3)  # Пауза между запросами
     
     print(f"Скачано изображений из HTML: {success_count}")
     return success_count
@@ -220,6 +223,7 @@ def create_missing_directories():
         print(f"Создана папка: {directory}")
 
 def main():
+    install_dns_cache()
     print("Полное скачивание всех недостающих изображений")
     print("=" * 60)
     
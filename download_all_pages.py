@@ -6,10 +6,11 @@
 
 import requests
 import os
-import time
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 import re
+from dns_cache import install_dns_cache
+from probe_engine import AdaptiveRateController, controlled_request
 
 # Базовый URL сайта
 BASE_URL = "https://agentdom.100200.ru"
@@ -54,6 +55,12 @@ HEADERS = {
     'Upgrade-Insecure-Requests': '1',
 }
 
+# Страницы запрашиваются через адаптивный темп: стартует с 1 запроса/сек
+# (прежняя пауза), растет до MAX_RATE, пока сервер отвечает стабильно
+MAX_RATE = 10.0
+SESSION = requests.Session()
+RATE_CONTROL = AdaptiveRateController(1.0, MAX_RATE, max_concurrency=1)
+
 def create_directory_structure():
     """Создает структуру папок для локального сайта"""
     directories = [
@@ -95,7 +102,7 @@ def download_page(url, local_path):
     try:
         print(f"📥 Скачиваю: {url}")
         
-        response = requests.get(url, headers=HEADERS, timeout=30)
+        response = controlled_request(RATE_CONTROL, SESSION, 'GET', url, retries=1, headers=HEADERS, timeout=30)
         response.raise_for_status()
         
         # Создаем папку если не существует
@@ -194,9 +201,6 @@ def download_all_pages():
                 
             except Exception as e:
                 print(f"❌ Ошибка при исправлении ссылок в {local_path}: {e}")
-        
-        # Пауза между запросами
-        time.sleep(1)
     
     print(f"\n🎉 Скачивание завершено!")
     print(f"✅ Успешно скачано: {success_count}/{total_count} страниц")
@@ -249,6 +253,7 @@ def copy_existing_files():
         print(f"✓ Скопировано изображение: {image_file}")
 
 if __name__ == "__main__":
+    install_dns_cache()
     print("Скачивание полного сайта agentdom.100200.ru")
     print("=" * 50)
     
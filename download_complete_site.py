@@ -10,8 +10,11 @@ import time
 from urllib.parse import urljoin, urlparse, unquote
 from bs4 import BeautifulSoup
 import re
-from collections import deque
+import json
 import hashlib
+from dns_cache import install_dns_cache
+from probe_engine import AdaptiveRateController, controlled_request
+from crawl_frontier import CrawlFrontier, load_robots, discover_sitemaps
 
 # Базовый URL сайта
 BASE_URL = "https://agentdom.100200.ru"
@@ -27,12 +30,22 @@ HEADERS = {
     'Upgrade-Insecure-Requests': '1',
 }
 
+# Потолок темпа по умолчанию (запросов/сек); стартовый темп - 1 запрос/сек, как прежняя пауза
+DEFAULT_MAX_RATE = 10.0
+
 class SiteDownloader:
-    def __init__(self):
+    def __init__(self, max_rate=DEFAULT_MAX_RATE):
         self.downloaded_urls = set()
         self.failed_urls = set()
-        self.url_queue = deque()
+        self.skipped_urls = set()
         self.local_site_dir = "complete_local_site"
+        # lastmod страниц прошлого зеркалирования: {URL: lastmod}
+        self.state_file = f"{self.local_site_dir}/.mirror_state.json"
+        self.frontier = None
+        self.session = requests.Session()
+        # Вместо паузы в 1 сек: темп растет до max_rate, пока сервер отвечает стабильно,
+        # и снижается при 429/503 или росте задержки
+        self.rate_control = AdaptiveRateController(min(1.0, max_rate), max_rate, max_concurrency=1)
         
     def create_directory_structure(self):
         """Создает базовую структуру папок"""
@@ -150,7 +163,8 @@ class SiteDownloader:
         try:
             print(f"Скачиваю: {url}")
             
-            response = requests.get(url, headers=HEADERS, timeout=30)
+            response = controlled_request(self.rate_control, self.session, 'GET', url, retries=1,
+                                          headers=HEADERS, timeout=30)
             response.raise_for_status()
             
             # Определяем локальный путь
@@ -170,6 +184,49 @@ class SiteDownloader:
             print(f"Ошибка при скачивании {url}: {e}")
             return None, False
     
+    def fetch(self, url):
+        """GET без сохранения (robots.txt, sitemap), None при ошибке"""
+        try:
+            return controlled_request(self.rate_control, self.session, 'GET', url, retries=1,
+                                      headers=HEADERS, timeout=30)
+        except requests.exceptions.RequestException as e:
+            print(f"Ошибка при запросе {url}: {e}")
+            return None
+
+    def load_state(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self, known):
+        state = dict(known)
+        for url in self.downloaded_urls | self.skipped_urls:
+            if self.frontier.lastmod.get(url):
+                state[url] = self.frontier.lastmod[url]
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+
+    def seed_frontier(self):
+        """Очередь из главной страницы и sitemap, с учетом правил robots.txt"""
+        known = self.load_state()
+        robots = load_robots(self.fetch, BASE_URL)
+        self.frontier = CrawlFrontier(known, robots)
+        self.frontier.push(BASE_URL + "/", depth=0)
+
+        sitemap_pages = discover_sitemaps(self.fetch, BASE_URL, robots)
+        seeded = 0
+        for url, lastmod in sitemap_pages.items():
+            normalized_url = self.normalize_url(url)
+            if self.is_valid_page_url(normalized_url) and self.frontier.push(normalized_url, 1, lastmod):
+                seeded += 1
+
+        print(f"Из sitemap добавлено страниц: {seeded}")
+        if self.frontier.disallowed:
+            print(f"Запрещено robots.txt: {self.frontier.disallowed}")
+        return known
+
     def fix_local_links(self, html_content):
         """Исправляет ссылки для локального использования"""
         soup = BeautifulSoup(html_content, 'html.parser')
@@ -268,17 +325,22 @@ class SiteDownloader:
         # Создаем структуру папок
         self.create_directory_structure()
         
-        # Начинаем с главной страницы
-        start_url = BASE_URL + "/"
-        self.url_queue.append(start_url)
+        # Главная страница и страницы из sitemap, измененные - первыми
+        known = self.seed_frontier()
         
         processed_count = 0
         
-        while self.url_queue:
-            current_url = self.url_queue.popleft()
+        while self.frontier:
+            current_url, depth, _ = self.frontier.pop()
             
-            # Пропускаем уже скачанные URL
-            if current_url in self.downloaded_urls:
+            # Страница не менялась с прошлого раза: ссылки берем из локальной копии
+            local_path = self.get_local_path(current_url)
+            if self.frontier.unchanged(current_url) and os.path.exists(local_path):
+                with open(local_path, 'r', encoding='utf-8') as f:
+                    html_content = f.read()
+                self.skipped_urls.add(current_url)
+                for link in self.extract_links_from_page(html_content, current_url):
+                    self.frontier.push(link, depth + 1)
                 continue
             
             # Скачиваем страницу
@@ -293,8 +355,7 @@ class SiteDownloader:
                 
                 # Добавляем новые ссылки в очередь
                 for link in new_links:
-                    if link not in self.downloaded_urls and link not in self.failed_urls:
-                        self.url_queue.append(link)
+                    self.frontier.push(link, depth + 1)
                 
                 # Исправляем ссылки в скачанной странице
                 try:
@@ -309,16 +370,14 @@ class SiteDownloader:
                 except Exception as e:
                     print(f"Ошибка при исправлении ссылок в {local_path}: {e}")
                 
-                print(f"Обработано страниц: {processed_count}, В очереди: {len(self.url_queue)}")
+                print(f"Обработано страниц: {processed_count}, В очереди: {len(self.frontier)}")
                 
             else:
                 self.failed_urls.add(current_url)
-            
-            # Пауза между запросами
-            time.sleep(1)
         
         print(f"\nСкачивание завершено!")
         print(f"Успешно скачано: {len(self.downloaded_urls)} страниц")
+        print(f"Без изменений (по lastmod): {len(self.skipped_urls)} страниц")
         print(f"Не удалось скачать: {len(self.failed_urls)} страниц")
         
         if self.failed_urls:
@@ -326,16 +385,27 @@ class SiteDownloader:
             for url in self.failed_urls:
                 print(f"  - {url}")
         
+        self.save_state(known)
+        
         # Копируем существующие файлы
         self.copy_existing_files()
         
         return len(self.downloaded_urls), len(self.failed_urls)
 
 def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Полное скачивание сайта agentdom.100200.ru')
+    parser.add_argument('--max-rate', type=float, default=DEFAULT_MAX_RATE,
+                        help=f'Потолок темпа запросов (запросов/сек, по умолчанию: {DEFAULT_MAX_RATE:g})')
+    
+    args = parser.parse_args()
+    install_dns_cache()
+    
     print("Полное скачивание сайта agentdom.100200.ru")
     print("=" * 50)
     
-    downloader = SiteDownloader()
+    downloader = SiteDownloader(args.max_rate)
     success_count, failed_count = downloader.download_complete_site()
     
     print(f"\nГотово! Локальный сайт создан в папке '{downloader.local_site_dir}'")
@@ -6,6 +6,7 @@
 import requests
 import os
 from urllib.parse import urlparse
+from dns_cache import install_dns_cache
 
 # Внешние файлы для скачивания
 EXTERNAL_FILES = [
@@ -69,4 +70,5 @@ def download_external_files():
     print(f"Скачано внешних файлов: {success_count}/{len(EXTERNAL_FILES)}")
 
 if __name__ == "__main__":
+    install_dns_cache()
     download_external_files()
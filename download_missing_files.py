@@ -6,6 +6,7 @@
 import requests
 import os
 from urllib.parse import urljoin
+from dns_cache import install_dns_cache
 
 BASE_URL = "https://agentdom.100200.ru"
 
@@ -55,4 +56,5 @@ def download_missing_files():
     print(f"Скачано файлов: {success_count}/{len(MISSING_FILES)}")
 
 if __name__ == "__main__":
+    install_dns_cache()
     download_missing_files()
@@ -8,26 +8,62 @@ import os
 import sys
 import time
 import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import urlparse
 
 # Импортируем наш расширенный сканер
 from enhanced_security_scanner import EnhancedSecurityScanner
+from target_inventory import Checkpoint, load_inventory, parse_shard, select_shard
+from result_stream import JsonlSink, SummaryReducer, SEVERITIES, count_vulnerabilities
+from dns_cache import DNS_CACHE, install_dns_cache
+from report_compiler import SectionCache, expand_streamed, iter_report, write_report
+
+# Домены по умолчанию, если список целей не передан
+DEFAULT_DOMAINS = [
+    'https://easyclaim.ru',
+    'https://www.easyclaim.ru',
+    'https://app.easyclaim.ru',
+    'https://api.easyclaim.ru'
+]
 
 class EasyClaimSecurityAnalyzer:
-    def __init__(self):
-        self.domains = [
-            'https://easyclaim.ru',
-            'https://www.easyclaim.ru',
-            'https://app.easyclaim.ru',
-            'https://api.easyclaim.ru'
-        ]
+    def __init__(self, max_parallel=4, delay=1.0, threads=5, targets=None, checkpoint=None, stream=None,
+                 adaptive=False, max_rate=None):
+        # max_parallel - сколько доменов сканируется одновременно,
+        # delay/threads - лимиты каждого домена (у каждого свой бюджет запросов),
+        # targets - цели из target_inventory.load_inventory() с собственными лимитами
+        self.max_parallel = max_parallel
+        self.delay = delay
+        self.threads = threads
+        # adaptive - темп каждого домена подстраивается под его ответы, не выше max_rate
+        self.adaptive = adaptive
+        self.max_rate = max_rate
+        
+        if targets is None:
+            targets = [{'url': url, 'delay': None, 'threads': None} for url in DEFAULT_DOMAINS]
+        self.targets = {target['url']: target for target in targets}
+        self.domains = list(self.targets)
+        
+        # Прогресс сохраняется после каждого домена
+        self.checkpoint = Checkpoint(checkpoint)
+        
+        # Потоковый режим: находки всех доменов пишутся в один JSONL файл по мере
+        # обнаружения, в памяти остаются только счетчики по доменам
+        self.sink = JsonlSink(stream) if stream else None
+        self.reducer = SummaryReducer()
+        if self.sink:
+            self.sink.subscribe(self.reducer.feed)
         
         self.results = {
             'scan_info': {
                 'timestamp': datetime.now().isoformat(),
                 'scanner_version': '2.0',
                 'domains_scanned': [],
+                'domains': list(self.domains),
                 'total_domains': len(self.domains)
             },
             'domain_results': {},
@@ -41,6 +77,9 @@ class EasyClaimSecurityAnalyzer:
             }
         }
         
+        # Домены сканируются параллельно, общие результаты обновляются под блокировкой
+        self.results_lock = threading.Lock()
+        
     def log(self, message, level="INFO"):
         """Логирование"""
         timestamp = time.strftime("%H:%M:%S")
@@ -58,17 +97,21 @@ class EasyClaimSecurityAnalyzer:
         """Сканирование одного домена"""
         self.log(f"🔍 Начинаем сканирование {domain_url}", "INFO")
         
-        scanner = EnhancedSecurityScanner(domain_url, delay=1.0)
+        target = self.targets.get(domain_url, {})
+        delay = target.get('delay') if target.get('delay') is not None else self.delay
+        threads = target.get('threads') or self.threads
+        
+        scanner = EnhancedSecurityScanner(domain_url, delay=delay, max_threads=threads, sink=self.sink,
+                                          rate=self.max_rate if self.adaptive else None, adaptive=self.adaptive)
         
         try:
             scanner.run_comprehensive_scan()
             results = scanner.results
+            if self.sink:
+                results = self.compact_results(scanner.base_url, results)
             
-            # Добавляем домен в список найденных
-            self.results['scan_info']['domains_scanned'].append(domain_url)
-            
-            # Сохраняем результаты домена
-            self.results['domain_results'][domain_url] = results
+            self.record_domain_results(domain_url, results)
+            self.checkpoint.save(domain_url, results)
             
             # Подсчитываем уязвимости
             domain_vulnerabilities = self.count_vulnerabilities(results)
@@ -80,35 +123,58 @@ class EasyClaimSecurityAnalyzer:
             
         except Exception as e:
             self.log(f"❌ Ошибка сканирования {domain_url}: {e}", "ERROR")
-            self.results['domain_results'][domain_url] = {'error': str(e)}
+            if self.sink:
+                self.sink.emit('scan_error', domain_url, error=str(e))
+            with self.results_lock:
+                self.results['domain_results'][domain_url] = {'error': str(e)}
             return {'total': 0, 'critical': 0, 'high': 0, 'medium': 0, 'low': 0}
             
-    def count_vulnerabilities(self, results):
-        """Подсчет уязвимостей в результатах"""
-        severity_counts = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
-        
-        # Подсчитываем проблемы по категориям
-        for category, items in results.items():
-            if isinstance(items, list):
-                for item in items:
-                    if isinstance(item, dict) and 'severity' in item:
-                        sev = item['severity']
-                        if sev in severity_counts:
-                            severity_counts[sev] += 1
-            elif isinstance(items, dict):
-                if 'severity' in items:
-                    sev = items['severity']
-                    if sev in severity_counts:
-                        severity_counts[sev] += 1
-                        
+    def compact_results(self, domain_url, results):
+        """Краткие результаты домена для потокового режима
+        
+        Находки уже записаны в поток, в памяти и контрольной точке остаются
+        только базовая информация и счетчики из потоковой свертки.
+        """
+        with self.sink.lock:
+            state = self.reducer.target(domain_url)
+            vulnerabilities = {severity.lower(): state[severity.lower()] for severity in SEVERITIES}
+            categories = dict(state['categories'])
+        vulnerabilities['total'] = sum(vulnerabilities.values())
+        
         return {
-            'total': sum(severity_counts.values()),
-            'critical': severity_counts['CRITICAL'],
-            'high': severity_counts['HIGH'],
-            'medium': severity_counts['MEDIUM'],
-            'low': severity_counts['LOW']
+            'stream': self.sink.filename,
+            'basic_info': results.get('basic_info', {}),
+            'vulnerabilities': vulnerabilities,
+            'categories': categories
         }
         
+    def count_vulnerabilities(self, results):
+        """Подсчет уязвимостей в результатах"""
+        return count_vulnerabilities(results)
+        
+    def record_domain_results(self, domain_url, results):
+        """Сохраняет результаты успешно просканированного домена"""
+        with self.results_lock:
+            # Добавляем домен в список найденных
+            if domain_url not in self.results['scan_info']['domains_scanned']:
+                self.results['scan_info']['domains_scanned'].append(domain_url)
+                
+            # Сохраняем результаты домена
+            self.results['domain_results'][domain_url] = results
+            
+    def merge_domain_summary(self, vulnerabilities):
+        """Добавляет статистику домена в общую сводку"""
+        with self.results_lock:
+            summary = self.results['summary']
+            summary['total_vulnerabilities'] += vulnerabilities['total']
+            summary['critical_issues'] += vulnerabilities['critical']
+            summary['high_issues'] += vulnerabilities['high']
+            summary['medium_issues'] += vulnerabilities['medium']
+            summary['low_issues'] += vulnerabilities['low']
+            
+            if vulnerabilities['total'] > 0:
+                summary['domains_with_issues'] += 1
+                
     def scan_all_domains(self):
         """Сканирование всех доменов"""
         self.log("🚀 Запуск комплексного сканирования безопасности EasyClaim", "INFO")
@@ -117,6 +183,7 @@ class EasyClaimSecurityAnalyzer:
         print("=" * 80)
         print(f"📅 Дата сканирования: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"🎯 Доменов для сканирования: {len(self.domains)}")
+        print(f"🧵 Параллельно: {self.max_parallel} доменов, {self.threads} потоков на домен")
         print(f"🌐 Домены:")
         for i, domain in enumerate(self.domains, 1):
             print(f"   {i}. {domain}")
@@ -124,304 +191,96 @@ class EasyClaimSecurityAnalyzer:
         
         start_time = time.time()
         
-        for i, domain in enumerate(self.domains, 1):
-            self.log(f"📊 Прогресс: {i}/{len(self.domains)} - {domain}", "INFO")
-            
-            vulnerabilities = self.scan_domain(domain)
+        # Домены из контрольной точки не сканируются повторно
+        completed = self.checkpoint.load()
+        for domain in self.domains:
+            if domain in completed:
+                results = completed[domain]['results']
+                self.record_domain_results(domain, results)
+                self.merge_domain_summary(self.count_vulnerabilities(results))
+                
+        pending = [domain for domain in self.domains if domain not in completed]
+        done_count = len(self.domains) - len(pending)
+        if done_count:
+            self.log(f"♻️  Восстановлено из контрольной точки: {done_count} доменов", "INFO")
             
-            # Обновляем общую статистику
-            self.results['summary']['total_vulnerabilities'] += vulnerabilities['total']
-            self.results['summary']['critical_issues'] += vulnerabilities['critical']
-            self.results['summary']['high_issues'] += vulnerabilities['high']
-            self.results['summary']['medium_issues'] += vulnerabilities['medium']
-            self.results['summary']['low_issues'] += vulnerabilities['low']
+        # Имена всех целей разрешаются заранее одним параллельным пакетом,
+        # сканеры доменов потом берут адреса из общего кэша
+        resolved = DNS_CACHE.prefetch([urlparse(domain).hostname for domain in pending])
+        unresolved = [hostname for hostname, addresses in resolved.items() if not addresses]
+        if unresolved:
+            self.log(f"Не разрешаются имена: {', '.join(unresolved)}", "WARNING")
+        
+        # Каждый домен ограничен своим сканером, общее число одновременных
+        # сканирований ограничено max_parallel
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            futures = {executor.submit(self.scan_domain, domain): domain for domain in pending}
             
-            if vulnerabilities['total'] > 0:
-                self.results['summary']['domains_with_issues'] += 1
+            for i, future in enumerate(as_completed(futures), done_count + 1):
+                domain = futures[future]
                 
-            # Пауза между доменами
-            if i < len(self.domains):
-                self.log(f"⏸️  Пауза между сканированиями (5 сек)...", "INFO")
-                time.sleep(5)
+                # Обновляем общую статистику по мере завершения доменов
+                self.merge_domain_summary(future.result())
+                self.log(f"📊 Прогресс: {i}/{len(self.domains)} - {domain}", "INFO")
                 
         end_time = time.time()
         total_duration = end_time - start_time
         
         self.log(f"✅ Комплексное сканирование завершено за {total_duration:.2f} секунд", "SUCCESS")
+        self.log(f"🌐 DNS кэш: {DNS_CACHE.stats['misses']} разрешений, {DNS_CACHE.stats['hits']} из кэша", "INFO")
+        
+    def merge_result_files(self, filenames):
+        """Объединяет JSON результаты нескольких шардов"""
+        for filename in filenames:
+            with open(filename, 'r', encoding='utf-8') as f:
+                shard_results = json.load(f)
+                
+            for domain_url, results in shard_results.get('domain_results', {}).items():
+                if domain_url not in self.targets:
+                    self.targets[domain_url] = {'url': domain_url, 'delay': None, 'threads': None}
+                    self.domains.append(domain_url)
+                    
+                if 'error' in results:
+                    with self.results_lock:
+                        self.results['domain_results'][domain_url] = results
+                    continue
+                    
+                self.record_domain_results(domain_url, results)
+                self.merge_domain_summary(self.count_vulnerabilities(results))
+                
+            self.log(f"📥 Объединен файл {filename}", "INFO")
+            
+        self.results['scan_info']['domains'] = list(self.domains)
+        self.results['scan_info']['total_domains'] = len(self.domains)
         
     def generate_markdown_report(self):
         """Генерация отчета в формате Markdown"""
-        report_content = self._create_markdown_report()
-        
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f'easyclaim_security_report_{timestamp}.md'
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(report_content)
+        # Отдельный подкаталог кэша для отчета сканера, устаревшие разделы удаляются
+        cache = SectionCache(scope='easyclaim_markdown')
+        write_report(filename, self._iter_markdown_report(cache))
+        cache.prune()
             
         self.log(f"📄 Markdown отчет сохранен: {filename}", "SUCCESS")
         return filename
         
+    def _iter_markdown_report(self, cache=None):
+        """Части Markdown отчета, разделы доменов берутся из кэша report_compiler"""
+        domain_results = expand_streamed(self.results['domain_results'])
+        return iter_report(domain_results, self.domains, self.results['summary'], cache,
+                           scan_info=self.results['scan_info'])
+        
     def _create_markdown_report(self):
         """Создание содержимого Markdown отчета"""
-        content = f"""# 🔐 Отчет по анализу безопасности EasyClaim.ru
-
-## 📋 Сводка сканирования
-
-| Параметр | Значение |
-|----------|----------|
-| **Дата сканирования** | {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} |
-| **Версия сканера** | 2.0 |
-| **Доменов просканировано** | {len(self.results['domain_results'])}/{len(self.domains)} |
-| **Общее количество уязвимостей** | {self.results['summary']['total_vulnerabilities']} |
-| **Доменов с уязвимостями** | {self.results['summary']['domains_with_issues']} |
-
-## 🚨 Статистика по критичности
-
-| Уровень риска | Количество | Цвет индикатор |
-|---------------|------------|---------------|
-| 🔴 **Критические** | {self.results['summary']['critical_issues']} | Требуют немедленного исправления |
-| 🟠 **Высокие** | {self.results['summary']['high_issues']} | Приоритетные для исправления |
-| 🟡 **Средние** | {self.results['summary']['medium_issues']} | Рекомендуется исправить |
-| 🔵 **Низкие** | {self.results['summary']['low_issues']} | Можно исправить в плановом порядке |
-
-## 🌐 Результаты по доменам
-
-"""
+        return ''.join(self._iter_markdown_report())
         
-        for domain_url in self.domains:
-            domain_results = self.results['domain_results'].get(domain_url, {})
+    def close(self):
+        """Закрывает поток событий"""
+        if self.sink:
+            self.sink.close()
             
-            if 'error' in domain_results:
-                content += f"""### ❌ {domain_url} - ОШИБКА СКАНИРОВАНИЯ
-
-```
-{domain_results['error']}
-```
-
-"""
-                continue
-                
-            vulnerabilites = self.count_vulnerabilities(domain_results)
-            
-            # Информация о домене
-            basic_info = domain_results.get('basic_info', {})
-            
-            content += f"""### 🌍 {domain_url}
-
-| Параметр | Значение |
-|----------|----------|
-| **Статус** | {basic_info.get('status_code', 'Не определен')} |
-| **Сервер** | {basic_info.get('server', 'Не определен')} |
-| **IP адрес** | {basic_info.get('ip_address', 'Не определен')} |
-| **Заголовок сайта** | {basic_info.get('title', 'Не определен')} |
-| **Общее количество проблем** | {vulnerabilites['total']} |
-
-#### 🚨 Найденные уязвимости
-
-"""
-            
-            if vulnerabilites['total'] == 0:
-                content += "✅ **Проблем безопасности не найдено**\n"
-            else:
-                if vulnerabilites['critical'] > 0:
-                    content += f"🔴 **Критические**: {vulnerabilites['critical']}\n"
-                if vulnerabilites['high'] > 0:
-                    content += f"🟠 **Высокие**: {vulnerabilites['high']}\n"
-                if vulnerabilites['medium'] > 0:
-                    content += f"🟡 **Средние**: {vulnerabilites['medium']}\n"
-                if vulnerabilites['low'] > 0:
-                    content += f"🔵 **Низкие**: {vulnerabilites['low']}\n"
-            
-            content += "\n#### 📊 Детальные результаты\n\n"
-
-            # SQL Injection
-            sql_injections = domain_results.get('sql_injection', [])
-            if sql_injections:
-                content += "##### 🔍 SQL Injection\n\n"
-                for injection in sql_injections[:3]:  # Показываем первые 3
-                    content += f"- **URL**: `{injection['url']}`\n"
-                    content += f"  - Payload: `{injection['payload'][:50]}...`\n"
-                    content += f"  - Детектирован паттерн: `{injection['error_pattern']}`\n\n"
-                
-            # XSS
-            xss_vulns = domain_results.get('xss_vulnerabilities', [])
-            if xss_vulns:
-                content += "##### ⚡ XSS уязвимости\n\n"
-                for xss in xss_vulns[:3]:
-                    content += f"- **URL**: `{xss['url']}`\n"
-                    content += f"  - Параметр: `{xss['parameter']}`\n"
-                    content += f"  - Payload: `{xss['payload'][:50]}...`\n\n"
-                    
-            # Directory Listing
-            dir_listing = domain_results.get('directory_listing', [])
-            if dir_listing:
-                content += "##### 📁 Directory Listing\n\n"
-                for listing in dir_listing[:3]:
-                    content += f"- **URL**: `{listing['url']}`\n"
-                    content += f"  - Размер контента: {listing['content_length']} байт\n\n"
-                    
-            # Sensitive Files
-            sensitive_files = domain_results.get('sensitive_files', [])
-            if sensitive_files:
-                content += "##### 🔐 Чувствительные файлы\n\n"
-                for file_info in sensitive_files[:3]:
-                    content += f"- **URL**: `{file_info['url']}`\n"
-                    content += f"  - Размер: {file_info['content_length']} байт\n"
-                    content += f"  - Содержит чувствительные данные: {'Да' if file_info.get('has_sensitive_data') else 'Нет'}\n\n"
-                    
-            # Admin Panels
-            admin_panels = domain_results.get('admin_panels', [])
-            if admin_panels:
-                content += "##### 👑 Административные панели\n\n"
-                for panel in admin_panels:
-                    content += f"- **URL**: `{panel['url']}`\n"
-                    content += f"  - Статус: {panel['status_code']}\n"
-                    content += f"  - Заголовок: {panel.get('title', 'Не определен')}\n"
-                    content += f"  - Логин форма: {'Да' if panel.get('has_login_form') else 'Нет'}\n\n"
-                    
-            # Security Headers
-            headers = domain_results.get('headers_security', {})
-            if headers:
-                content += "##### 🛡️ Заголовки безопасности\n\n"
-                missing_headers = headers.get('missing_headers', [])
-                if missing_headers:
-                    content += "**Отсутствующие заголовки:**\n"
-                    for header in missing_headers:
-                        content += f"- `{header}`\n"
-                    content += "\n"
-                else:
-                    content += "✅ Все основные заголовки безопасности присутны\n\n"
-                    
-            # API Endpoints
-            api_endpoints = domain_results.get('exposed_endpoints', [])
-            if api_endpoints:
-                content += "##### 🔌 API Endpoints\n\n"
-                for endpoint in api_endpoints[:3]:
-                    content += f"- **URL**: `{endpoint['url']}`\n"
-                    content += f"  - Статус: {endpoint['status_code']}\n"
-                    content += f"  - Content-Type: `{endpoint['content_type']}`\n"
-                    content += f"  - Методы: {', '.join(endpoint.get('methods_tested', []))}\n\n"
-                    
-            # Configuration Issues
-            config_issues = domain_results.get('configuration_issues', [])
-            if config_issues:
-                content += "##### ⚙️ Проблемы конфигурации\n\n"
-                for issue in config_issues[:3]:
-                    content += f"- **Тип**: {issue['type']}\n"
-                    content += f"  - Проблема: {issue.get('issue', 'Не указано')}\n"
-                    content += f"  - Текущее значение: `{issue.get('current_value', 'Не указано')}`\n\n"
-                    
-            content += "---\n\n"
-        
-        # Рекомендации
-        content += """## 🛡️ Рекомендации по улучшению безопасности
-
-### Приоритет 1 - Критические проблемы
-"""
-        
-        if self.results['summary']['critical_issues'] > 0:
-            content += """1. **Немедленно исправить критические уязвимости**
-   - Патрулировать все найденные критические проблемы
-   - Приостановить работу затронутых сервисов до исправления
-   - Провести дополнительное тестирование после исправлений
-
-2. **SQL Injection (если обнаружено)**
-   - Использовать подготовленные запросы (prepared statements)
-   - Валидировать и санитизировать все пользовательские входы
-   - Внедрить принцип наименьших привилегий для БД
-
-3. **Проблемы с аутентификацией**
-   - Восстановить доступ к административным панелям
-   - Установить комплексные пароли
-   - Внедрить многофакторную аутентификацию
-
-"""
-        else:
-            content += "- ✅ Критических уязвимостей не обнаружено\n\n"
-
-        content += """### Приоритет 2 - Высокие риски
-
-1. **Защита административных панелей**
-   - Ограничить доступ по IP адресам
-   - Внедрить strong authentication
-   - Настроить мониторинг попыток доступа
-
-2. **Защита чувствительных файлов**
-   - Удалить или защитить конфигурационные файлы
-   - Скрыть бэкапы от веб-доступа
-   - Обеспечить доступ только через SSH/SFTP
-
-3. **Directory listing**
-   - Отключить отображение содержимого каталогов
-   - Добавить index файлы в пустые директории
-   - Настроить запрет .htaccess
-
-### Приоритет 3 - Средние риски
-
-1. **Заголовки безопасности**
-   ```apache
-   # Apache .htaccess
-   Header always set X-Content-Type-Options nosniff
-   Header always set X-Frame-Options DENY
-   Header always set X-XSS-Protection "1; mode=block"
-   Header always set Strict-Transport-Security "max-age=31536000; includeSubDomains"
-   Header always set Content-Security-Policy "default-src 'self'"
-   ```
-
-2. **Загрузка файлов**
-   - Валидировать типы и содержимое файлов
-   - Хранить файлы вне веб-директории
-   - Переименовывать загруженные файлы
-   - Сканировать на вирусы
-
-### Приоритет 4 - Рекомендации
-
-1. **Настройка SSL/TLS**
-   - Перейти на HTTPS для всех доменов
-   - Настроить HSTS заголовок
-   - Обновить сертификаты до актуальных версий
-
-2. **Мониторинг**
-   - Внедрить систему мониторинга безопасности
-   - Настроить логирование и алерты
-   - Регулярно проводить сканирования
-
-3. **Backup стратегия**
-   - Создать резервные копии перед исправлениями
-   - Внедрить автоматический бэкап
-   - Протестировать процедуры восстановления
-
-## 📊 Техническая информация
-
-### Используемые технологии (по доменам)
-
-"""
-        
-        for domain_url in self.domains:
-            domain_results = self.results['domain_results'].get(domain_url, {})
-            tech_info = domain_results.get('technology_identification', {})
-            
-            if tech_info:
-                content += f"#### {domain_url}\n\n"
-                for category, technologies in tech_info.items():
-                    if technologies:
-                        content += f"- **{category}**: {', '.join(technologies)}\n"
-                content += "\n"
-
-        content += f"""## 📝 Информация о сканировании
-
-- **Дата создания отчета**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-- **Версия сканера**: 2.0
-- **Автоматически сгенерированный отчет**
-
----
-*Этот отчет создан с помощью расширенного сканера безопасности. Для получения дополнительной информации или проведения повторного сканирования обратитесь к администратору безопасности.*
-
-"""
-        
-        return content
-        
     def save_json_results(self, filename='easyclaim_security_results.json'):
         """Сохранение результатов в JSON"""
         with open(filename, 'w', encoding='utf-8') as f:
@@ -430,18 +289,56 @@ class EasyClaimSecurityAnalyzer:
         return filename
 
 def main():
+    parser = argparse.ArgumentParser(description='Комплексный анализ безопасности доменов EasyClaim')
+    parser.add_argument('--parallel', type=int, default=4, help='Сколько доменов сканировать одновременно')
+    parser.add_argument('--delay', type=float, default=1.0, help='Задержка между запросами к одному домену (сек)')
+    parser.add_argument('--threads', type=int, default=5, help='Потоков на один домен')
+    parser.add_argument('--targets', help='Файл со списком целей (одна на строку, "-" для stdin)')
+    parser.add_argument('--shard', default='1/1', help='Шард в формате i/N для распределенного сканирования')
+    parser.add_argument('--checkpoint', help='Файл контрольной точки (JSONL) для продолжения сканирования')
+    parser.add_argument('--output', help='Файл JSON результатов')
+    parser.add_argument('--merge', nargs='+', metavar='FILE', help='Объединить JSON результаты шардов вместо сканирования')
+    parser.add_argument('--adaptive', action='store_true', help='Подстраивать темп каждого домена под его ответы')
+    parser.add_argument('--max-rate', type=float, default=None, help='Потолок темпа одного домена (запросов/сек)')
+    parser.add_argument('--dns-ttl', type=float, default=None, help='Время жизни записей DNS кэша (сек)')
+    parser.add_argument('--stream', help='JSONL файл для потоковой записи находок (в JSON остаются только сводки)')
+    
+    args = parser.parse_args()
+    
+    if args.merge:
+        analyzer = EasyClaimSecurityAnalyzer(targets=[])
+        analyzer.merge_result_files(args.merge)
+        analyzer.save_json_results(args.output or 'easyclaim_security_results.json')
+        analyzer.generate_markdown_report()
+        return
+        
+    shard_index, shard_count = parse_shard(args.shard)
+    targets = load_inventory(args.targets) if args.targets else None
+    if targets is not None:
+        targets = select_shard(targets, shard_index, shard_count)
+        
+    # Для шардов файлы по умолчанию получают суффикс, чтобы их можно было объединить
+    suffix = f"_shard{shard_index}of{shard_count}" if shard_count > 1 else ""
+    output = args.output or f'easyclaim_security_results{suffix}.json'
+    checkpoint = args.checkpoint or (f'easyclaim_checkpoint{suffix}.jsonl' if args.targets else None)
+    
     print("🔐 EasyClaim.ru - Комплексный анализ безопасности")
     print("⚠️  ВНИМАНИЕ: Сканирование проводится только для целей тестирования собственной безопасности!")
     print("=" * 80)
     
-    analyzer = EasyClaimSecurityAnalyzer()
+    install_dns_cache()
+    if args.dns_ttl is not None:
+        DNS_CACHE.ttl = args.dns_ttl
+    
+    analyzer = EasyClaimSecurityAnalyzer(args.parallel, args.delay, args.threads, targets, checkpoint, args.stream,
+                                         args.adaptive, args.max_rate)
     
     try:
         # Запускаем сканирование всех доменов
         analyzer.scan_all_domains()
         
         # Сохраняем результаты
-        json_file = analyzer.save_json_results()
+        json_file = analyzer.save_json_results(output)
         
         # Генерируем Markdown отчет
         md_file = analyzer.generate_markdown_report()
@@ -475,6 +372,8 @@ def main():
         print(f"\n❌ Критическая ошибка: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        analyzer.close()
 
 if __name__ == "__main__":
     main()
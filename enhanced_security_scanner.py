@@ -9,8 +9,6 @@ import urllib.parse
 import re
 import time
 import json
-import ssl
-import socket
 from urllib.robotparser import RobotFileParser
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import argparse
@@ -18,17 +16,69 @@ import sys
 from pathlib import Path
 from datetime import datetime
 import hashlib
+import threading
+
+from probe_engine import (ProbeEngine, ResponseCache, TokenBucket, AdaptiveRateController, run_phases,
+                          read_limited, size_fields, PROBE_MAX_BYTES)
+from attack_surface import AttackSurface, SurfaceCrawler
+from probe_planner import ProbePlan
+from reflection_engine import find_reflection_contexts, payloads_for_contexts
+from response_fingerprint import SoftNotFoundDetector
+from result_stream import JsonlSink
+from signature_pack import load_signature_pack
+from tls_probe import TLS_PROBE, DEPRECATED_VERSIONS
+from dns_cache import DNS_CACHE, install_dns_cache
+
+# Методы без побочных эффектов, ответы на которые можно переиспользовать
+CACHEABLE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Потолок темпа адаптивного режима, если --rate не указан (запросов в секунду)
+DEFAULT_MAX_RATE = 20.0
+
+# Служебные ключи результатов, которые не являются категориями находок
+SERVICE_KEYS = ('errors', 'phase_timings', 'request_stats', 'signature_pack', 'attack_surface')
 
 class EnhancedSecurityScanner:
-    def __init__(self, base_url, delay=1.0, max_threads=10):
+    def __init__(self, base_url, delay=1.0, max_threads=10, rate=None, signature_pack=None, pack_params=4,
+                 crawl_pages=30, sink=None, adaptive=False):
         self.base_url = base_url.rstrip('/')
+        self.hostname = urllib.parse.urlparse(self.base_url).hostname
         self.delay = delay
         self.max_threads = max_threads
+        # Сколько параметров инъекционных проб отправлять в одном запросе
+        self.pack_params = pack_params
+        self.probe_plans = {}
+        # Страницы, параметры и формы, найденные обходом сайта
+        self.crawl_pages = crawl_pages
+        self.surface = AttackSurface()
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
         
+        # Общий бюджет запросов: по умолчанию не чаще одного запроса в delay секунд,
+        # но ожидание ответов перекрывается между потоками. В адаптивном режиме
+        # темп начинается с 1/delay и подстраивается под сервер, rate - потолок
+        self.adaptive = adaptive
+        if adaptive:
+            max_rate = rate or DEFAULT_MAX_RATE
+            self.rate_limiter = AdaptiveRateController(1.0 / delay if delay > 0 else max_rate, max_rate,
+                                                       max_threads, log=self.log)
+        else:
+            if rate is None:
+                rate = 1.0 / delay if delay > 0 else None
+            self.rate_limiter = TokenBucket(rate)
+        self.probe_engine = ProbeEngine(self.session, max_threads, self.rate_limiter, retries=1 if adaptive else 0)
+        
+        # Одинаковые идемпотентные запросы разных фаз выполняются один раз
+        self.response_cache = ResponseCache()
+        
+        # Пакет payload'ов, путей и сигнатур, общий для всех сканеров
+        self.pack = load_signature_pack(signature_pack)
+        
+        # Отпечаток страницы несуществующего пути, чтобы отбрасывать soft-404
+        self.soft_404 = SoftNotFoundDetector(self.base_url, lambda url: self.make_request(url, fresh=True, max_bytes=PROBE_MAX_BYTES))
+        
         # Расширенные результаты сканирования
         self.results = {
             'basic_info': {},
@@ -53,9 +103,20 @@ class EnhancedSecurityScanner:
             'template_injection': [],
             'exposed_endpoints': [],
             'api_security': {},
+            'phase_timings': {},
+            'request_stats': {},
+            'signature_pack': self.pack.info(),
+            'attack_surface': {},
             'errors': []
         }
         
+        # Фазы сканирования выполняются параллельно и пишут в общий словарь
+        self.results_lock = threading.Lock()
+        
+        # Поток событий (JsonlSink): находки записываются сразу после обнаружения
+        self.sink = sink
+        self.finding_ids = {}
+        
     def log(self, message, level="INFO"):
         """Логирование с временными метками"""
         timestamp = time.strftime("%H:%M:%S")
@@ -69,15 +130,118 @@ class EnhancedSecurityScanner:
         icon = colors.get(level, "📄")
         print(f"[{timestamp}] {icon} {level}: {message}")
         
-    def make_request(self, url, method='GET', **kwargs):
-        """Безопасный HTTP запрос с обработкой ошибок"""
+    def add_finding(self, category, item):
+        """Потокобезопасное добавление результата в категорию"""
+        with self.results_lock:
+            self.results[category].append(item)
+            finding_id = len(self.finding_ids)
+            self.finding_ids[id(item)] = finding_id
+            
+        if self.sink:
+            self.sink.emit('finding', self.base_url, category=category, id=finding_id, item=item)
+            
+    def update_finding(self, category, item):
+        """Сообщает в поток событий об изменении уже добавленной находки"""
+        if self.sink:
+            self.sink.emit('finding_update', self.base_url, category=category,
+                           id=self.finding_ids[id(item)], item=item)
+            
+    def make_request(self, url, method='GET', fresh=False, max_bytes=None, **kwargs):
+        """Безопасный HTTP запрос с обработкой ошибок
+        
+        Ответы на GET/HEAD/OPTIONS кэшируются на время сканирования по ключу
+        (метод, URL, тело запроса). fresh=True выполняет запрос в обход кэша.
+        max_bytes - режим пробы: тело читается потоком и обрезается до
+        max_bytes, полный размер берется из Content-Length (response_size).
+        """
+        method = method.upper()
+        
+        def fetch():
+            try:
+                kwargs.setdefault('timeout', 10)
+                if max_bytes:
+                    kwargs['stream'] = True
+                response = self.probe_engine.request(url, method, **kwargs)
+                if max_bytes:
+                    response = read_limited(response, max_bytes)
+                return response
+            except requests.exceptions.RequestException as e:
+                self.log(f"Ошибка запроса к {url}: {e}", "ERROR")
+                return None
+                
+        if fresh or method not in CACHEABLE_METHODS:
+            return fetch()
+            
+        body = kwargs.get('data', kwargs.get('json'))
+        key = (method, url, body if isinstance(body, (str, bytes, type(None))) else repr(body), max_bytes)
+        return self.response_cache.get_or_fetch(key, fetch)
+        
+    def fetch_all(self, urls, method='GET', **kwargs):
+        """Параллельные запросы к списку URL, ответы в исходном порядке"""
+        return self.probe_engine.map(lambda url: self.make_request(url, method, **kwargs), urls)
+            
+    def run_probe_plan(self, name, plan, detect, exact=False):
+        """Выполняет план проб и возвращает подтвержденные находки
+        
+        detect(probe, response) возвращает словарь {параметр: признак} для
+        параметров, которые дали срабатывание. Если упакованный запрос сработал
+        и признак нельзя отнести к отдельным параметрам, параметры
+        перепроверяются отдельными запросами. exact=True означает, что detect
+        сам различает параметры (например, по canary-маркерам).
+        Возвращает список (проба, параметр, ответ, признак).
+        """
+        findings = []
+        probes = plan.probes
+        
+        while probes:
+            responses = self.fetch_all([probe.url for probe in probes])
+            confirm = []
+            
+            for probe, response in zip(probes, responses):
+                if not response:
+                    continue
+                flagged = detect(probe, response)
+                if not flagged:
+                    continue
+                    
+                if exact or len(probe.params) == 1 or len(flagged) < len(probe.params):
+                    findings.extend((probe, param, response, evidence) for param, evidence in flagged.items())
+                else:
+                    confirm.extend(plan.split(probe, list(flagged)))
+                    
+            probes = confirm
+            
+        self.probe_plans[name] = plan.stats()
+        return findings
+        
+    def discover_attack_surface(self):
+        """Обход сайта: страницы, параметры и формы для остальных фаз"""
+        self.log("Обход сайта для поиска endpoint'ов и форм...")
+        
+        crawler = SurfaceCrawler(self.base_url, self.fetch_all, max_pages=self.crawl_pages)
+        self.surface = crawler.crawl()
+        self.results['attack_surface'] = self.surface.to_dict()
+        
+        self.log(f"Страниц: {len(self.surface.pages)}, endpoint'ов с параметрами: "
+                 f"{len(self.surface.parameters)}, форм: {len(self.surface.forms)}", "INFO")
+                 
+    def injection_points(self, wordlist_params):
+        """Endpoint'ы и их параметры для инъекционных проб
+        
+        Параметры из списка пробуются на корне сайта, а найденные обходом -
+        на тех endpoint'ах, где они реально используются.
+        """
+        points = {self.base_url + '/': list(wordlist_params)}
+        for endpoint, params in self.surface.parameters.items():
+            points.setdefault(endpoint, [])
+            points[endpoint].extend(param for param in params if param not in points[endpoint])
+        return points
+        
+    def resolve_ip(self):
+        """IP адрес хоста цели (из общего кэша DNS_CACHE)"""
         try:
-            time.sleep(self.delay)
-            kwargs.setdefault('timeout', 10)
-            response = self.session.request(method, url, **kwargs)
-            return response
-        except requests.exceptions.RequestException as e:
-            self.log(f"Ошибка запроса к {url}: {e}", "ERROR")
+            return DNS_CACHE.resolve(self.hostname)[0] if self.hostname else None
+        except OSError:
             return None
             
     def analyze_basic_info(self):
@@ -93,7 +257,7 @@ class EnhancedSecurityScanner:
             'url': self.base_url,
             'status_code': response.status_code,
             'server': response.headers.get('Server', 'Не указан'),
-            'ip_address': socket.gethostbyname(urllib.parse.urlparse(self.base_url).netloc) if urllib.parse.urlparse(self.base_url).netloc else None,
+            'ip_address': self.resolve_ip(),
             'title': self.extract_title(response.text),
             'response_time': response.elapsed.total_seconds(),
             'content_length': len(response.text),
@@ -111,29 +275,52 @@ class EnhancedSecurityScanner:
         try:
             parsed_url = urllib.parse.urlparse(self.base_url)
             if parsed_url.scheme == 'https':
-                # Проверяем SSL сертификат
-                hostname = parsed_url.hostname
+                # Рукопожатие и проверка версий протокола выполняются параллельно,
+                # результаты кэшируются по (IP, SNI) для всех сканеров процесса
+                tls = TLS_PROBE.analyze(parsed_url.hostname, parsed_url.port or 443)
+                cert = tls.get('certificate') or {}
                 
-                # Создаем SSL контекст
-                context = ssl.create_default_context()
+                self.results['ssl_security'] = {
+                    'certificate_valid': tls['certificate_valid'],
+                    'certificate_version': cert.get('version'),
+                    'issuer': cert.get('issuer', {}),
+                    'subject': cert.get('subject', {}),
+                    'valid_from': cert.get('notBefore'),
+                    'valid_until': cert.get('notAfter'),
+                    'serial_number': cert.get('serialNumber'),
+                    'certificate_sha256': tls.get('certificate_sha256'),
+                    'cipher_suite': tls.get('cipher_suite'),
+                    'protocol_version': tls.get('protocol_version'),
+                    'ip_address': tls.get('ip_address'),
+                    'supported_protocols': tls.get('protocols', {}),
+                    'weak_ciphers': tls.get('weak_ciphers', {})
+                }
                 
-                with socket.create_connection((hostname, 443), timeout=10) as sock:
-                    with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                        cert = ssock.getpeercert()
-                        
-                        self.results['ssl_security'] = {
-                            'certificate_valid': True,
-                            'certificate_version': cert.get('version'),
-                            'issuer': cert.get('issuer', {}),
-                            'subject': cert.get('subject', {}),
-                            'valid_from': cert.get('notBefore'),
-                            'valid_until': cert.get('notAfter'),
-                            'serial_number': cert.get('serialNumber'),
-                            'cipher_suite': ssock.cipher(),
-                            'protocol_version': ssock.version()
-                        }
+                if tls['certificate_valid']:
+                    self.log("SSL сертификат валидный", "SUCCESS")
+                else:
+                    self.results['ssl_security']['error'] = tls.get('error')
+                    self.log(f"Ошибка анализа SSL: {tls.get('error')}", "ERROR")
+                    
+                for version in DEPRECATED_VERSIONS:
+                    if tls.get('protocols', {}).get(version):
+                        self.add_finding('configuration_issues', {
+                            'type': 'TLS',
+                            'issue': f'Поддерживается устаревший протокол {version}',
+                            'current_value': version,
+                            'severity': 'MEDIUM'
+                        })
+                        self.log(f"Поддерживается устаревший протокол {version}", "WARNING")
                         
-                        self.log("SSL сертификат валидный", "SUCCESS")
+                weak = [group for group, accepted in tls.get('weak_ciphers', {}).items() if accepted]
+                if weak:
+                    self.add_finding('configuration_issues', {
+                        'type': 'TLS',
+                        'issue': 'Принимаются слабые шифры',
+                        'current_value': ', '.join(weak),
+                        'severity': 'MEDIUM'
+                    })
+                    self.log(f"Принимаются слабые шифры: {', '.join(weak)}", "WARNING")
             else:
                 self.results['ssl_security'] = {
                     'certificate_valid': False,
@@ -152,123 +339,125 @@ class EnhancedSecurityScanner:
         """Тестирование на SQL инъекции"""
         self.log("Тестирование SQL инъекций...")
         
-        sql_payloads = [
-            "' OR '1'='1",
-            "' OR 1=1--",
-            "'; DROP TABLE users; --",
-            "' UNION SELECT * FROM users--",
-            "1' OR '1'='1' --",
-            "' AND (SELECT * FROM (SELECT COUNT(*), CONCAT(version(), FLOOR(RAND(0)*2)) x FROM information_schema.tables GROUP BY x)a) --"
-        ]
+        sql_payloads = self.pack.payloads['sql_injection']
         
         # Параметры для тестирования
-        test_params = ['id', 'user', 'name', 'search', 'query', 'page', 'filter', 'category']
-        test_urls = [self.base_url + '/' + param for param in test_params]
+        test_params = self.pack.wordlists['sql_params']
         
-        for url in test_urls:
-            for payload in sql_payloads:
-                test_url = url + f"?{urllib.parse.parse_qs(url.split('?')[1] if '?' in url else 'id=1')[0].split('=')[0]}={payload}"
-                response = self.make_request(test_url)
-                
-                if response and response.status_code == 200:
-                    # Проверяем признаки SQL ошибок
-                    sql_error_patterns = [
-                        r"mysql_fetch_array\(\)",
-                        r"ORA-\d{5}",  # Oracle error
-                        r"Microsoft.*ODBC.*SQL Server",
-                        r"PostgreSQL.*ERROR",
-                        r"Warning.*mysql_",
-                        r"valid MySQL result",
-                        r"MySqlClient\."
-                    ]
-                    
-                    for pattern in sql_error_patterns:
-                        if re.search(pattern, response.text, re.IGNORECASE):
-                            self.results['sql_injection'].append({
-                                'url': test_url,
-                                'payload': payload,
-                                'error_pattern': pattern,
-                                'status_code': response.status_code,
-                                'severity': 'HIGH'
-                            })
-                            self.log(f"Возможная SQL инъекция: {test_url}", "WARNING")
-                            break
+        # Без canary-маркеров: payload'ы отправляются как в пакете сигнатур
+        plan = ProbePlan(self.pack_params)
+        for endpoint, params in self.injection_points(test_params).items():
+            plan.add_matrix([endpoint], params, sql_payloads)
+        
+        def detect(probe, response):
+            if response.status_code != 200:
+                return {}
+            # Проверяем признаки SQL ошибок
+            match = self.pack.signatures['sql_errors'].search(response.text)
+            if not match:
+                return {}
+            # По тексту ошибки нельзя понять, какой параметр ее вызвал:
+            # упакованные параметры перепроверяются по одному
+            signature, _ = match
+            return {param: signature for param in probe.params}
+            
+        for probe, param, response, signature in self.run_probe_plan('sql_injection', plan, detect):
+            self.add_finding('sql_injection', {
+                'url': probe.url,
+                'payload': probe.payloads[param],
+                'parameter': param,
+                'error_pattern': signature.pattern,
+                'status_code': response.status_code,
+                'severity': 'HIGH'
+            })
+            self.log(f"Возможная SQL инъекция: {probe.url}", "WARNING")
                             
     def test_xss_vulnerabilities(self):
         """Тест на XSS уязвимости"""
         self.log("Тестирование XSS уязвимостей...")
         
-        xss_payloads = [
-            "<script>alert('XSS')</script>",
-            "javascript:alert('XSS')",
-            "';alert('XSS');//",
-            "\"><script>alert('XSS')</script>",
-            "<img src=x onerror=alert('XSS')>",
-            "<svg onload=alert('XSS')>",
-            "%3Cscript%3Ealert%28%27XSS%27%29%3C%2Fscript%3E",
-            "<iframe src=javascript:alert('XSS')></iframe>"
-        ]
+        # payload'ы сгруппированы по контексту отражения: html, attribute, script, comment
+        xss_payloads = self.pack.payloads['xss']
         
-        test_params = ['q', 'search', 'name', 'comment', 'message', 'input']
+        test_params = self.pack.wordlists['xss_params']
+        points = self.injection_points(test_params)
         
-        for param in test_params:
-            for payload in xss_payloads:
-                test_url = f"{self.base_url}?{param}={urllib.parse.quote(payload)}"
-                response = self.make_request(test_url)
-                
-                if response and response.status_code == 200:
-                    # Проверяем, отражается ли payload в ответе
-                    if urllib.parse.unquote(payload) in response.text:
-                        self.results['xss_vulnerabilities'].append({
-                            'url': test_url,
-                            'payload': payload,
-                            'parameter': param,
-                            'status_code': response.status_code,
-                            'severity': 'MEDIUM'
-                        })
-                        self.log(f"Возможная XSS уязвимость: {test_url}", "WARNING")
+        # Этап 1: один запрос на endpoint со всеми параметрами, у каждого свой canary-маркер
+        canary_plan = ProbePlan(max(len(params) for params in points.values()), canaries=True)
+        for endpoint, params in points.items():
+            canary_plan.add_matrix([endpoint], params, [''])
+        
+        def detect_reflection(probe, response):
+            reflected = {}
+            for param in probe.params:
+                contexts = find_reflection_contexts(response.text, probe.canaries[param])
+                if contexts:
+                    reflected[param] = contexts
+            return reflected
+            
+        reflections = {}
+        for probe, param, _, contexts in self.run_probe_plan('xss_canary', canary_plan, detect_reflection, exact=True):
+            reflections.setdefault((probe.endpoint, param), set()).update(contexts)
+            
+        if not reflections:
+            self.log("Параметры не отражаются в ответе, XSS payload'ы не отправляются", "INFO")
+            return
+            
+        # Этап 2: только отражающиеся параметры и только payload'ы их контекстов
+        groups = {}
+        for (endpoint, param), contexts in reflections.items():
+            groups.setdefault((endpoint, frozenset(contexts)), []).append(param)
+            
+        # Отправляется canary + payload: маркер указывает, какой параметр отразился
+        plan = ProbePlan(self.pack_params, canaries=True)
+        for (endpoint, contexts), params in groups.items():
+            plan.add_matrix([endpoint], params, payloads_for_contexts(xss_payloads, contexts))
+            
+        def detect(probe, response):
+            if response.status_code != 200:
+                return {}
+            # Проверяем, отражается ли payload вместе с маркером параметра
+            return {
+                param: True for param in probe.params
+                if probe.canaries[param] + urllib.parse.unquote(probe.payloads[param]) in response.text
+            }
+            
+        for probe, param, response, _ in self.run_probe_plan('xss', plan, detect, exact=True):
+            self.add_finding('xss_vulnerabilities', {
+                'url': probe.url,
+                'payload': probe.payloads[param],
+                'parameter': param,
+                'reflection_contexts': sorted(reflections[(probe.endpoint, param)]),
+                'status_code': response.status_code,
+                'severity': 'MEDIUM'
+            })
+            self.log(f"Возможная XSS уязвимость: {probe.url}", "WARNING")
                         
     def test_csrf_vulnerabilities(self):
         """Тест на CSRF уязвимости"""
         self.log("Поиск форм без CSRF защиты...")
         
-        response = self.make_request(self.base_url)
-        if not response:
-            return
-            
-        # Ищем формы в коде
-        forms = re.findall(r'<form[^>]*>(.*?)</form>', response.text, re.DOTALL | re.IGNORECASE)
-        
+        # Формы со всех страниц, найденных обходом сайта
         csrf_protection_found = False
         
-        for i, form in enumerate(forms):
-            # Проверяем наличие CSRF токенов
-            csrf_patterns = [
-                r'csrf.*token',
-                r'_token',
-                r'authenticity_token',
-                r'csrfmiddlewaretoken'
-            ]
-            
-            has_csrf = False
-            for pattern in csrf_patterns:
-                if re.search(pattern, form, re.IGNORECASE):
-                    has_csrf = True
-                    csrf_protection_found = True
-                    break
+        for i, form in enumerate(self.surface.forms):
+            # Проверяем наличие CSRF токенов среди имен полей
+            has_csrf = any(self.pack.signatures['csrf_tokens'].search(field['name'])
+                           for field in form['fields'])
+            if has_csrf:
+                csrf_protection_found = True
                     
-            if not has_csrf and ('method="post"' in form.lower() or 'method=post' in form.lower()):
+            if not has_csrf and form['method'] == 'POST':
                 # Найдена форма POST без CSRF защиты
-                action_match = re.search(r'action=["\']([^"\']*)["\']', form)
-                action = action_match.group(1) if action_match else 'Не указано'
-                
-                self.results['csrf_vulnerabilities'].append({
+                self.add_finding('csrf_vulnerabilities', {
                     'form_number': i + 1,
-                    'action': action,
+                    'page': form['page'],
+                    'action': form['action'],
+                    'fields': [field['name'] for field in form['fields']],
                     'issue': 'Форма POST без CSRF токена',
                     'severity': 'MEDIUM'
                 })
-                self.log(f"Форма без CSRF защиты найдена: {action}", "WARNING")
+                self.log(f"Форма без CSRF защиты найдена: {form['action']}", "WARNING")
                 
         if csrf_protection_found:
             self.log("CSRF защита обнаружена", "SUCCESS")
@@ -304,7 +493,7 @@ class EnhancedSecurityScanner:
                 if expected_values is not None:
                     if isinstance(expected_values, list):
                         if headers[header] not in expected_values:
-                            self.results['configuration_issues'].append({
+                            self.add_finding('configuration_issues', {
                                 'type': 'Security Header',
                                 'header': header,
                                 'current_value': headers[header],
@@ -313,7 +502,7 @@ class EnhancedSecurityScanner:
                             })
                     else:
                         if headers[header] != expected_values:
-                            self.results['configuration_issues'].append({
+                            self.add_finding('configuration_issues', {
                                 'type': 'Security Header',
                                 'header': header,
                                 'current_value': headers[header],
@@ -339,31 +528,21 @@ class EnhancedSecurityScanner:
         """Поиск уязвимости directory listing"""
         self.log("Поиск directory listing...")
         
-        directories = [
-            '/admin/', '/wp-admin/', '/administrator/', '/phpmyadmin/',
-            '/backup/', '/backups/', '/config/', '/includes/',
-            '/templates/', '/themes/', '/uploads/', '/files/',
-            '/images/', '/css/', '/js/', '/assets/',
-            '/logs/', '/tmp/', '/temp/', '/cache/',
-            '/.git/', '/.svn/', '/.env/', '/.htaccess',
-            '/api/', '/v1/', '/v2/', '/api/v1/', '/api/v2/'
-        ]
+        directories = self.pack.wordlists['directories']
         
-        for directory in directories:
-            url = self.base_url + directory
-            response = self.make_request(url)
-            
-            if response and response.status_code == 200:
+        urls = [self.base_url + directory for directory in directories]
+        # Директории реальных страниц, найденных обходом
+        urls.extend(directory for directory in self.surface.directories() if directory not in urls)
+        responses = self.fetch_all(urls, max_bytes=PROBE_MAX_BYTES)
+        
+        for url, response in zip(urls, responses):
+            if response and response.status_code == 200 and not self.soft_404.is_soft_404(response):
                 # Проверяем признаки directory listing
-                if any(indicator in response.text.lower() for indicator in [
-                    'index of', 'parent directory', 'directory listing',
-                    '[dir]', '[file]', 'name</th>', 'last modified',
-                    '<a href="../', '<a href="./'
-                ]):
-                    self.results['directory_listing'].append({
+                if any(indicator in response.text.lower() for indicator in self.pack.indicators['directory_listing']):
+                    self.add_finding('directory_listing', {
                         'url': url,
                         'status_code': response.status_code,
-                        'content_length': len(response.text),
+                        **size_fields(response),
                         'severity': 'HIGH'
                     })
                     self.log(f"Найден directory listing: {url}", "WARNING")
@@ -372,43 +551,22 @@ class EnhancedSecurityScanner:
         """Поиск чувствительных файлов"""
         self.log(f"Поиск чувствительных файлов...")
         
-        sensitive_files = [
-            '/.env', '/.htaccess', '/.htpasswd', '/web.config',
-            '/robots.txt', '/sitemap.xml', '/crossdomain.xml',
-            '/phpinfo.php', '/info.php', '/test.php', '/config.php',
-            '/database.php', '/db.php', '/settings.php', '/config.ini',
-            '/.git/config', '/.svn/entries', '/composer.json',
-            '/package.json', '/yarn.lock', '/package-lock.json',
-            '/admin-config.php', '/wp-config.php', '/configuration.php',
-            '/config.json', '/app.config', '/application.properties',
-            '/.DS_Store', '/Thumbs.db', '/backup.sql', '/dump.sql'
-        ]
+        sensitive_files = self.pack.wordlists['sensitive_files']
         
-        for file_path in sensitive_files:
-            url = self.base_url + file_path
-            response = self.make_request(url)
-            
-            if response and response.status_code == 200:
+        urls = [self.base_url + file_path for file_path in sensitive_files]
+        responses = self.fetch_all(urls, max_bytes=PROBE_MAX_BYTES)
+        
+        for url, response in zip(urls, responses):
+            if response and response.status_code == 200 and not self.soft_404.is_soft_404(response):
                 # Проверяем содержимое файла на наличие чувствительной информации
                 content_preview = response.text[:500] + ('...' if len(response.text) > 500 else '')
                 
-                sensitive_patterns = [
-                    r'password\s*=\s*["\'].*["\']',
-                    r'api[_-]?key\s*=\s*["\'].*["\']',
-                    r'secret[_-]?key\s*=\s*["\'].*["\']',
-                    r'database[_-]?password\s*=\s*["\'].*["\']',
-                    r'mysql.*password.*=',
-                    r'connectionstring.*password',
-                    r'pwd=.*password',
-                ]
-                
-                sensitivity_detected = any(re.search(pattern, content_preview, re.IGNORECASE) 
-                                         for pattern in sensitive_patterns)
+                sensitivity_detected = self.pack.signatures['sensitive_data'].search(content_preview) is not None
                 
-                self.results['sensitive_files'].append({
+                self.add_finding('sensitive_files', {
                     'url': url,
                     'status_code': response.status_code,
-                    'content_length': len(response.text),
+                    **size_fields(response),
                     'content_preview': content_preview,
                     'has_sensitive_data': sensitivity_detected,
                     'severity': 'HIGH' if sensitivity_detected else 'MEDIUM'
@@ -451,20 +609,7 @@ class EnhancedSecurityScanner:
             technologies['Web Server'].append('IIS')
             
         # CMS системы
-        cms_patterns = [
-            (r'wp-content', 'WordPress'),
-            (r'wp-json', 'WordPress'),
-            (r'/admin/login.asp', 'Joomla'),
-            (r'joomla_session', 'Joomla'),
-            (r'/bitrix/admin/', 'Bitrix'),
-            (r'bx-onload', 'Bitrix'),
-            (r'/concrete/css/', 'Concrete5'),
-            (r'drupal', 'Drupal')
-        ]
-        
-        for pattern, cms in cms_patterns:
-            if re.search(pattern, html_content, re.IGNORECASE):
-                technologies['CMS'].append(cms)
+        technologies['CMS'].extend(self.pack.signatures['cms'].matched_names(html_content))
                 
         # Языки программирования
         if 'php' in server_header or '.php' in html_content:
@@ -477,17 +622,7 @@ class EnhancedSecurityScanner:
             technologies['Programming Language'].append('Node.js')
             
         # JavaScript фреймворки
-        js_patterns = [
-            (r'jquery', 'jQuery'),
-            (r'react', 'React'),
-            (r'vue\.js', 'Vue.js'),
-            (r'angular', 'Angular'),
-            (r'bootstrap', 'Bootstrap')
-        ]
-        
-        for pattern, framework in js_patterns:
-            if re.search(pattern, html_content, re.IGNORECASE):
-                technologies['JavaScript Framework'].append(framework)
+        technologies['JavaScript Framework'].extend(self.pack.signatures['js_frameworks'].matched_names(html_content))
                 
         # Базы данных
         if 'wordpress' in technologies.get('CMS', []):
@@ -504,24 +639,18 @@ class EnhancedSecurityScanner:
         """Поиск уязвимостей загрузки файлов"""
         self.log("Поиск функций загрузки файлов...")
         
-        # Ищем форму загрузки файлов
-        response = self.make_request(self.base_url)
-        if not response:
-            return
-            
-        upload_forms = re.findall(r'enctype=["\']multipart/form-data["\'][^>]*>(.*?)</form>', 
-                                 response.text, re.DOTALL | re.IGNORECASE)
-        
-        for i, form in enumerate(upload_forms):
-            file_inputs = re.findall(r'input[^>]*type=["\']file["\'][^>]*>', form, re.IGNORECASE)
+        # Ищем формы загрузки файлов на всех найденных страницах
+        for i, form in enumerate(self.surface.forms):
+            file_inputs = [field for field in form['fields'] if field['type'] == 'file']
             
             for file_input in file_inputs:
-                # Извлекаем информацию о поле загрузки
-                name_match = re.search(r'name=["\']([^"\']+)["\']', file_input)
-                name = name_match.group(1) if name_match else f"file_{i}"
+                name = file_input['name']
                 
-                self.results['file_upload_vulnerabilities'].append({
+                self.add_finding('file_upload_vulnerabilities', {
                     'form_number': i + 1,
+                    'page': form['page'],
+                    'action': form['action'],
+                    'multipart': form['enctype'] == 'multipart/form-data',
                     'input_field': name,
                     'issue': 'Обнаружена форма загрузки файлов',
                     'recommendations': [
@@ -534,21 +663,17 @@ class EnhancedSecurityScanner:
                 })
                 self.log(f"Обнаружена форма загрузки файлов: {name}", "INFO")
                 
-    def test_api_endpoints(self):
-        """Поиск и тестирование API endpoint'ов"""
+    def discover_api_endpoints(self):
+        """Поиск API endpoint'ов"""
         self.log("Поиск API endpoint'ов...")
         
-        api_paths = [
-            '/api/', '/api/v1/', '/api/v2/', '/api/v3/',
-            '/rest/', '/graphql/', '/json/', '/xml/',
-            '/v1/', '/v2/', '/v3/', '/webservice/'
-        ]
+        api_paths = self.pack.wordlists['api_paths']
         
-        for path in api_paths:
-            url = self.base_url + path
-            response = self.make_request(url)
-            
-            if response and response.status_code in [200, 401, 403]:
+        urls = [self.base_url + path for path in api_paths]
+        responses = self.fetch_all(urls, max_bytes=PROBE_MAX_BYTES)
+        
+        for url, response in zip(urls, responses):
+            if response and response.status_code in [200, 401, 403] and not self.soft_404.is_soft_404(response):
                 # Проверяем заголовок Content-Type для определения API
                 content_type = response.headers.get('Content-Type', '')
                 
@@ -560,84 +685,80 @@ class EnhancedSecurityScanner:
                 )
                 
                 if is_api:
-                    self.results['exposed_endpoints'].append({
+                    self.add_finding('exposed_endpoints', {
                         'url': url,
                         'status_code': response.status_code,
                         'content_type': content_type,
-                        'content_length': len(response.text) if response.text else 0,
+                        **size_fields(response),
                         'methods_tested': ['GET'],
                         'severity': 'MEDIUM'
                     })
                     self.log(f"Найден API endpoint: {url}", "INFO")
                     
-        # Тестируем методы HTTP
-        for endpoint in self.results['exposed_endpoints']:
-            url = endpoint['url']
-            
-            methods_to_test = ['POST', 'PUT', 'DELETE', 'PATCH']
-            for method in methods_to_test:
-                if method == 'POST' or method == 'DELETE':
-                    response = self.make_request(url, method=method)
-                    if response and response.status_code != 404:
-                        endpoint['methods_tested'].append(method)
-                        endpoint['severity'] = 'HIGH'
-                        self.log(f"API поддерживает {method}: {url}", "WARNING")
+    def test_api_endpoints(self):
+        """Тестирование HTTP методов найденных API endpoint'ов"""
+        self.log("Тестирование методов API endpoint'ов...")
+        
+        methods_to_test = ['POST', 'PUT', 'DELETE', 'PATCH']
+        method_probes = [
+            (endpoint, method)
+            for endpoint in self.results['exposed_endpoints']
+            for method in methods_to_test
+            if method == 'POST' or method == 'DELETE'
+        ]
+        responses = self.probe_engine.map(
+            lambda probe: self.make_request(probe[0]['url'], method=probe[1]), method_probes)
+        
+        for (endpoint, method), response in zip(method_probes, responses):
+            if response and response.status_code != 404:
+                endpoint['methods_tested'].append(method)
+                endpoint['severity'] = 'HIGH'
+                self.update_finding('exposed_endpoints', endpoint)
+                self.log(f"API поддерживает {method}: {endpoint['url']}", "WARNING")
                         
     def test_xml_injection(self):
         """Тестирование XML/XXE атак"""
         self.log("Тестирование XML/XXE атак...")
         
-        xml_payloads = [
-            '<?xml version="1.0"?><data>test</data>',
-            '<?xml version="1.0"?><!DOCTYPE data [<!ENTITY xxe SYSTEM "file:///etc/passwd">]><data>&xxe;</data>',
-            '<?xml version="1.0"?><!DOCTYPE data [<!ENTITY xxe SYSTEM "file:///windows/system32/drivers/etc/hosts">]><data>&xxe;</data>'
-        ]
+        xml_payloads = self.pack.payloads['xml']
         
         # Ищем XML endpoints
-        xml_endpoints = ['/xml', '/api/xml', '/soap', '/rpc']
+        xml_endpoints = self.pack.wordlists['xml_endpoints']
         
-        for endpoint in xml_endpoints:
-            url = self.base_url + endpoint
-            
-            for payload in xml_payloads:
-                headers = {'Content-Type': 'application/xml'}
-                response = self.make_request(url, method='POST', 
-                                          data=payload, headers=headers)
-                
-                if response and response.status_code in [200, 500]:
-                    # Проверяем наличие файлового содержимого
-                    if any(indicator in response.text.lower() for indicator in [
-                        'root:x:', 'bin/bash', 'localhost', '127.0.0.1'
-                    ]):
-                        self.results['xml_attacks'].append({
-                            'url': url,
-                            'payload': payload[:100] + '...' if len(payload) > 100 else payload,
-                            'response_preview': response.text[:200] + '...',
-                            'severity': 'CRITICAL'
-                        })
-                        self.log(f"Возможная XXE уязвимость: {url}", "CRITICAL")
+        headers = {'Content-Type': 'application/xml'}
+        probes = [
+            (self.base_url + endpoint, payload)
+            for endpoint in xml_endpoints
+            for payload in xml_payloads
+        ]
+        responses = self.probe_engine.map(
+            lambda probe: self.make_request(probe[0], method='POST', data=probe[1], headers=headers),
+            probes)
+        
+        for (url, payload), response in zip(probes, responses):
+            if response and response.status_code in [200, 500]:
+                # Проверяем наличие файлового содержимого
+                if any(indicator in response.text.lower() for indicator in self.pack.indicators['xml_disclosure']):
+                    self.add_finding('xml_attacks', {
+                        'url': url,
+                        'payload': payload[:100] + '...' if len(payload) > 100 else payload,
+                        'response_preview': response.text[:200] + '...',
+                        'severity': 'CRITICAL'
+                    })
+                    self.log(f"Возможная XXE уязвимость: {url}", "CRITICAL")
                         
     def find_admin_panels(self):
         """Поиск административных панелей"""
         self.log("Поиск административных панелей...")
         
-        admin_paths = [
-            '/admin', '/wp-admin', '/administrator', '/phpmyadmin',
-            '/admin.php', '/login.php', '/admin/login', '/dashboard',
-            '/control', '/manage', '/panel', '/cpanel', '/webmail',
-            '/admin/index.php', '/admin/login.php', '/admin/dashboard.php',
-            '/manager', '/administration', '/console', '/console.aspx'
-        ]
+        admin_paths = self.pack.wordlists['admin_paths']
         
-        for path in admin_paths:
-            url = self.base_url + path
-            response = self.make_request(url)
-            
-            if response and response.status_code in [200, 401, 403]:
-                if any(indicator in response.text.lower() for indicator in [
-                    'login', 'password', 'username', 'admin', 'dashboard',
-                    'control panel', 'administration', 'wp-login', 'signin'
-                ]):
+        urls = [self.base_url + path for path in admin_paths]
+        responses = self.fetch_all(urls, max_bytes=PROBE_MAX_BYTES)
+        
+        for url, response in zip(urls, responses):
+            if response and response.status_code in [200, 401, 403] and not self.soft_404.is_soft_404(response):
+                if any(indicator in response.text.lower() for indicator in self.pack.indicators['admin_panel']):
                     admin_info = {
                         'url': url,
                         'status_code': response.status_code,
@@ -652,7 +773,7 @@ class EnhancedSecurityScanner:
                         admin_info['severity'] = 'CRITICAL'
                         self.log(f"Возможна автоматическая авторизация: {url}", "CRITICAL")
                     
-                    self.results['admin_panels'].append(admin_info)
+                    self.add_finding('admin_panels', admin_info)
                     self.log(f"Найдена админ панель: {url}", "WARNING")
                     
     def analyze_cookies(self):
@@ -698,7 +819,7 @@ class EnhancedSecurityScanner:
             if security_issues:
                 self.log(f"Найдены проблемы в cookie '{cookie_info['name']}': {', '.join(security_issues)}", "WARNING")
                 
-            self.results['cookies_analysis'].append(cookie_info)
+            self.add_finding('cookies_analysis', cookie_info)
             
     def extract_title(self, html_content):
         """Извлечение заголовка страницы"""
@@ -709,52 +830,71 @@ class EnhancedSecurityScanner:
         """Запуск комплексного сканирования"""
         start_time = time.time()
         self.log(f"🔍 Начинаем комплексное сканирование {self.base_url}")
+        if self.sink:
+            self.sink.emit('scan_start', self.base_url, signature_pack=self.pack.info())
         
-        # Базовый анализ
-        self.analyze_basic_info()
-        self.analyze_ssl_security()
-        
-        # Поиск уязвимостей
-        tests = [
-            self.find_directory_listing,
-            self.find_sensitive_files,
-            self.find_admin_panels,
-            self.identify_technologies,
-            self.analyze_headers_security,
-            self.test_file_upload_vulnerabilities,
-            self.test_api_endpoints,
-            self.analyze_cookies
-        ]
+        # Фазы и их зависимости: фазы, которым нужны найденные обходом страницы
+        # и формы, ждут его, остальные выполняются параллельно под общим лимитом запросов
+        phases = {
+            # Базовый анализ
+            'analyze_basic_info': (self.analyze_basic_info, []),
+            'analyze_ssl_security': (self.analyze_ssl_security, []),
+            'discover_attack_surface': (self.discover_attack_surface, []),
+            
+            # Поиск уязвимостей
+            'find_directory_listing': (self.find_directory_listing, ['discover_attack_surface']),
+            'find_sensitive_files': (self.find_sensitive_files, []),
+            'find_admin_panels': (self.find_admin_panels, []),
+            'identify_technologies': (self.identify_technologies, []),
+            'analyze_headers_security': (self.analyze_headers_security, []),
+            'test_file_upload_vulnerabilities': (self.test_file_upload_vulnerabilities, ['discover_attack_surface']),
+            'test_csrf_vulnerabilities': (self.test_csrf_vulnerabilities, ['discover_attack_surface']),
+            'discover_api_endpoints': (self.discover_api_endpoints, []),
+            'test_api_endpoints': (self.test_api_endpoints, ['discover_api_endpoints']),
+            'analyze_cookies': (self.analyze_cookies, []),
+            
+            # Инъекционные атаки (более интенсивные тесты)
+            'test_sql_injection': (self.test_sql_injection, ['discover_attack_surface']),
+            'test_xss_vulnerabilities': (self.test_xss_vulnerabilities, ['discover_attack_surface']),
+            'test_xml_injection': (self.test_xml_injection, []),
+        }
         
-        # Инъекционные атаки (более интенсивные тесты)
-        injection_tests = [
-            self.test_sql_injection,
-            self.test_xss_vulnerabilities,
-            self.test_xml_injection
-        ]
+        def on_error(name, error):
+            self.log(f"Ошибка при выполнении {name}: {error}", "ERROR")
+            self.add_finding('errors', f"{name}: {error}")
+            
+        timings = run_phases(phases, on_error=on_error)
+        self.results['phase_timings'] = dict(sorted(timings.items(), key=lambda item: -item[1]))
+        self.results['request_stats'] = {
+            'cache_misses': self.response_cache.misses,
+            'cache_hits': self.response_cache.hits,
+            'soft_404_pruned': self.soft_404.pruned,
+            'probe_plans': self.probe_plans
+        }
+        if self.adaptive:
+            self.results['request_stats']['rate_control'] = self.rate_limiter.snapshot()
+        self.log(f"Кэш ответов: {self.response_cache.misses} запросов, "
+                 f"{self.response_cache.hits} повторных использований", "INFO")
+        if self.soft_404.pruned:
+            self.log(f"Отброшено soft-404 ответов: {self.soft_404.pruned}", "INFO")
         
-        # Запускаем основные тесты
-        for test in tests:
-            try:
-                test()
-            except Exception as e:
-                self.log(f"Ошибка при выполнении {test.__name__}: {e}", "ERROR")
-                self.results['errors'].append(f"{test.__name__}: {e}")
-                
-        # Запускаем инъекционные тесты с задержкой
-        self.log("🚀 Запуск инъекционных тестов", "INFO")
-        for test in injection_tests:
-            try:
-                test()
-            except Exception as e:
-                self.log(f"Ошибка при выполнении {test.__name__}: {e}", "ERROR")
-                self.results['errors'].append(f"{test.__name__}: {e}")
-                
         end_time = time.time()
         scan_duration = end_time - start_time
         
+        if self.sink:
+            self.emit_sections(scan_duration)
+        
         self.log(f"✅ Сканирование завершено за {scan_duration:.2f} секунд", "SUCCESS")
         
+    def emit_sections(self, scan_duration):
+        """Записывает в поток итоговые разделы-словари и событие конца сканирования"""
+        for key, value in self.results.items():
+            if isinstance(value, dict) and value and key not in ('phase_timings', 'request_stats'):
+                self.sink.emit('section', self.base_url, key=key, value=value)
+        self.sink.emit('scan_end', self.base_url, duration=round(scan_duration, 2),
+                       phase_timings=self.results['phase_timings'],
+                       request_stats=self.results['request_stats'])
+        
     def save_results(self, filename='enhanced_security_report.json'):
         """Сохранение результатов сканирования"""
         with open(filename, 'w', encoding='utf-8') as f:
@@ -800,7 +940,7 @@ class EnhancedSecurityScanner:
             'high_issues': high_issues,
             'medium_issues': medium_issues,
             'low_issues': low_issues,
-            'categories_found': len([k for k, v in self.results.items() if v and k != 'errors']),
+            'categories_found': len([k for k, v in self.results.items() if v and k not in SERVICE_KEYS]),
             'errors_during_scan': len(self.results['errors'])
         }
         
@@ -828,6 +968,11 @@ class EnhancedSecurityScanner:
         if summary['errors_during_scan'] > 0:
             print(f"\n⚠️  Ошибок во время сканирования: {summary['errors_during_scan']}")
             
+        if self.results['phase_timings']:
+            print("\n⏱️  САМЫЕ ДОЛГИЕ ФАЗЫ:")
+            for name, duration in list(self.results['phase_timings'].items())[:5]:
+                print(f"   {name}: {duration:.2f} сек")
+            
         print("\n" + "="*80)
 
 def main():
@@ -836,17 +981,36 @@ def main():
     parser.add_argument('--delay', type=float, default=1.0, help='Задержка между запросами (сек)')
     parser.add_argument('--output', default='enhanced_security_report.json', help='Файл для сохранения результатов')
     parser.add_argument('--threads', type=int, default=5, help='Максимальное количество потоков')
+    parser.add_argument('--rate', type=float, default=None, help='Максимум запросов в секунду (по умолчанию 1/delay)')
+    parser.add_argument('--signatures', default=None, help='Пакет сигнатур (по умолчанию signature_pack.json)')
+    parser.add_argument('--pack-params', type=int, default=4,
+                        help='Параметров в одном инъекционном запросе (1 - без упаковки, по умолчанию: 4)')
+    parser.add_argument('--crawl-pages', type=int, default=30,
+                        help='Максимум страниц при обходе сайта (по умолчанию: 30)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Подстраивать темп под сервер (AIMD), --rate задает потолок')
+    parser.add_argument('--stream', default=None,
+                        help='JSONL файл, в который находки записываются по мере обнаружения')
     
     args = parser.parse_args()
+    # Имена разрешаются один раз на процесс, а не на каждое новое соединение
+    install_dns_cache()
     
     print("🔐 Расширенный сканер безопасности")
     print("⚠️  ВНИМАНИЕ: Используйте только на собственных сайтах!")
     print(f"🎯 Цель: {args.url}")
     print(f"⏱️  Задержка: {args.delay} сек")
     print(f"🧵 Потоков: {args.threads}")
+    if args.adaptive:
+        print(f"🚦 Адаптивный темп, потолок: {args.rate or DEFAULT_MAX_RATE} запросов/сек")
+    elif args.rate:
+        print(f"🚦 Лимит: {args.rate} запросов/сек")
     print("-" * 80)
     
-    scanner = EnhancedSecurityScanner(args.url, args.delay, args.threads)
+    sink = JsonlSink(args.stream) if args.stream else None
+    scanner = EnhancedSecurityScanner(args.url, args.delay, args.threads, args.rate, args.signatures,
+                                      args.pack_params, args.crawl_pages, sink, args.adaptive)
+    print(f"🗂️  Сигнатуры: {scanner.pack.name} {scanner.pack.version}")
     
     try:
         scanner.run_comprehensive_scan()
@@ -859,6 +1023,9 @@ def main():
     except Exception as e:
         print(f"\n❌ Критическая ошибка: {e}")
         scanner.save_results(args.output)
+    finally:
+        if sink:
+            sink.close()
 
 if __name__ == "__main__":
     main()
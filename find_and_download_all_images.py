@@ -9,7 +9,8 @@ import os
 import re
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
-import time
+from dns_cache import install_dns_cache
+from probe_engine import AdaptiveRateController, controlled_request
 
 BASE_URL = "https://agentdom.100200.ru"
 
@@ -22,12 +23,18 @@ HEADERS = {
     'Connection': 'keep-alive',
 }
 
+# Вместо паузы 0.5 сек после каждого изображения темп подстраивается под
+# ответы сервера: растет до MAX_RATE и снижается при 429/503
+MAX_RATE = 10.0
+SESSION = requests.Session()
+RATE_CONTROL = AdaptiveRateController(2.0, MAX_RATE, max_concurrency=1)
+
 def download_image(url, local_path):
     """Скачивает изображение"""
     try:
         print(f"Скачиваю: {url}")
         
-        response = requests.get(url, headers=HEADERS, timeout=30)
+        response = controlled_request(RATE_CONTROL, SESSION, 'GET', url, retries=1, headers=HEADERS, timeout=30)
         response.raise_for_status()
         
         # Создаем папку если не существует
@@ -69,7 +76,7 @@ def extract_images_from_html(html_content, current_url):
     for link in soup.find_all('link', rel='stylesheet', href=True):
         css_url = urljoin(current_url, link['href'])
         try:
-            css_response = requests.get(css_url, headers=HEADERS, timeout=10)
+            css_response = controlled_request(RATE_CONTROL, SESSION, 'GET', css_url, retries=1, headers=HEADERS, timeout=10)
             if css_response.status_code == 200:
                 css_content = css_response.text
                 css_images = re.findall(r'url\(["\']?([^"\']+)["\']?\)', css_content)
@@ -194,7 +201,6 @@ def download_missing_images(all_images):
             missing_count += 1
             if download_image(image_url, local_path):
                 success_count += 1
-            time.sleep(0.5)  # Пауза между запросами
         else:
             print(f"Уже существует: {local_path}")
     
@@ -216,6 +222,7 @@ def create_missing_directories():
         print(f"Создана папка: {directory}")
 
 def main():
+    install_dns_cache()
     print("Полный поиск и скачивание всех изображений")
     print("=" * 60)
     
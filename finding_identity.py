@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Идентичность находок между запусками сканирования
+Находка определяется целью, категорией, URL (без значений параметров, в которых
+меняются canary-маркеры), параметром и сигнатурой. Из этих полей считается
+стабильный хэш, по которому сравниваются результаты разных запусков
+"""
+
+import json
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl
+
+from result_stream import collect_results
+from report_compiler import expand_streamed
+
+# Списки в результатах, которые не являются находками
+SKIP_CATEGORIES = ('errors',)
+
+def normalize_url(url):
+    """URL без значений параметров и якоря, имена параметров отсортированы"""
+    if not url:
+        return ''
+    parts = urlsplit(url)
+    names = sorted({name for name, _ in parse_qsl(parts.query, keep_blank_values=True)})
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', '&'.join(names), ''))
+
+def identity_fields(target, category, item):
+    """Поля, которые определяют находку: цель, категория, URL, параметр, сигнатура"""
+    if not isinstance(item, dict):
+        return [target, category, '', '', str(item)]
+
+    url = normalize_url(item.get('url') or item.get('action') or '')
+    parameter = item.get('parameter') or item.get('input_field') or item.get('header') or item.get('name') or ''
+    signature = item.get('error_pattern') or item.get('pattern') or item.get('payload') or item.get('issue') or ''
+    return [target, category, url, parameter, signature]
+
+def finding_id(target, category, item):
+    """Стабильный идентификатор находки (16 hex символов)"""
+    key = json.dumps(identity_fields(target.rstrip('/'), category, item), ensure_ascii=False)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+def load_scan(filename):
+    """Результаты по целям {цель: результаты} из файла любого из сканеров
+
+    Поддерживаются easyclaim_security_results.json (domain_results),
+    security_report.json (target_url + vulnerabilities), отчеты
+    EnhancedSecurityScanner/VulnerabilityScanner и JSONL поток находок.
+    """
+    if filename.endswith('.jsonl'):
+        return collect_results(filename)
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if 'domain_results' in data:
+        return expand_streamed(data['domain_results'])
+
+    if 'vulnerabilities' in data:
+        return {data.get('target_url', ''): data['vulnerabilities']}
+
+    target = data.get('basic_info', {}).get('url', '')
+    return {target: data}
+
+def iter_findings(scan):
+    """(id, цель, категория, находка) для всех находок результатов по целям"""
+    for target, results in scan.items():
+        target = (target or '').rstrip('/')
+        for category, items in results.items():
+            if category in SKIP_CATEGORIES or not isinstance(items, list):
+                continue
+            for item in items:
+                yield finding_id(target, category, item), target, category, item
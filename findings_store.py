@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Хранилище находок в SQLite
+Результаты всех сканеров (EnhancedSecurityScanner, VulnerabilityScanner,
+security_analyzer, EasyClaim, JSONL поток) приводятся к одной схеме
+scans / targets / findings с индексами по пути, категории, критичности и
+времени, поэтому исторические запросы не требуют перечитывать JSON файлы
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import argparse
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from finding_identity import load_scan, iter_findings
+
+DEFAULT_DB = 'findings.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    source_hash TEXT NOT NULL UNIQUE,
+    scanned_at TEXT NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS targets (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    scan_id INTEGER NOT NULL REFERENCES scans(id) ON DELETE CASCADE,
+    target_id INTEGER NOT NULL REFERENCES targets(id),
+    finding_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    url TEXT,
+    path TEXT,
+    parameter TEXT,
+    severity TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scans_scanned_at ON scans(scanned_at);
+CREATE INDEX IF NOT EXISTS idx_findings_path ON findings(path);
+CREATE INDEX IF NOT EXISTS idx_findings_finding_id ON findings(finding_id);
+CREATE INDEX IF NOT EXISTS idx_findings_target_category ON findings(target_id, category);
+CREATE INDEX IF NOT EXISTS idx_findings_category_severity ON findings(category, severity);
+CREATE INDEX IF NOT EXISTS idx_findings_scan ON findings(scan_id);
+"""
+
+def connect(db_path=DEFAULT_DB):
+    """Соединение с хранилищем, схема создается при первом подключении"""
+    connection = sqlite3.connect(db_path)
+    connection.row_factory = sqlite3.Row
+    connection.execute('PRAGMA foreign_keys = ON')
+    connection.executescript(SCHEMA)
+    return connection
+
+def scan_time(filename):
+    """Время сканирования из файла результатов, иначе время изменения файла"""
+    timestamp = None
+    try:
+        if filename.endswith('.jsonl'):
+            with open(filename, 'r', encoding='utf-8') as f:
+                timestamp = datetime.fromtimestamp(json.loads(f.readline())['ts'])
+        else:
+            with open(filename, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            value = data.get('scan_info', {}).get('timestamp') or data.get('timestamp')
+            if value:
+                timestamp = datetime.fromisoformat(value)
+    except (ValueError, KeyError, OSError):
+        timestamp = None
+
+    if timestamp is None:
+        timestamp = datetime.fromtimestamp(os.path.getmtime(filename))
+    return timestamp.isoformat(timespec='seconds')
+
+def file_hash(filename):
+    sha = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def finding_location(target, item):
+    """URL и путь находки, цель по origin URL, если сканер ее не записал"""
+    url = ''
+    if isinstance(item, dict):
+        url = item.get('url') or item.get('action') or ''
+    parts = urlsplit(url)
+    if not target and parts.netloc:
+        target = f"{parts.scheme}://{parts.netloc}"
+    return target, url, parts.path if url else ''
+
+class FindingsStore:
+    """Запись и запросы находок в SQLite"""
+
+    def __init__(self, db_path=DEFAULT_DB):
+        self.db_path = db_path
+        self.connection = connect(db_path)
+        self.target_ids = {}
+
+    def target_id(self, url):
+        if url not in self.target_ids:
+            self.connection.execute('INSERT OR IGNORE INTO targets (url) VALUES (?)', (url,))
+            row = self.connection.execute('SELECT id FROM targets WHERE url = ?', (url,)).fetchone()
+            self.target_ids[url] = row['id']
+        return self.target_ids[url]
+
+    def ingest_file(self, filename):
+        """Загружает файл результатов, возвращает число находок или None, если файл уже загружен"""
+        source_hash = file_hash(filename)
+        if self.connection.execute('SELECT 1 FROM scans WHERE source_hash = ?', (source_hash,)).fetchone():
+            return None
+
+        return self.ingest_scan(load_scan(filename), os.path.abspath(filename), source_hash, scan_time(filename))
+
+    def ingest_scan(self, scan, source, source_hash, scanned_at):
+        """Записывает результаты по целям {цель: результаты} одной транзакцией"""
+        with self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO scans (source, source_hash, scanned_at, ingested_at) VALUES (?, ?, ?, ?)',
+                (source, source_hash, scanned_at, datetime.now().isoformat(timespec='seconds')))
+            scan_id = cursor.lastrowid
+
+            rows = []
+            for fid, target, category, item in iter_findings(scan):
+                target, url, path = finding_location(target, item)
+                parameter = severity = None
+                if isinstance(item, dict):
+                    parameter = item.get('parameter') or item.get('input_field') or item.get('header') or item.get('name')
+                    severity = item.get('severity')
+                rows.append((scan_id, self.target_id(target), fid, category, url, path, parameter, severity,
+                             json.dumps(item, ensure_ascii=False, default=str)))
+
+            self.connection.executemany(
+                'INSERT INTO findings (scan_id, target_id, finding_id, category, url, path, parameter, severity, data) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+        return len(rows)
+
+    def query(self, path=None, category=None, severity=None, target=None, days=None, limit=None):
+        """Находки по фильтрам, новые сканы первыми"""
+        conditions = []
+        params = []
+
+        if path:
+            conditions.append('f.path = ?')
+            params.append(path)
+        if category:
+            conditions.append('f.category = ?')
+            params.append(category)
+        if severity:
+            conditions.append('f.severity = ?')
+            params.append(severity.upper())
+        if target:
+            conditions.append('t.url LIKE ?')
+            params.append(f'%{target}%')
+        if days:
+            conditions.append('s.scanned_at >= ?')
+            params.append((datetime.now() - timedelta(days=days)).isoformat(timespec='seconds'))
+
+        sql = ('SELECT s.scanned_at, t.url AS target, f.finding_id, f.category, f.url, f.parameter, f.severity '
+               'FROM findings f JOIN scans s ON s.id = f.scan_id JOIN targets t ON t.id = f.target_id')
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY s.scanned_at DESC'
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+
+        return self.connection.execute(sql, params).fetchall()
+
+    def stats(self):
+        """Количество сканов, целей и находок по категориям"""
+        counts = {
+            table: self.connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            for table in ('scans', 'targets', 'findings')
+        }
+        counts['categories'] = dict(self.connection.execute(
+            'SELECT category, COUNT(*) FROM findings GROUP BY category ORDER BY COUNT(*) DESC').fetchall())
+        return counts
+
+    def close(self):
+        self.connection.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Хранилище находок сканирования (SQLite)')
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'Файл базы (по умолчанию: {DEFAULT_DB})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help='Загрузить файлы результатов')
+    ingest.add_argument('files', nargs='+', help='JSON/JSONL результаты любого из сканеров')
+
+    query = commands.add_parser('query', help='Найти находки')
+    query.add_argument('--path', help='Путь URL, например /.git/config')
+    query.add_argument('--category', help='Категория, например sensitive_files')
+    query.add_argument('--severity', help='Критичность: CRITICAL, HIGH, MEDIUM, LOW')
+    query.add_argument('--target', help='Подстрока URL цели')
+    query.add_argument('--days', type=int, help='Только сканы за последние N дней')
+    query.add_argument('--limit', type=int, help='Максимум строк')
+    query.add_argument('--hosts', action='store_true', help='Вывести только список целей')
+    query.add_argument('--json', action='store_true', help='Вывести результат в JSON')
+
+    commands.add_parser('stats', help='Статистика хранилища')
+
+    args = parser.parse_args()
+    store = FindingsStore(args.db)
+
+    try:
+        if args.command == 'ingest':
+            for filename in args.files:
+                if not os.path.exists(filename):
+                    print(f"❌ Файл не найден: {filename}")
+                    continue
+                count = store.ingest_file(filename)
+                if count is None:
+                    print(f"♻️  Уже загружен: {filename}")
+                else:
+                    print(f"✅ {filename}: {count} находок")
+
+        elif args.command == 'query':
+            rows = store.query(args.path, args.category, args.severity, args.target, args.days, args.limit)
+            if args.hosts:
+                hosts = {}
+                for row in rows:
+                    # Строки отсортированы от новых сканов к старым
+                    hosts.setdefault(row['target'], row['scanned_at'])
+                if args.json:
+                    print(json.dumps(hosts, ensure_ascii=False, indent=2))
+                else:
+                    for host, last_seen in hosts.items():
+                        print(f"{host}  (последний раз: {last_seen})")
+            elif args.json:
+                print(json.dumps([dict(row) for row in rows], ensure_ascii=False, indent=2))
+            else:
+                for row in rows:
+                    print(f"{row['scanned_at']}  [{row['severity'] or '-'}] {row['target']} "
+                          f"{row['category']}: {row['url'] or row['parameter'] or ''}")
+                print(f"📊 Найдено: {len(rows)}")
+
+        else:
+            stats = store.stats()
+            print(f"🗂️  Сканов: {stats['scans']}, целей: {stats['targets']}, находок: {stats['findings']}")
+            for category, count in stats['categories'].items():
+                print(f"   {category}: {count}")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ import os
 import re
 from pathlib import Path
 
+from placeholder_images import create_placeholders
+
 def fix_all_page_links():
     """Исправляет ссылки на всех страницах"""
     print("Исправление ссылок на всех страницах...")
@@ -111,23 +113,8 @@ def create_missing_image_placeholders():
         "complete_local_site/wp-content/themes/theme/assets/fonts/Inter/Inter-Bold.ttf",
     ]
     
-    created_count = 0
-    
-    for image_path in missing_images:
-        if not os.path.exists(image_path):
-            try:
-                # Создаем папку если не существует
-                os.makedirs(os.path.dirname(image_path), exist_ok=True)
-                
-                # Создаем пустой файл как заглушку
-                with open(image_path, 'w') as f:
-                    f.write("")
-                
-                print(f"Создана заглушка: {image_path}")
-                created_count += 1
-                
-            except Exception as e:
-                print(f"Ошибка при создании {image_path}: {e}")
+    # Валидные заглушки с размерами из HTML вместо пустых файлов
+    created_count = create_placeholders(missing_images)
     
     print(f"Создано заглушек: {created_count}")
 
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Скрипт для оптимизации изображений локального сайта
+Пережимает PNG без потерь, перекодирует JPEG в progressive, создает WebP варианты
+и подключает их в HTML через <picture>. Результаты кэшируются по хэшу содержимого.
+"""
+
+import os
+import re
+import io
+import json
+import shutil
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image
+
+SITE_DIR = "complete_local_site"
+CACHE_DIR = ".image_cache"
+MANIFEST_FILE = "manifest.json"
+REPORT_FILE = "image_optimization_report.json"
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Папки с изображениями, которые имеет смысл оптимизировать
+IMAGE_DIRS = [
+    "wp-content/uploads",
+    "uploads",
+    "wp-content/themes/theme/assets/img",
+]
+
+def file_sha256(path):
+    """Вычисляет sha256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def find_images(site_dir):
+    """Находит все PNG/JPEG изображения в папках с картинками"""
+    images = []
+
+    for image_dir in IMAGE_DIRS:
+        full_dir = os.path.join(site_dir, image_dir)
+        for root, dirs, files in os.walk(full_dir):
+            for file in files:
+                path = os.path.join(root, file)
+                # Пустые файлы-заглушки оптимизировать нечего
+                if file.lower().endswith(IMAGE_EXTENSIONS) and os.path.getsize(path) > 0:
+                    images.append(path)
+
+    return sorted(set(images))
+
+def encode_png(image):
+    """Пережимает PNG без потерь"""
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+def encode_jpeg(image):
+    """Перекодирует JPEG в progressive с сохранением таблиц квантования"""
+    buffer = io.BytesIO()
+    options = {'format': 'JPEG', 'optimize': True, 'progressive': True}
+
+    # quality='keep' доступно только для исходных JPEG
+    if image.format == 'JPEG':
+        options['quality'] = 'keep'
+        options['subsampling'] = 'keep'
+    else:
+        options['quality'] = 90
+
+    image.save(buffer, **options)
+    return buffer.getvalue()
+
+def encode_webp(image, lossless):
+    """Создает WebP вариант изображения"""
+    buffer = io.BytesIO()
+    if lossless:
+        image.save(buffer, format='WEBP', lossless=True, method=6)
+    else:
+        image.save(buffer, format='WEBP', quality=85, method=6)
+    return buffer.getvalue()
+
+def optimize_image(source_path, source_hash, cache_dir, make_webp):
+    """Оптимизирует одно изображение и кладет результаты в кэш
+
+    Выполняется в отдельном процессе, поэтому работает только с файлами и
+    возвращает сериализуемый словарь.
+    """
+    original_size = os.path.getsize(source_path)
+    is_png = source_path.lower().endswith('.png')
+    extension = '.png' if is_png else '.jpg'
+
+    with Image.open(source_path) as image:
+        image.load()
+        optimized = encode_png(image) if is_png else encode_jpeg(image)
+
+        webp = None
+        if make_webp:
+            webp_image = image
+            if webp_image.mode not in ('RGB', 'RGBA'):
+                # LA/PA хранят альфу в режиме, P/L/RGB - в info['transparency']
+                has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+                webp_image = webp_image.convert('RGBA' if has_alpha else 'RGB')
+            webp = encode_webp(webp_image, lossless=is_png)
+
+    entry = {
+        'original_size': original_size,
+        'optimized': None,
+        'optimized_size': original_size,
+        'webp': None,
+        'webp_size': None
+    }
+
+    # Сохраняем оптимизированную версию, только если она действительно меньше
+    if len(optimized) < original_size:
+        cached_name = f"{source_hash}{extension}"
+        with open(os.path.join(cache_dir, cached_name), 'wb') as f:
+            f.write(optimized)
+        entry['optimized'] = cached_name
+        entry['optimized_size'] = len(optimized)
+
+    if webp is not None and len(webp) < entry['optimized_size']:
+        cached_name = f"{source_hash}.webp"
+        with open(os.path.join(cache_dir, cached_name), 'wb') as f:
+            f.write(webp)
+        entry['webp'] = cached_name
+        entry['webp_size'] = len(webp)
+
+    return entry
+
+def load_manifest(cache_dir):
+    """Загружает манифест кэша"""
+    manifest_path = os.path.join(cache_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ошибка чтения манифеста {manifest_path}: {e}")
+    return {}
+
+def save_manifest(cache_dir, manifest):
+    """Сохраняет манифест кэша"""
+    manifest_path = os.path.join(cache_dir, MANIFEST_FILE)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+def apply_cached_result(source_path, entry, cache_dir, manifest):
+    """Записывает результаты из кэша рядом с исходным изображением
+
+    Возвращает путь к WebP варианту или None.
+    """
+    if entry['optimized']:
+        shutil.copyfile(os.path.join(cache_dir, entry['optimized']), source_path)
+        # Оптимизированный файл тоже попадает в кэш, чтобы повторный запуск
+        # не пережимал его еще раз
+        optimized_hash = file_sha256(source_path)
+        manifest.setdefault(optimized_hash, dict(entry, optimized=None))
+
+    webp_path = None
+    if entry['webp']:
+        webp_path = os.path.splitext(source_path)[0] + '.webp'
+        shutil.copyfile(os.path.join(cache_dir, entry['webp']), webp_path)
+
+    return webp_path
+
+def optimize_all_images(site_dir, cache_dir, make_webp, workers):
+    """Оптимизирует все изображения сайта параллельно
+
+    Возвращает словарь {путь изображения: запись манифеста}.
+    """
+    print("Оптимизация изображений...")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = load_manifest(cache_dir)
+
+    images = find_images(site_dir)
+    print(f"Найдено изображений: {len(images)}")
+
+    hashes = {path: file_sha256(path) for path in images}
+    results = {}
+    pending = []
+
+    for path, source_hash in hashes.items():
+        entry = manifest.get(source_hash)
+        # WebP мог не запрашиваться в прошлый раз
+        if entry and (entry['webp'] or entry.get('webp_checked') or not make_webp):
+            results[path] = entry
+        else:
+            pending.append(path)
+
+    print(f"Из кэша: {len(results)}, требуют обработки: {len(pending)}")
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(optimize_image, path, hashes[path], cache_dir, make_webp): path
+                for path in pending
+            }
+
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    print(f"Ошибка при оптимизации {path}: {e}")
+                    continue
+
+                entry['webp_checked'] = make_webp
+                manifest[hashes[path]] = entry
+                results[path] = entry
+                print(f"Оптимизировано: {path} "
+                      f"({entry['original_size']:,} -> {entry['optimized_size']:,} байт)")
+
+    webp_variants = {}
+    for path, entry in results.items():
+        try:
+            webp_path = apply_cached_result(path, entry, cache_dir, manifest)
+        except OSError as e:
+            print(f"Ошибка при записи {path}: {e}")
+            continue
+        if webp_path:
+            webp_variants[path] = webp_path
+
+    save_manifest(cache_dir, manifest)
+    print(f"WebP вариантов: {len(webp_variants)}")
+
+    return results
+
+def resolve_local_path(site_dir, src):
+    """Определяет локальный путь изображения по ссылке из HTML"""
+    clean_path = src.split('?')[0].split('#')[0]
+    if clean_path.startswith(('http://', 'https://', '//', 'data:')):
+        return None
+    return os.path.normpath(os.path.join(site_dir, clean_path.lstrip('/')))
+
+def rewrite_html_with_picture(site_dir, results):
+    """Подключает WebP варианты через <picture> и считает экономию по страницам"""
+    print("Подключение WebP вариантов в HTML файлах...")
+
+    by_local_path = {os.path.normpath(path): entry for path, entry in results.items()}
+    img_pattern = re.compile(r'<img\b[^>]*?\bsrc=["\']([^"\']+)["\'][^>]*>', re.IGNORECASE)
+    webp_source_pattern = re.compile(r'<source[^>]*type=["\']image/webp["\'][^>]*>\s*$', re.IGNORECASE)
+    srcset_pattern = re.compile(r'\bsrcset=["\']([^"\']+)["\']', re.IGNORECASE)
+    sizes_pattern = re.compile(r'\bsizes=["\']([^"\']+)["\']', re.IGNORECASE)
+
+    def to_webp(src):
+        return re.sub(r'\.(png|jpe?g)(?=$|[?#])', '.webp', src, flags=re.IGNORECASE)
+
+    def webp_srcset(srcset):
+        """srcset с WebP кандидатами или None, если WebP есть не у всех"""
+        candidates = []
+        for candidate in srcset.split(','):
+            parts = candidate.strip().split(None, 1)
+            if not parts:
+                continue
+            entry = by_local_path.get(resolve_local_path(site_dir, parts[0]))
+            if not entry or not entry['webp']:
+                return None
+            candidates.append(' '.join([to_webp(parts[0])] + parts[1:]))
+        return ', '.join(candidates)
+
+    page_report = {}
+
+    for root, dirs, files in os.walk(site_dir):
+        for file in files:
+            if not file.endswith('.html'):
+                continue
+
+            html_file = os.path.join(root, file)
+            try:
+                with open(html_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except Exception as e:
+                print(f"Ошибка при чтении {html_file}: {e}")
+                continue
+
+            page_stats = {'images': 0, 'original_bytes': 0, 'served_bytes': 0}
+
+            def replace_img(match):
+                src = match.group(1)
+                entry = by_local_path.get(resolve_local_path(site_dir, src))
+                if not entry:
+                    return match.group(0)
+
+                page_stats['images'] += 1
+                page_stats['original_bytes'] += entry['original_size']
+
+                # У тега с srcset браузер выбирает из srcset, поэтому WebP нужен всем кандидатам
+                srcset = srcset_pattern.search(match.group(0))
+                source_srcset = webp_srcset(srcset.group(1)) if srcset else to_webp(src)
+
+                if not entry['webp'] or source_srcset is None:
+                    page_stats['served_bytes'] += entry['optimized_size']
+                    return match.group(0)
+
+                page_stats['served_bytes'] += entry['webp_size']
+
+                # Тег уже обернут в <picture> при прошлом запуске
+                preceding = content[max(0, match.start() - 500):match.start()]
+                if webp_source_pattern.search(preceding):
+                    return match.group(0)
+
+                sizes = sizes_pattern.search(match.group(0))
+                sizes_attribute = f' sizes="{sizes.group(1)}"' if sizes else ''
+                return (f'<picture><source srcset="{source_srcset}"{sizes_attribute} type="image/webp">'
+                        f'{match.group(0)}</picture>')
+
+            new_content = img_pattern.sub(replace_img, content)
+
+            if new_content != content:
+                with open(html_file, 'w', encoding='utf-8') as f:
+                    f.write(new_content)
+                print(f"Обновлен файл: {html_file}")
+
+            if page_stats['images']:
+                page_stats['bytes_saved'] = page_stats['original_bytes'] - page_stats['served_bytes']
+                page_report[os.path.relpath(html_file, site_dir)] = page_stats
+
+    return page_report
+
+def save_report(page_report, results, filename):
+    """Сохраняет отчет об экономии трафика"""
+    total_original = sum(entry['original_size'] for entry in results.values())
+    total_optimized = sum(entry['optimized_size'] for entry in results.values())
+
+    report = {
+        'total_images': len(results),
+        'total_original_bytes': total_original,
+        'total_optimized_bytes': total_optimized,
+        'total_bytes_saved': total_original - total_optimized,
+        'pages': dict(sorted(page_report.items(), key=lambda item: -item[1]['bytes_saved']))
+    }
+
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\nСэкономлено на файлах: {report['total_bytes_saved']:,} байт")
+    print("Страницы с наибольшей экономией:")
+    for page, stats in list(report['pages'].items())[:10]:
+        print(f"  {page}: {stats['bytes_saved']:,} байт ({stats['images']} изображений)")
+    print(f"Отчет сохранен в {filename}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Оптимизация изображений локального сайта')
+    parser.add_argument('--site-dir', default=SITE_DIR, help='Папка с локальным сайтом')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='Папка кэша оптимизированных файлов')
+    parser.add_argument('--webp', action='store_true', help='Создавать WebP варианты и подключать их через <picture>')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Количество процессов')
+    parser.add_argument('--report', default=REPORT_FILE, help='Файл отчета')
+
+    args = parser.parse_args()
+
+    print("Оптимизация изображений")
+    print("=" * 50)
+
+    results = optimize_all_images(args.site_dir, args.cache_dir, args.webp, args.workers)
+    page_report = rewrite_html_with_picture(args.site_dir, results)
+    save_report(page_report, results, args.report)
+
+    print("\nГотово!")
+
+if __name__ == "__main__":
+    main()
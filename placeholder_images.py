@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Генератор заглушек для недостающих изображений и шрифтов
+Вместо пустых файлов создает минимальные валидные PNG/JPEG/SVG/WOFF/TTF,
+размеры изображений берутся из атрибутов width/height в HTML
+"""
+
+import os
+import re
+import zlib
+import struct
+import shutil
+from functools import lru_cache
+
+SITE_DIR = "complete_local_site"
+BLOB_DIR = ".placeholder_cache"
+
+# Светло-серый цвет заглушек
+FILL_LEVEL = 0xEE
+
+def png_chunk(chunk_type, data):
+    """Собирает PNG чанк с CRC"""
+    crc = zlib.crc32(chunk_type + data) & 0xFFFFFFFF
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', crc)
+
+def make_png(width, height):
+    """Однотонный PNG: палитра из одного цвета, 1 бит на пиксель"""
+    header = struct.pack('>IIBBBBB', width, height, 1, 3, 0, 0, 0)
+    palette = bytes([FILL_LEVEL] * 3)
+    row = b'\x00' + b'\x00' * ((width + 7) // 8)
+    pixels = zlib.compress(row * height, 9)
+
+    return (b'\x89PNG\r\n\x1a\n' +
+            png_chunk(b'IHDR', header) +
+            png_chunk(b'PLTE', palette) +
+            png_chunk(b'IDAT', pixels) +
+            png_chunk(b'IEND', b''))
+
+def jpeg_segment(marker, data):
+    """Собирает JPEG сегмент с длиной"""
+    return struct.pack('>BBH', 0xFF, marker, len(data) + 2) + data
+
+def make_jpeg(width, height):
+    """Однотонный baseline JPEG в оттенках серого
+
+    Таблицы Хаффмана содержат только нужные символы: DC категории 0 и 10
+    и EOB для AC, поэтому каждый блок 8x8 после первого занимает 2 бита.
+    """
+    quant_table = jpeg_segment(0xDB, b'\x00' + b'\x01' * 64)
+    frame = jpeg_segment(0xC0, struct.pack('>BHHBBBB', 8, height, width, 1, 1, 0x11, 0))
+
+    # DC: '0' -> категория 0, '10' -> категория 10
+    dc_table = jpeg_segment(0xC4, b'\x00' + bytes([1, 1] + [0] * 14) + bytes([0x00, 0x0A]))
+    # AC: '0' -> EOB
+    ac_table = jpeg_segment(0xC4, b'\x10' + bytes([1] + [0] * 15) + bytes([0x00]))
+    scan = jpeg_segment(0xDA, bytes([1, 1, 0x00, 0, 63, 0]))
+
+    # DC коэффициент первого блока = 8 * (уровень - 128), остальные блоки без изменений
+    dc_value = 8 * (FILL_LEVEL - 128)
+    blocks = ((width + 7) // 8) * ((height + 7) // 8)
+    bits = '10' + format(dc_value, '010b') + '0' + '00' * (blocks - 1)
+    bits += '1' * (-len(bits) % 8)
+
+    data = bytearray()
+    for i in range(0, len(bits), 8):
+        byte = int(bits[i:i + 8], 2)
+        data.append(byte)
+        if byte == 0xFF:
+            data.append(0x00)
+
+    return (b'\xff\xd8' +
+            jpeg_segment(0xE0, b'JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00') +
+            quant_table + frame + dc_table + ac_table + scan +
+            bytes(data) + b'\xff\xd9')
+
+def make_svg(width, height):
+    """Однотонный SVG заданного размера"""
+    color = f'#{FILL_LEVEL:02x}{FILL_LEVEL:02x}{FILL_LEVEL:02x}'
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}"><rect width="100%" height="100%" fill="{color}"/></svg>'
+            ).encode('utf-8')
+
+def sfnt_checksum(data):
+    """Контрольная сумма таблицы TrueType"""
+    data += b'\x00' * (-len(data) % 4)
+    return sum(struct.unpack(f'>{len(data) // 4}I', data)) & 0xFFFFFFFF
+
+def font_tables():
+    """Таблицы минимального TrueType шрифта с одним пустым глифом .notdef"""
+    name_strings = [
+        (1, 'Placeholder'),
+        (2, 'Regular'),
+        (3, 'Placeholder-Regular'),
+        (4, 'Placeholder Regular'),
+        (6, 'Placeholder-Regular'),
+    ]
+    name_records = b''
+    name_data = b''
+    for name_id, value in name_strings:
+        encoded = value.encode('utf-16-be')
+        name_records += struct.pack('>HHHHHH', 3, 1, 0x409, name_id, len(encoded), len(name_data))
+        name_data += encoded
+    name = struct.pack('>HHH', 0, len(name_strings), 6 + len(name_records)) + name_records + name_data
+
+    # Глиф без контуров
+    glyf = struct.pack('>hhhhhH', 0, 0, 0, 0, 0, 0)
+
+    return {
+        b'OS/2': struct.pack('>HhHHHhhhhhhhhhhh10s4I4sHHHhhhHH2IhhHHH',
+                             4, 500, 400, 5, 0, 650, 700, 0, 140, 650, 700, 0, 480, 50, 250, 0,
+                             b'\x00' * 10, 0, 0, 0, 0, b'NONE', 0x40, 0xFFFF, 0xFFFF,
+                             800, -200, 0, 800, 200, 1, 0, 500, 700, 0, 32, 0),
+        b'cmap': struct.pack('>HHHHI', 0, 1, 3, 1, 12) +
+                 struct.pack('>HHHHHHHHHHHH', 4, 24, 0, 2, 2, 0, 0, 0xFFFF, 0, 0xFFFF, 1, 0),
+        b'glyf': glyf,
+        b'head': struct.pack('>IIIIHHqqhhhhHHhhh', 0x00010000, 0x00010000, 0, 0x5F0F3CF5,
+                             0x000B, 1000, 0, 0, 0, 0, 0, 0, 0, 8, 2, 0, 0),
+        b'hhea': struct.pack('>IhhhHhhhhhhhhhhhH', 0x00010000, 800, -200, 0, 500, 0, 0, 0,
+                             1, 0, 0, 0, 0, 0, 0, 0, 1),
+        b'hmtx': struct.pack('>Hh', 500, 0),
+        b'loca': struct.pack('>HH', 0, len(glyf) // 2),
+        b'maxp': struct.pack('>IHHHHHHHHHHHHHH', 0x00010000, 1, 0, 0, 0, 0, 2, 0, 0, 0, 0, 0, 0, 0, 0),
+        b'name': name,
+        b'post': struct.pack('>IIhhIIIII', 0x00030000, 0, -100, 50, 0, 0, 0, 0, 0),
+    }
+
+def make_ttf():
+    """Минимальный валидный TrueType шрифт"""
+    tables = font_tables()
+    tags = sorted(tables)
+
+    num_tables = len(tags)
+    entry_selector = num_tables.bit_length() - 1
+    search_range = (1 << entry_selector) * 16
+    header = struct.pack('>IHHHH', 0x00010000, num_tables, search_range, entry_selector,
+                         num_tables * 16 - search_range)
+
+    def build(head_table):
+        directory = b''
+        body = b''
+        offset = 12 + 16 * num_tables
+        for tag in tags:
+            data = head_table if tag == b'head' else tables[tag]
+            # Контрольная сумма head считается с нулевым checkSumAdjustment
+            checksum = sfnt_checksum(tables[tag])
+            directory += struct.pack('>4sIII', tag, checksum, offset + len(body), len(data))
+            body += data + b'\x00' * (-len(data) % 4)
+        return header + directory + body
+
+    # checkSumAdjustment считается по шрифту с нулевым значением поля
+    font = build(tables[b'head'])
+    adjustment = (0xB1B0AFBA - sfnt_checksum(font)) & 0xFFFFFFFF
+    head = tables[b'head'][:8] + struct.pack('>I', adjustment) + tables[b'head'][12:]
+    return build(head)
+
+def make_woff():
+    """Минимальный валидный WOFF 1.0 на основе make_ttf()"""
+    font = make_ttf()
+    num_tables = struct.unpack('>H', font[4:6])[0]
+
+    entries = []
+    for i in range(num_tables):
+        tag, checksum, offset, length = struct.unpack('>4sIII', font[12 + 16 * i:28 + 16 * i])
+        data = font[offset:offset + length]
+        compressed = zlib.compress(data, 9)
+        if len(compressed) >= length:
+            compressed = data
+        entries.append((tag, checksum, length, compressed))
+
+    offset = 44 + 20 * num_tables
+    directory = b''
+    body = b''
+    for tag, checksum, length, data in entries:
+        directory += struct.pack('>4sIIII', tag, offset + len(body), len(data), length, checksum)
+        body += data + b'\x00' * (-len(data) % 4)
+
+    header = struct.pack('>4sIIHHIHHIIIII', b'wOFF', 0x00010000, offset + len(body), num_tables, 0,
+                         len(font), 1, 0, 0, 0, 0, 0, 0)
+    return header + directory + body
+
+GENERATORS = {
+    '.png': make_png,
+    '.jpg': make_jpeg,
+    '.jpeg': make_jpeg,
+    '.svg': make_svg,
+}
+
+FONT_GENERATORS = {
+    '.ttf': make_ttf,
+    '.woff': make_woff,
+}
+
+def collect_image_sizes(site_dir=SITE_DIR):
+    """Собирает размеры изображений из атрибутов width/height тегов <img>
+
+    Возвращает словарь {локальный путь: (ширина, высота)}.
+    """
+    sizes = {}
+    img_pattern = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+    attr_pattern = re.compile(r'\b(src|width|height)=["\']?([^"\'\s>]+)', re.IGNORECASE)
+
+    for root, dirs, files in os.walk(site_dir):
+        for file in files:
+            if not file.endswith('.html'):
+                continue
+
+            html_file = os.path.join(root, file)
+            try:
+                with open(html_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except Exception as e:
+                print(f"Ошибка при чтении {html_file}: {e}")
+                continue
+
+            for tag in img_pattern.findall(content):
+                attrs = {name.lower(): value for name, value in attr_pattern.findall(tag)}
+                src = attrs.get('src', '')
+                if not src or src.startswith(('http://', 'https://', '//', 'data:')):
+                    continue
+
+                try:
+                    width = int(float(attrs['width']))
+                    height = int(float(attrs['height']))
+                except (KeyError, ValueError):
+                    continue
+                if width <= 0 or height <= 0:
+                    continue
+
+                clean_path = src.split('?')[0].split('#')[0].lstrip('/')
+                local_path = os.path.normpath(os.path.join(site_dir, clean_path))
+                sizes.setdefault(local_path, (width, height))
+
+    return sizes
+
+@lru_cache(maxsize=None)
+def get_blob_path(extension, width, height, blob_dir=BLOB_DIR):
+    """Возвращает путь к общему файлу-заглушке нужного формата и размера
+
+    Один файл на каждый формат и размер, все заглушки ссылаются на него.
+    """
+    os.makedirs(blob_dir, exist_ok=True)
+    if extension == '.jpeg':
+        extension = '.jpg'
+
+    if extension in FONT_GENERATORS:
+        blob_path = os.path.join(blob_dir, f"placeholder{extension}")
+        content = FONT_GENERATORS[extension]
+        args = ()
+    else:
+        blob_path = os.path.join(blob_dir, f"{width}x{height}{extension}")
+        content = GENERATORS[extension]
+        args = (width, height)
+
+    if not os.path.exists(blob_path):
+        with open(blob_path, 'wb') as f:
+            f.write(content(*args))
+
+    return blob_path
+
+def is_supported(path):
+    """Проверяет, умеем ли мы создавать заглушку для файла"""
+    extension = os.path.splitext(path)[1].lower()
+    return extension in GENERATORS or extension in FONT_GENERATORS
+
+def create_placeholder(path, size=None, blob_dir=BLOB_DIR):
+    """Создает заглушку по пути path
+
+    Содержимое берется из общего blob, но каждая заглушка - отдельный файл:
+    жесткие ссылки перезаписывались бы все разом при изменении одной из них
+    (например, оптимизацией изображений на месте).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    width, height = size or (1, 1)
+    blob_path = get_blob_path(extension, width, height, blob_dir)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + '.tmp'
+    shutil.copyfile(blob_path, temp_path)
+    os.replace(temp_path, path)
+
+def create_placeholders(paths, site_dir=SITE_DIR, blob_dir=BLOB_DIR):
+    """Создает заглушки для отсутствующих или пустых файлов
+
+    Возвращает количество созданных заглушек.
+    """
+    sizes = collect_image_sizes(site_dir)
+    created_count = 0
+
+    for path in paths:
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            continue
+
+        if not is_supported(path):
+            print(f"Неизвестный формат заглушки: {path}")
+            continue
+
+        try:
+            size = sizes.get(os.path.normpath(path))
+            create_placeholder(path, size, blob_dir)
+
+            size_info = f" ({size[0]}x{size[1]})" if size else ""
+            print(f"Создана заглушка: {path}{size_info}")
+            created_count += 1
+
+        except Exception as e:
+            print(f"Ошибка при создании {path}: {e}")
+
+    return created_count
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Создание заглушек для недостающих файлов')
+    parser.add_argument('paths', nargs='+', help='Пути к файлам, для которых нужны заглушки')
+    parser.add_argument('--site-dir', default=SITE_DIR, help='Папка с локальным сайтом')
+
+    args = parser.parse_args()
+
+    created_count = create_placeholders(args.paths, args.site_dir)
+    print(f"Создано заглушек: {created_count}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Движок параллельных HTTP проб для сканеров
+Пул потоков над общей сессией и token bucket, ограничивающий общее число запросов в секунду,
+либо адаптивный контроллер, подстраивающий темп под задержки и ошибки сервера
+"""
+
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from requests.adapters import HTTPAdapter
+
+# Сколько байт тела читать при пробах: для сигнатур хватает начала ответа,
+# а /backup.sql или /dump.sql могут весить гигабайты
+PROBE_MAX_BYTES = 64 * 1024
+
+def read_limited(response, max_bytes=PROBE_MAX_BYTES):
+    """Дочитывает не более max_bytes тела ответа, запрошенного с stream=True
+
+    Соединение закрывается сразу после нужного префикса. В ответе появляются
+    атрибуты truncated и full_size (полный размер из Content-Length, если тело
+    обрезано). Если сервер размер не сообщил, full_size - число прочитанных
+    байт, а size_truncated = True: настоящий размер больше.
+    """
+    chunks = []
+    size = 0
+    truncated = False
+
+    try:
+        for chunk in response.iter_content(chunk_size=8192):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > max_bytes:
+                truncated = True
+                break
+    finally:
+        response.close()
+
+    response._content = b''.join(chunks)[:max_bytes]
+    response._content_consumed = True
+    response.truncated = truncated
+
+    content_length = response.headers.get('Content-Length', '')
+    response.size_truncated = False
+    if not truncated:
+        response.full_size = size
+    elif content_length.isdigit():
+        response.full_size = int(content_length)
+    else:
+        response.full_size = size
+        response.size_truncated = True
+
+    return response
+
+def response_size(response):
+    """Полный размер тела ответа, в том числе обрезанного read_limited
+
+    Для обрезанного ответа без Content-Length - сколько байт прочитано (см. size_fields).
+    """
+    if hasattr(response, 'full_size'):
+        return response.full_size
+    return len(response.content)
+
+def size_fields(response):
+    """Поля размера для находки: content_length и, если размер известен
+    только снизу, content_length_truncated"""
+    fields = {'content_length': response_size(response)}
+    if getattr(response, 'size_truncated', False):
+        fields['content_length_truncated'] = True
+    return fields
+
+class TokenBucket:
+    """Потокобезопасный token bucket
+
+    rate - запросов в секунду (None или 0 - без ограничения),
+    capacity - сколько запросов можно отправить подряд без ожидания.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, url=None):
+        """Ждет, пока не появится свободный токен"""
+        if not self.rate:
+            return
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+    def release(self, url=None, response=None, latency=None, error=False):
+        """Фиксированный темп не зависит от ответов"""
+
+# Ответы, после которых сервер просит снизить нагрузку
+BACKOFF_STATUSES = (429, 503)
+
+# Повторные сигналы перегрузки в течение этого времени (сек) не снижают темп еще раз
+DECREASE_INTERVAL = 1.0
+
+# Скачок задержки меньше этого (сек) не считается признаком перегрузки
+MIN_LATENCY_SPIKE = 0.1
+
+# Дольше ждать по Retry-After не имеет смысла, запрос считается неудачным
+MAX_RETRY_AFTER = 60
+
+def parse_retry_after(value):
+    """Секунды из заголовка Retry-After (число или HTTP-дата), None если заголовка нет"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class HostRate:
+    """Текущий темп и число одновременных запросов к одному хосту"""
+
+    def __init__(self, rate, concurrency):
+        self.rate = rate
+        self.concurrency = concurrency
+        self.active = 0
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.latency = None
+        self.successes = 0
+        self.logged = 0.0
+        self.decreased = 0.0
+
+class AdaptiveRateController:
+    """AIMD регулятор темпа запросов для каждого хоста
+
+    Пока задержка ответов стабильна, темп растет примерно на increase запросов/сек
+    в секунду, а число одновременных запросов - на 1. При 429/503, ошибке
+    соединения или скачке задержки (больше latency_factor x средней) темп и
+    параллельность умножаются на decrease. Retry-After приостанавливает хост.
+    Темп не превышает max_rate, параллельность - max_concurrency.
+    """
+
+    def __init__(self, initial_rate=1.0, max_rate=20.0, max_concurrency=10, min_rate=0.2,
+                 increase=1.0, decrease=0.5, latency_factor=2.5, log=None, log_interval=10):
+        self.max_rate = max_rate
+        self.initial_rate = min(initial_rate, max_rate)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.log = log
+        self.log_interval = log_interval
+        self.hosts = {}
+        self.condition = threading.Condition()
+
+    def host(self, url):
+        netloc = urlsplit(url).netloc
+        if netloc not in self.hosts:
+            self.hosts[netloc] = HostRate(self.initial_rate, 1)
+        return netloc, self.hosts[netloc]
+
+    def acquire(self, url=None):
+        """Ждет паузу Retry-After, свободный слот и токен темпа хоста"""
+        with self.condition:
+            _, state = self.host(url or '')
+            while True:
+                now = time.monotonic()
+                if state.blocked_until > now:
+                    wait = state.blocked_until - now
+                elif state.active >= state.concurrency:
+                    wait = None
+                else:
+                    state.tokens = min(1.0, state.tokens + (now - state.updated) * state.rate)
+                    state.updated = now
+                    if state.tokens >= 1:
+                        state.tokens -= 1
+                        state.active += 1
+                        return
+                    wait = (1 - state.tokens) / state.rate
+                self.condition.wait(wait)
+
+    def release(self, url=None, response=None, latency=None, error=False):
+        """Учитывает результат запроса и меняет темп хоста"""
+        with self.condition:
+            netloc, state = self.host(url or '')
+            state.active -= 1
+            now = time.monotonic()
+            reason = None
+
+            if error:
+                reason = 'ошибка соединения'
+            elif response is not None and response.status_code in BACKOFF_STATUSES:
+                reason = f'HTTP {response.status_code}'
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if retry_after:
+                    state.blocked_until = max(state.blocked_until, now + min(retry_after, MAX_RETRY_AFTER))
+                    reason += f', Retry-After {retry_after:.0f} сек'
+            elif (latency is not None and state.latency and latency > self.latency_factor * state.latency
+                  and latency - state.latency > MIN_LATENCY_SPIKE):
+                reason = f'задержка {latency:.2f} сек (средняя {state.latency:.2f})'
+
+            if latency is not None and not error:
+                state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+
+            if reason:
+                # Ответы запросов, отправленных до снижения, не снижают темп повторно
+                if now - state.decreased >= DECREASE_INTERVAL:
+                    state.decreased = now
+                    state.rate = max(self.min_rate, state.rate * self.decrease)
+                    state.concurrency = max(1, int(state.concurrency * self.decrease))
+                else:
+                    reason = None
+                state.successes = 0
+            else:
+                state.rate = min(self.max_rate, state.rate + self.increase / max(state.rate, 1.0))
+                state.successes += 1
+                if state.successes >= 2 * state.concurrency and state.concurrency < self.max_concurrency:
+                    state.concurrency += 1
+                    state.successes = 0
+
+            if self.log and (reason or now - state.logged >= self.log_interval):
+                state.logged = now
+                message = f"🚦 {netloc}: {state.rate:.1f} запросов/сек, параллельно {state.concurrency}"
+                self.log(f"{message} (снижение: {reason})" if reason else message,
+                         "WARNING" if reason else "INFO")
+
+            self.condition.notify_all()
+
+    def snapshot(self):
+        """Текущий темп по хостам"""
+        with self.condition:
+            return {
+                netloc: {'rate': round(state.rate, 2), 'concurrency': state.concurrency,
+                         'latency': round(state.latency, 3) if state.latency else None}
+                for netloc, state in self.hosts.items()
+            }
+
+def controlled_request(limiter, session, method, url, retries=0, **kwargs):
+    """Запрос через limiter (TokenBucket или AdaptiveRateController)
+
+    Ответ 429/503 с Retry-After не дольше MAX_RETRY_AFTER повторяется до retries
+    раз, адаптивный контроллер при этом сам выдерживает паузу.
+    """
+    for attempt in range(retries + 1):
+        limiter.acquire(url)
+        start = time.monotonic()
+        try:
+            response = session.request(method, url, **kwargs)
+        except Exception:
+            limiter.release(url, error=True)
+            raise
+        limiter.release(url, response=response, latency=time.monotonic() - start)
+
+        if attempt == retries or response.status_code not in BACKOFF_STATUSES:
+            return response
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if retry_after is None or retry_after > MAX_RETRY_AFTER:
+            return response
+        response.close()
+
+class ProbeEngine:
+    """Выполняет запросы через общую сессию параллельно
+
+    Не более max_threads запросов одновременно и не быстрее, чем позволяет
+    rate_limiter, даже если map() вызывается из нескольких потоков сразу.
+    """
+
+    def __init__(self, session, max_threads=10, rate_limiter=None, retries=0):
+        self.session = session
+        self.max_threads = max(1, max_threads)
+        self.rate_limiter = rate_limiter or TokenBucket(None)
+        self.retries = retries
+        self.slots = threading.BoundedSemaphore(self.max_threads)
+
+        # Пул соединений должен вмещать все потоки
+        adapter = HTTPAdapter(pool_connections=self.max_threads, pool_maxsize=self.max_threads)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, url, method='GET', **kwargs):
+        """Один запрос с учетом лимитов"""
+        with self.slots:
+            return controlled_request(self.rate_limiter, self.session, method, url, self.retries, **kwargs)
+
+    def map(self, func, items):
+        """Применяет func к items в пуле потоков, результаты в исходном порядке"""
+        items = list(items)
+        if len(items) <= 1:
+            return [func(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_threads, len(items))) as executor:
+            return list(executor.map(func, items))
+
+class ResponseCache:
+    """Кэш ответов на время одного сканирования
+
+    Одновременные запросы с одинаковым ключом выполняются один раз: первый
+    поток делает запрос, остальные ждут его результат. Неудачные ответы (None)
+    не кэшируются, чтобы следующий вызов мог повторить запрос.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_fetch(self, key, fetch):
+        """Возвращает закэшированный ответ или вызывает fetch()"""
+        with self.lock:
+            future = self.entries.get(key)
+            if future is not None:
+                self.hits += 1
+                owner = False
+            else:
+                future = Future()
+                self.entries[key] = future
+                self.misses += 1
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = fetch()
+        except BaseException as e:
+            with self.lock:
+                self.entries.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        if result is None:
+            with self.lock:
+                self.entries.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def clear(self):
+        """Очищает кэш"""
+        with self.lock:
+            self.entries.clear()
+
+def run_phases(phases, max_workers=None, on_error=None):
+    """Запускает фазы сканирования с учетом зависимостей
+
+    phases - словарь {имя: (функция, [имена фаз, от которых она зависит])}.
+    Фазы без невыполненных зависимостей выполняются параллельно. Ошибка фазы
+    передается в on_error(имя, исключение) и не останавливает зависимые фазы.
+    Возвращает словарь {имя: длительность в секундах}.
+    """
+    for name, (_, dependencies) in phases.items():
+        unknown = [dep for dep in dependencies if dep not in phases]
+        if unknown:
+            raise ValueError(f"Фаза {name} зависит от неизвестных фаз: {', '.join(unknown)}")
+
+    timings = {}
+    done = set()
+    running = {}
+
+    def timed(name, func):
+        start = time.monotonic()
+        try:
+            func()
+        finally:
+            timings[name] = round(time.monotonic() - start, 3)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(phases) or 1) as executor:
+        while len(done) < len(phases):
+            for name, (func, dependencies) in phases.items():
+                if name not in done and name not in running.values() and all(dep in done for dep in dependencies):
+                    running[executor.submit(timed, name, func)] = name
+
+            if not running:
+                raise ValueError("Циклическая зависимость между фазами")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                done.add(name)
+                error = future.exception()
+                if error is not None and on_error:
+                    on_error(name, error)
+
+    return timings
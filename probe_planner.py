@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Планировщик инъекционных проб
+Строит матрицу (endpoint x параметр x payload), убирает повторяющиеся пробы и при
+необходимости упаковывает несколько параметров в один запрос. По запросу плана
+каждому параметру достается свой canary-маркер перед payload'ом, по которому
+отражение в ответе можно отнести к конкретному параметру
+"""
+
+import secrets
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote
+
+def build_probe_url(endpoint, values):
+    """Подставляет значения параметров в query string endpoint'а
+
+    Параметры endpoint'а с теми же именами заменяются, остальные сохраняются.
+    """
+    parts = urlsplit(endpoint)
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+             if name not in values]
+    query.extend(values.items())
+    return urlunsplit(parts._replace(query=urlencode(query, quote_via=quote, safe='')))
+
+def make_canary():
+    """Случайный маркер из букв и цифр, который не меняется при URL-кодировании"""
+    return 'cq' + secrets.token_hex(4)
+
+class Probe:
+    """Один запрос плана: URL и payload'ы по параметрам
+
+    values - отправляемые значения параметров (canary + payload),
+    payloads и canaries - исходный payload и маркер каждого параметра,
+    key - URL без маркеров: одинаков у проб с теми же endpoint'ом и payload'ами.
+    """
+
+    def __init__(self, endpoint, payloads, canaries):
+        self.endpoint = endpoint
+        self.payloads = payloads
+        self.canaries = canaries
+        self.values = {param: canaries[param] + payload for param, payload in payloads.items()}
+        self.url = build_probe_url(endpoint, self.values)
+        self.key = build_probe_url(endpoint, payloads)
+
+    @property
+    def params(self):
+        return list(self.payloads)
+
+    def __repr__(self):
+        return f"Probe({self.url!r})"
+
+class ProbePlan:
+    """План проб с дедупликацией по URL без canary-маркеров
+
+    pack_size - сколько параметров отправлять в одном запросе. С canaries=True
+    каждому значению предшествует уникальный маркер и отправляется canary + payload;
+    это нужно проверкам, которые ищут отражение значения в ответе. Без маркеров
+    payload уходит без изменений, а сработавшая упакованная проба перепроверяется
+    по одному параметру.
+    """
+
+    def __init__(self, pack_size=1, canaries=False):
+        self.pack_size = max(1, pack_size)
+        self.canaries = canaries
+        self.probes = []
+        self.seen_keys = set()
+        self.matrix_size = 0
+        self.duplicates = 0
+        self.confirmations = 0
+
+    def add(self, probe):
+        """Добавляет пробу, если такие endpoint и payload'ы еще не запланированы"""
+        if probe.key in self.seen_keys:
+            self.duplicates += 1
+            return False
+        self.seen_keys.add(probe.key)
+        self.probes.append(probe)
+        return True
+
+    def add_matrix(self, endpoints, params, payloads):
+        """Планирует все сочетания endpoint x параметр x payload"""
+        params = list(dict.fromkeys(params))
+        payloads = list(dict.fromkeys(payloads))
+        self.matrix_size += len(endpoints) * len(params) * len(payloads)
+
+        for endpoint in dict.fromkeys(endpoints):
+            for payload in payloads:
+                for start in range(0, len(params), self.pack_size):
+                    packed = params[start:start + self.pack_size]
+                    canaries = {param: make_canary() if self.canaries else '' for param in packed}
+                    self.add(Probe(endpoint, {param: payload for param in packed}, canaries))
+
+        return self
+
+    def split(self, probe, params=None):
+        """Разбивает упакованную пробу на пробы по одному параметру"""
+        self.confirmations += len(params or probe.params)
+        return [
+            Probe(probe.endpoint, {param: probe.payloads[param]}, {param: probe.canaries[param]})
+            for param in (params or probe.params)
+        ]
+
+    def stats(self):
+        """Сколько запросов понадобилось вместо полной матрицы"""
+        return {
+            'matrix': self.matrix_size,
+            'requests': len(self.probes) + self.confirmations,
+            'deduplicated': self.duplicates,
+            'confirmations': self.confirmations
+        }
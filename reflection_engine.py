@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Определение контекста отражения параметров
+Сначала в параметры отправляются безобидные canary-маркеры, затем по месту, где
+маркер оказался в ответе, выбираются payload'ы, которые имеет смысл пробовать
+"""
+
+# Контексты в порядке, в котором для них перечислены payload'ы в пакете сигнатур
+REFLECTION_CONTEXTS = ('html', 'attribute', 'script', 'comment')
+
+def reflection_context(lowered, position):
+    """Контекст одного вхождения маркера в HTML (текст уже в нижнем регистре)"""
+    before = lowered[:position]
+
+    if before.rfind('<!--') > before.rfind('-->'):
+        return 'comment'
+
+    script_start = before.rfind('<script')
+    if script_start > before.rfind('</script'):
+        # Внутри открывающего тега <script ...> маркер стоит в атрибуте
+        return 'script' if before.rfind('>') > script_start else 'attribute'
+
+    if before.rfind('<') > before.rfind('>'):
+        return 'attribute'
+
+    return 'html'
+
+def find_reflection_contexts(text, canary):
+    """Множество контекстов, в которых маркер встречается в ответе"""
+    if not canary or canary not in text:
+        return set()
+
+    lowered = text.lower()
+    canary = canary.lower()
+    contexts = set()
+
+    position = lowered.find(canary)
+    while position != -1:
+        contexts.add(reflection_context(lowered, position))
+        position = lowered.find(canary, position + len(canary))
+
+    return contexts
+
+def payloads_for_contexts(payloads_by_context, contexts):
+    """Payload'ы для найденных контекстов без повторов"""
+    selected = []
+    for context in REFLECTION_CONTEXTS:
+        if context in contexts:
+            for payload in payloads_by_context.get(context, []):
+                if payload not in selected:
+                    selected.append(payload)
+    return selected
@@ -0,0 +1,563 @@
+#!/usr/bin/env python3
+"""
+Компилятор отчетов по сохраненным результатам сканирования
+Читает easyclaim_security_results.json или JSONL поток находок и пишет отчет
+Markdown/HTML по частям. Разделы доменов кэшируются по хэшу входных данных,
+поэтому при повторной сборке заново рендерятся только изменившиеся домены
+"""
+
+import os
+import re
+import sys
+import json
+import html
+import hashlib
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+from result_stream import collect_results, count_vulnerabilities, read_events
+
+# Увеличивается при изменении шаблонов, чтобы не использовать устаревший кэш
+RENDERER_VERSION = 2
+
+REPORT_CACHE_DIR = '.report_cache'
+
+RECOMMENDATIONS_CRITICAL = """1. **Немедленно исправить критические уязвимости**
+   - Патрулировать все найденные критические проблемы
+   - Приостановить работу затронутых сервисов до исправления
+   - Провести дополнительное тестирование после исправлений
+
+2. **SQL Injection (если обнаружено)**
+   - Использовать подготовленные запросы (prepared statements)
+   - Валидировать и санитизировать все пользовательские входы
+   - Внедрить принцип наименьших привилегий для БД
+
+3. **Проблемы с аутентификацией**
+   - Восстановить доступ к административным панелям
+   - Установить комплексные пароли
+   - Внедрить многофакторную аутентификацию
+
+"""
+
+RECOMMENDATIONS = """### Приоритет 2 - Высокие риски
+
+1. **Защита административных панелей**
+   - Ограничить доступ по IP адресам
+   - Внедрить strong authentication
+   - Настроить мониторинг попыток доступа
+
+2. **Защита чувствительных файлов**
+   - Удалить или защитить конфигурационные файлы
+   - Скрыть бэкапы от веб-доступа
+   - Обеспечить доступ только через SSH/SFTP
+
+3. **Directory listing**
+   - Отключить отображение содержимого каталогов
+   - Добавить index файлы в пустые директории
+   - Настроить запрет .htaccess
+
+### Приоритет 3 - Средние риски
+
+1. **Заголовки безопасности**
+   ```apache
+   # Apache .htaccess
+   Header always set X-Content-Type-Options nosniff
+   Header always set X-Frame-Options DENY
+   Header always set X-XSS-Protection "1; mode=block"
+   Header always set Strict-Transport-Security "max-age=31536000; includeSubDomains"
+   Header always set Content-Security-Policy "default-src 'self'"
+   ```
+
+2. **Загрузка файлов**
+   - Валидировать типы и содержимое файлов
+   - Хранить файлы вне веб-директории
+   - Переименовывать загруженные файлы
+   - Сканировать на вирусы
+
+### Приоритет 4 - Рекомендации
+
+1. **Настройка SSL/TLS**
+   - Перейти на HTTPS для всех доменов
+   - Настроить HSTS заголовок
+   - Обновить сертификаты до актуальных версий
+
+2. **Мониторинг**
+   - Внедрить систему мониторинга безопасности
+   - Настроить логирование и алерты
+   - Регулярно проводить сканирования
+
+3. **Backup стратегия**
+   - Создать резервные копии перед исправлениями
+   - Внедрить автоматический бэкап
+   - Протестировать процедуры восстановления
+
+"""
+
+def format_size(item):
+    """Размер из находки: обрезанный ответ без Content-Length дает только нижнюю границу"""
+    size = item.get('content_length')
+    if size is None:
+        return "неизвестен"
+    if item.get('content_length_truncated'):
+        return f"не менее {size} байт"
+    return f"{size} байт"
+
+def render_domain_section(domain_url, domain_results):
+    """Раздел отчета одного домена (Markdown)"""
+    if 'error' in domain_results:
+        return f"""### ❌ {domain_url} - ОШИБКА СКАНИРОВАНИЯ
+
+```
+{domain_results['error']}
+```
+
+"""
+
+    vulnerabilities = count_vulnerabilities(domain_results)
+    basic_info = domain_results.get('basic_info', {})
+
+    parts = [f"""### 🌍 {domain_url}
+
+| Параметр | Значение |
+|----------|----------|
+| **Статус** | {basic_info.get('status_code', 'Не определен')} |
+| **Сервер** | {basic_info.get('server', 'Не определен')} |
+| **IP адрес** | {basic_info.get('ip_address', 'Не определен')} |
+| **Заголовок сайта** | {basic_info.get('title', 'Не определен')} |
+| **Общее количество проблем** | {vulnerabilities['total']} |
+
+"""]
+
+    if domain_results.get('incomplete'):
+        parts.append("⏳ **Сканирование не завершено, результаты неполные**\n\n")
+
+    parts.append("#### 🚨 Найденные уязвимости\n\n")
+
+    if vulnerabilities['total'] == 0:
+        parts.append("✅ **Проблем безопасности не найдено**\n")
+    else:
+        for key, label in (('critical', '🔴 **Критические**'), ('high', '🟠 **Высокие**'),
+                           ('medium', '🟡 **Средние**'), ('low', '🔵 **Низкие**')):
+            if vulnerabilities[key] > 0:
+                parts.append(f"{label}: {vulnerabilities[key]}\n")
+
+    parts.append("\n#### 📊 Детальные результаты\n\n")
+
+    # SQL Injection
+    sql_injections = domain_results.get('sql_injection', [])
+    if sql_injections:
+        parts.append("##### 🔍 SQL Injection\n\n")
+        for injection in sql_injections[:3]:  # Показываем первые 3
+            parts.append(f"- **URL**: `{injection['url']}`\n"
+                         f"  - Payload: `{injection['payload'][:50]}...`\n"
+                         f"  - Детектирован паттерн: `{injection['error_pattern']}`\n\n")
+
+    # XSS
+    xss_vulns = domain_results.get('xss_vulnerabilities', [])
+    if xss_vulns:
+        parts.append("##### ⚡ XSS уязвимости\n\n")
+        for xss in xss_vulns[:3]:
+            parts.append(f"- **URL**: `{xss['url']}`\n"
+                         f"  - Параметр: `{xss['parameter']}`\n"
+                         f"  - Payload: `{xss['payload'][:50]}...`\n\n")
+
+    # Directory Listing
+    dir_listing = domain_results.get('directory_listing', [])
+    if dir_listing:
+        parts.append("##### 📁 Directory Listing\n\n")
+        for listing in dir_listing[:3]:
+            parts.append(f"- **URL**: `{listing['url']}`\n"
+                         f"  - Размер контента: {format_size(listing)}\n\n")
+
+    # Sensitive Files
+    sensitive_files = domain_results.get('sensitive_files', [])
+    if sensitive_files:
+        parts.append("##### 🔐 Чувствительные файлы\n\n")
+        for file_info in sensitive_files[:3]:
+            parts.append(f"- **URL**: `{file_info['url']}`\n"
+                         f"  - Размер: {format_size(file_info)}\n"
+                         f"  - Содержит чувствительные данные: {'Да' if file_info.get('has_sensitive_data') else 'Нет'}\n\n")
+
+    # Admin Panels
+    admin_panels = domain_results.get('admin_panels', [])
+    if admin_panels:
+        parts.append("##### 👑 Административные панели\n\n")
+        for panel in admin_panels:
+            parts.append(f"- **URL**: `{panel['url']}`\n"
+                         f"  - Статус: {panel['status_code']}\n"
+                         f"  - Заголовок: {panel.get('title', 'Не определен')}\n"
+                         f"  - Логин форма: {'Да' if panel.get('has_login_form') else 'Нет'}\n\n")
+
+    # Security Headers
+    headers = domain_results.get('headers_security', {})
+    if headers:
+        parts.append("##### 🛡️ Заголовки безопасности\n\n")
+        missing_headers = headers.get('missing_headers', [])
+        if missing_headers:
+            parts.append("**Отсутствующие заголовки:**\n")
+            parts.extend(f"- `{header}`\n" for header in missing_headers)
+            parts.append("\n")
+        else:
+            parts.append("✅ Все основные заголовки безопасности присутны\n\n")
+
+    # API Endpoints
+    api_endpoints = domain_results.get('exposed_endpoints', [])
+    if api_endpoints:
+        parts.append("##### 🔌 API Endpoints\n\n")
+        for endpoint in api_endpoints[:3]:
+            parts.append(f"- **URL**: `{endpoint['url']}`\n"
+                         f"  - Статус: {endpoint['status_code']}\n"
+                         f"  - Content-Type: `{endpoint['content_type']}`\n"
+                         f"  - Методы: {', '.join(endpoint.get('methods_tested', []))}\n\n")
+
+    # Configuration Issues
+    config_issues = domain_results.get('configuration_issues', [])
+    if config_issues:
+        parts.append("##### ⚙️ Проблемы конфигурации\n\n")
+        for issue in config_issues[:3]:
+            parts.append(f"- **Тип**: {issue['type']}\n"
+                         f"  - Проблема: {issue.get('issue', 'Не указано')}\n"
+                         f"  - Текущее значение: `{issue.get('current_value', 'Не указано')}`\n\n")
+
+    parts.append("---\n\n")
+    return ''.join(parts)
+
+def render_technology_section(domain_url, domain_results):
+    """Технологии домена (Markdown), пустая строка если ничего не найдено"""
+    tech_info = domain_results.get('technology_identification', {})
+    if not tech_info:
+        return ''
+
+    parts = [f"#### {domain_url}\n\n"]
+    for category, technologies in tech_info.items():
+        if technologies:
+            parts.append(f"- **{category}**: {', '.join(technologies)}\n")
+    parts.append("\n")
+    return ''.join(parts)
+
+def inline_html(text):
+    """Инлайн-разметка Markdown: `код`, **жирный**"""
+    text = html.escape(text, quote=False)
+    text = re.sub(r'`([^`]+)`', r'<code>\1</code>', text)
+    return re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', text)
+
+def markdown_to_html(markdown):
+    """Перевод в HTML того подмножества Markdown, которое используют шаблоны отчета:
+    заголовки, таблицы, списки, блоки кода, разделители и абзацы"""
+    out = []
+    block = None
+
+    def close():
+        nonlocal block
+        if block:
+            out.append({'ul': '</ul>', 'ol': '</ol>', 'table': '</table>'}[block])
+            block = None
+
+    def open_block(kind, tag):
+        nonlocal block
+        if block != kind:
+            close()
+            out.append(tag)
+            block = kind
+
+    in_code = False
+    for line in markdown.split('\n'):
+        stripped = line.strip()
+
+        if stripped.startswith('```'):
+            if in_code:
+                out.append('</code></pre>')
+            else:
+                close()
+                out.append('<pre><code>')
+            in_code = not in_code
+            continue
+        if in_code:
+            out.append(html.escape(line) + '\n')
+            continue
+
+        heading = re.match(r'(#{1,6}) (.*)', stripped)
+        if not stripped:
+            close()
+        elif heading:
+            close()
+            level = len(heading.group(1))
+            out.append(f'<h{level}>{inline_html(heading.group(2))}</h{level}>')
+        elif stripped.startswith('|'):
+            cells = [cell.strip() for cell in stripped.strip('|').split('|')]
+            if all(re.fullmatch(r'-+', cell) for cell in cells):
+                continue
+            tag = 'th' if block != 'table' else 'td'
+            open_block('table', '<table>')
+            out.append('<tr>' + ''.join(f'<{tag}>{inline_html(cell)}</{tag}>' for cell in cells) + '</tr>')
+        elif re.match(r'\d+\. ', stripped):
+            open_block('ol', '<ol>')
+            out.append(f"<li>{inline_html(stripped.split(' ', 1)[1])}</li>")
+        elif stripped.startswith('- '):
+            if block != 'ol':
+                open_block('ul', '<ul>')
+            nested = ' class="sub"' if line.startswith(' ') else ''
+            out.append(f"<li{nested}>{inline_html(stripped[2:])}</li>")
+        elif stripped == '---':
+            close()
+            out.append('<hr>')
+        else:
+            close()
+            out.append(f'<p>{inline_html(stripped)}</p>')
+
+    close()
+    return '\n'.join(out) + '\n'
+
+class SectionCache:
+    """Кэш отрендеренных разделов на диске по хэшу входных данных
+
+    scope - подкаталог кэша для одного отчета (файл результатов и формат).
+    prune() после сборки удаляет из него разделы, не понадобившиеся этой
+    сборке, поэтому кэш не растет с каждым сканированием и RENDERER_VERSION.
+    """
+
+    def __init__(self, cache_dir=REPORT_CACHE_DIR, scope=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            if scope:
+                self.cache_dir = self.cache_dir / scope
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, render):
+        """Возвращает раздел по ключу, при промахе рендерит и сохраняет"""
+        digest = hashlib.sha256(json.dumps(key, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+        path = self.cache_dir / f"{digest}.txt" if self.cache_dir else None
+        self.used.add(f"{digest}.txt")
+
+        if path and path.exists():
+            self.hits += 1
+            return path.read_text(encoding='utf-8')
+
+        self.misses += 1
+        content = render()
+        if path:
+            tmp_path = path.with_suffix('.tmp')
+            tmp_path.write_text(content, encoding='utf-8')
+            os.replace(tmp_path, path)
+        return content
+
+    def prune(self):
+        """Удаляет разделы, не использованные с создания кэша, возвращает их число"""
+        if not self.cache_dir:
+            return 0
+        removed = 0
+        for path in self.cache_dir.glob('*.txt'):
+            if path.name not in self.used:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+def summarize(domain_results):
+    """Сводка в формате EasyClaimSecurityAnalyzer.results['summary']"""
+    summary = {
+        'total_vulnerabilities': 0,
+        'critical_issues': 0,
+        'high_issues': 0,
+        'medium_issues': 0,
+        'low_issues': 0,
+        'domains_with_issues': 0
+    }
+    for results in domain_results.values():
+        vulnerabilities = count_vulnerabilities(results)
+        summary['total_vulnerabilities'] += vulnerabilities['total']
+        for severity in ('critical', 'high', 'medium', 'low'):
+            summary[f'{severity}_issues'] += vulnerabilities[severity]
+        if vulnerabilities['total'] > 0:
+            summary['domains_with_issues'] += 1
+    return summary
+
+def scan_time(scan_info):
+    """Время начала сканирования из scan_info для отчета"""
+    timestamp = scan_info.get('timestamp')
+    if isinstance(timestamp, (int, float)):
+        return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+    try:
+        return datetime.fromisoformat(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError):
+        return 'неизвестна'
+
+def iter_sections(domain_results, domains, summary, scan_info):
+    """Разделы Markdown отчета по порядку: (ключ кэша или None, функция рендеринга)"""
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    scanned = scan_time(scan_info)
+    planned = scan_info.get('total_domains') or len(domains)
+
+    yield None, lambda: f"""# 🔐 Отчет по анализу безопасности EasyClaim.ru
+
+## 📋 Сводка сканирования
+
+| Параметр | Значение |
+|----------|----------|
+| **Дата сканирования** | {scanned} |
+| **Версия сканера** | 2.0 |
+| **Доменов просканировано** | {len(domain_results)}/{planned} |
+| **Общее количество уязвимостей** | {summary['total_vulnerabilities']} |
+| **Доменов с уязвимостями** | {summary['domains_with_issues']} |
+
+## 🚨 Статистика по критичности
+
+| Уровень риска | Количество | Цвет индикатор |
+|---------------|------------|---------------|
+| 🔴 **Критические** | {summary['critical_issues']} | Требуют немедленного исправления |
+| 🟠 **Высокие** | {summary['high_issues']} | Приоритетные для исправления |
+| 🟡 **Средние** | {summary['medium_issues']} | Рекомендуется исправить |
+| 🔵 **Низкие** | {summary['low_issues']} | Можно исправить в плановом порядке |
+
+## 🌐 Результаты по доменам
+
+"""
+
+    for domain_url in domains:
+        results = domain_results.get(domain_url, {})
+        yield (['domain', domain_url, results],
+               lambda domain_url=domain_url, results=results: render_domain_section(domain_url, results))
+
+    critical = RECOMMENDATIONS_CRITICAL if summary['critical_issues'] > 0 else "- ✅ Критических уязвимостей не обнаружено\n\n"
+    yield None, lambda: f"""## 🛡️ Рекомендации по улучшению безопасности
+
+### Приоритет 1 - Критические проблемы
+{critical}{RECOMMENDATIONS}## 📊 Техническая информация
+
+### Используемые технологии (по доменам)
+
+"""
+
+    for domain_url in domains:
+        tech_info = domain_results.get(domain_url, {}).get('technology_identification', {})
+        if tech_info:
+            yield (['technology', domain_url, tech_info],
+                   lambda domain_url=domain_url, tech_info=tech_info:
+                       render_technology_section(domain_url, {'technology_identification': tech_info}))
+
+    yield None, lambda: f"""## 📝 Информация о сканировании
+
+- **Дата создания отчета**: {now}
+- **Версия сканера**: 2.0
+- **Автоматически сгенерированный отчет**
+
+---
+*Этот отчет создан с помощью расширенного сканера безопасности. Для получения дополнительной информации или проведения повторного сканирования обратитесь к администратору безопасности.*
+
+"""
+
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="utf-8">
+<title>Отчет по анализу безопасности</title>
+<style>
+body { font-family: sans-serif; max-width: 1100px; margin: 2em auto; padding: 0 1em; }
+table { border-collapse: collapse; margin: 1em 0; }
+th, td { border: 1px solid #ccc; padding: 4px 8px; text-align: left; }
+code, pre { background: #f4f4f4; }
+li.sub { margin-left: 2em; list-style: circle; }
+</style>
+</head>
+<body>
+"""
+
+def iter_report(domain_results, domains=None, summary=None, cache=None, fmt='md', scan_info=None):
+    """Части отчета по порядку
+
+    domain_results - {домен: результаты}, domains - порядок доменов в отчете
+    (по умолчанию порядок domain_results), summary - готовая сводка или None,
+    fmt - 'md' или 'html', scan_info - scan_info результатов (время сканирования
+    и число запланированных доменов). Разделы доменов берутся из cache, если их
+    входные данные не изменились.
+    """
+    cache = cache or SectionCache(None)
+    domains = list(domains) if domains is not None else list(domain_results)
+    summary = summary or summarize(domain_results)
+    scan_info = scan_info or {}
+
+    if fmt == 'html':
+        yield HTML_HEAD
+
+    for key, render in iter_sections(domain_results, domains, summary, scan_info):
+        if fmt == 'html':
+            render = lambda render=render: markdown_to_html(render())
+        if key is None:
+            yield render()
+        else:
+            yield cache.get([fmt, RENDERER_VERSION] + key, render)
+
+    if fmt == 'html':
+        yield "</body>\n</html>\n"
+
+def write_report(filename, chunks):
+    """Пишет отчет по частям во временный файл и атомарно заменяет итоговый"""
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_filename, filename)
+    return filename
+
+def expand_streamed(domain_results):
+    """Заменяет краткие результаты потокового режима полными из JSONL потока"""
+    streams = {results['stream'] for results in domain_results.values() if 'stream' in results}
+    if not streams:
+        return domain_results
+
+    domain_results = dict(domain_results)
+    for stream in streams:
+        if not os.path.exists(stream):
+            continue
+        for domain_url, results in collect_results(stream).items():
+            if 'stream' in domain_results.get(domain_url, {}):
+                domain_results[domain_url] = results
+    return domain_results
+
+def load_results(filename):
+    """(результаты по доменам, scan_info) из JSON результатов или JSONL потока
+
+    В JSONL потоке scan_info нет, временем сканирования считается время
+    первого события.
+    """
+    if filename.endswith('.jsonl'):
+        first_event = next(read_events(filename), {})
+        return collect_results(filename), {'timestamp': first_event.get('ts')}
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    return expand_streamed(data.get('domain_results', {})), data.get('scan_info', {})
+
+def main():
+    parser = argparse.ArgumentParser(description='Сборка отчета по сохраненным результатам сканирования')
+    parser.add_argument('results', help='easyclaim_security_results.json или JSONL поток находок')
+    parser.add_argument('--format', choices=['md', 'html'], default='md', help='Формат отчета (по умолчанию: md)')
+    parser.add_argument('--output', help='Файл отчета (по умолчанию: имя результатов с расширением формата)')
+    parser.add_argument('--cache-dir', default=REPORT_CACHE_DIR, help=f'Кэш разделов (по умолчанию: {REPORT_CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true', help='Рендерить все разделы заново')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.results):
+        print(f"❌ Файл не найден: {args.results}")
+        sys.exit(1)
+
+    domain_results, scan_info = load_results(args.results)
+    # Порядок и полный список доменов - из плана сканирования, а не только загруженных результатов
+    domains = scan_info.get('domains')
+    cache = SectionCache(None if args.no_cache else args.cache_dir, f"{Path(args.results).name}.{args.format}")
+    output = args.output or str(Path(args.results).with_suffix('.' + args.format))
+
+    write_report(output, iter_report(domain_results, domains, cache=cache, fmt=args.format, scan_info=scan_info))
+    removed = cache.prune()
+
+    print(f"📄 Отчет сохранен: {output}")
+    print(f"🌐 Доменов: {len(domain_results)}")
+    print(f"♻️  Разделов из кэша: {cache.hits}, отрендерено заново: {cache.misses}, удалено устаревших: {removed}")
+
+if __name__ == "__main__":
+    main()
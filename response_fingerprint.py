@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Отпечатки ответов для отсева soft-404
+Многие сайты отвечают одной и той же страницей на любой несуществующий путь,
+отпечаток такой страницы снимается один раз на хост по случайным путям
+"""
+
+import re
+import math
+import hashlib
+import secrets
+import threading
+from urllib.parse import urlparse, unquote
+
+# Случайные пути для снятия базового отпечатка: файл, директория, скрипт
+BASELINE_PATTERNS = ['/{token}', '/{token}/', '/{token}.php']
+
+# Максимальное расстояние Хэмминга между simhash похожих страниц
+SIMHASH_DISTANCE = 3
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+def simhash(text, bits=64):
+    """64-битный simhash по словам текста"""
+    weights = [0] * bits
+
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        token_hash = int.from_bytes(hashlib.md5(token.encode('utf-8')).digest()[:8], 'big')
+        for bit in range(bits):
+            weights[bit] += 1 if token_hash >> bit & 1 else -1
+
+    return sum(1 << bit for bit in range(bits) if weights[bit] > 0)
+
+def strip_reflected_path(body, url):
+    """Убирает из тела запрошенный путь: страницы ошибок часто его повторяют"""
+    path = urlparse(url).path
+    if len(path) <= 1:
+        return body
+    for variant in {path, unquote(path), path.strip('/')}:
+        if variant:
+            body = body.replace(variant, '')
+    return body
+
+def length_bucket(length):
+    """Логарифмическая корзина длины, соседние корзины отличаются на ~10%"""
+    return int(math.log(length + 1, 1.1))
+
+class ResponseFingerprint:
+    """Отпечаток ответа: статус, хэш тела, корзина длины и ленивый simhash"""
+
+    def __init__(self, status_code, body, url=''):
+        self.status_code = status_code
+        body = strip_reflected_path(body, url)
+        self.body = body
+        self.body_hash = hashlib.sha1(body.encode('utf-8', 'replace')).hexdigest()
+        self.length_bucket = length_bucket(len(body))
+        self._simhash = None
+
+    @property
+    def simhash(self):
+        if self._simhash is None:
+            self._simhash = simhash(self.body)
+        return self._simhash
+
+    def matches(self, other):
+        """Проверяет, что два ответа - одна и та же страница"""
+        if self.status_code != other.status_code:
+            return False
+        if self.body_hash == other.body_hash:
+            return True
+        # simhash считается только для ответов близкой длины
+        if abs(self.length_bucket - other.length_bucket) > 1:
+            return False
+        return bin(self.simhash ^ other.simhash).count('1') <= SIMHASH_DISTANCE
+
+class SoftNotFoundDetector:
+    """Базовый отпечаток хоста и счетчик отброшенных проб
+
+    fetch - функция url -> response (или None), обычно make_request сканера.
+    Базовый отпечаток снимается при первом обращении, один раз на экземпляр.
+    """
+
+    def __init__(self, base_url, fetch):
+        self.base_url = base_url.rstrip('/')
+        self.fetch = fetch
+        self.baseline = None
+        self.pruned = 0
+        self.lock = threading.Lock()
+
+    def build_baseline(self):
+        """Запрашивает случайные пути и запоминает отпечатки ответов"""
+        baseline = []
+        for pattern in BASELINE_PATTERNS:
+            url = self.base_url + pattern.format(token=secrets.token_hex(8))
+            response = self.fetch(url)
+            if response is not None:
+                baseline.append(ResponseFingerprint(response.status_code, response.text, url))
+        return baseline
+
+    def get_baseline(self):
+        """Возвращает базовый отпечаток, снимая его при первом вызове"""
+        with self.lock:
+            if self.baseline is None:
+                self.baseline = self.build_baseline()
+            return self.baseline
+
+    def is_soft_404(self, response):
+        """True, если ответ совпадает со страницей несуществующего пути"""
+        baseline = self.get_baseline()
+        if not baseline:
+            return False
+
+        fingerprint = ResponseFingerprint(response.status_code, response.text, response.url)
+        if any(known.matches(fingerprint) for known in baseline):
+            with self.lock:
+                self.pruned += 1
+            return True
+
+        return False
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Потоковая запись результатов сканирования в JSONL
+Каждая находка записывается отдельной строкой сразу после обнаружения, поэтому
+память не растет с числом целей, а прерванное сканирование оставляет все, что
+успело найти. Сводка считается потоковой сверткой событий
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+
+SEVERITIES = ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW')
+
+class JsonlSink:
+    """Потокобезопасная запись событий в JSONL файл
+
+    Каждое событие - одна строка {'event': тип, 'target': URL, 'ts': время, ...}.
+    Строки сбрасываются на диск сразу, fsync выполняется каждые fsync_every событий.
+    """
+
+    def __init__(self, filename, fsync_every=50):
+        self.filename = filename
+        self.fsync_every = fsync_every
+        self.file = open(filename, 'a', encoding='utf-8')
+        self.lock = threading.Lock()
+        self.events = 0
+        self.listeners = []
+
+    def subscribe(self, listener):
+        """listener(event) вызывается для каждого записанного события"""
+        self.listeners.append(listener)
+
+    def emit(self, event, target, **data):
+        record = {'event': event, 'target': target, 'ts': round(time.time(), 3)}
+        record.update(data)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+
+        with self.lock:
+            self.file.write(line + '\n')
+            self.file.flush()
+            self.events += 1
+            if self.events % self.fsync_every == 0:
+                os.fsync(self.file.fileno())
+            for listener in self.listeners:
+                listener(record)
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def count_vulnerabilities(results):
+    """Подсчет находок по критичности в результатах одного домена"""
+    if 'stream' in results:
+        # Краткие результаты потокового режима уже содержат счетчики
+        return dict(results['vulnerabilities'])
+
+    severity_counts = {severity: 0 for severity in SEVERITIES}
+
+    for items in results.values():
+        if isinstance(items, dict):
+            items = [items]
+        if isinstance(items, list):
+            for item in items:
+                if isinstance(item, dict) and item.get('severity') in severity_counts:
+                    severity_counts[item['severity']] += 1
+
+    counts = {severity.lower(): count for severity, count in severity_counts.items()}
+    counts['total'] = sum(severity_counts.values())
+    return counts
+
+def read_events(filename):
+    """Читает события из JSONL, пропуская оборванные строки"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Последняя строка может быть оборвана при аварийном завершении
+                continue
+
+def collect_results(filename):
+    """Собирает из JSONL результаты по целям в формате EnhancedSecurityScanner.results
+
+    Цели без события scan_end помечаются 'incomplete': True.
+    """
+    targets = {}
+
+    for event in read_events(filename):
+        results = targets.setdefault(event.get('target'), {'incomplete': True})
+        kind = event.get('event')
+
+        if kind == 'scan_start':
+            # Повторное сканирование цели в том же файле заменяет предыдущее
+            targets[event.get('target')] = {'incomplete': True, 'signature_pack': event.get('signature_pack')}
+        elif kind == 'finding':
+            results.setdefault(event['category'], []).append(event['item'])
+            results.setdefault('_ids', {})[event.get('id')] = (event['category'], len(results[event['category']]) - 1)
+        elif kind == 'finding_update':
+            category, index = results.get('_ids', {}).get(event.get('id'), (None, None))
+            if category is not None:
+                results[category][index] = event['item']
+        elif kind == 'section':
+            results[event['key']] = event['value']
+        elif kind == 'scan_end':
+            results.pop('incomplete', None)
+            results['phase_timings'] = event.get('phase_timings', {})
+            results['request_stats'] = event.get('request_stats', {})
+        elif kind == 'scan_error':
+            targets[event.get('target')] = {'error': event.get('error')}
+
+    for results in targets.values():
+        results.pop('_ids', None)
+
+    return targets
+
+class SummaryReducer:
+    """Свертка событий в сводку по целям и критичности
+
+    Хранит только счетчики и критичность каждой находки (для событий
+    finding_update), но не сами находки.
+    """
+
+    def __init__(self):
+        self.targets = {}
+        self.severities = {}
+
+    def target(self, url):
+        if url not in self.targets:
+            self.targets[url] = {
+                'status': 'running',
+                'categories': {},
+                **{severity.lower(): 0 for severity in SEVERITIES}
+            }
+        return self.targets[url]
+
+    def count(self, state, severity, delta):
+        if severity in SEVERITIES:
+            state[severity.lower()] += delta
+
+    def feed(self, event):
+        kind = event.get('event')
+        state = self.target(event.get('target'))
+
+        if kind == 'scan_start':
+            state['status'] = 'running'
+        elif kind == 'scan_end':
+            state['status'] = 'done'
+            state['duration'] = event.get('duration')
+        elif kind == 'scan_error':
+            state['status'] = 'error'
+            state['error'] = event.get('error')
+        elif kind == 'finding':
+            item = event.get('item')
+            severity = item.get('severity') if isinstance(item, dict) else None
+            state['categories'][event['category']] = state['categories'].get(event['category'], 0) + 1
+            self.severities[(event.get('target'), event.get('id'))] = severity
+            self.count(state, severity, 1)
+        elif kind == 'finding_update':
+            key = (event.get('target'), event.get('id'))
+            severity = event.get('item', {}).get('severity')
+            self.count(state, self.severities.get(key), -1)
+            self.count(state, severity, 1)
+            self.severities[key] = severity
+        elif kind == 'section':
+            value = event.get('value')
+            if isinstance(value, dict):
+                self.count(state, value.get('severity'), 1)
+
+    def summary(self):
+        """Сводка в формате EasyClaimSecurityAnalyzer.results['summary']"""
+        summary = {
+            'total_vulnerabilities': 0,
+            'critical_issues': 0,
+            'high_issues': 0,
+            'medium_issues': 0,
+            'low_issues': 0,
+            'domains_with_issues': 0,
+            'domains_done': 0,
+            'domains_incomplete': 0
+        }
+
+        for state in self.targets.values():
+            total = sum(state[severity.lower()] for severity in SEVERITIES)
+            state['total'] = total
+            summary['total_vulnerabilities'] += total
+            for severity in SEVERITIES:
+                summary[f'{severity.lower()}_issues'] += state[severity.lower()]
+            if total:
+                summary['domains_with_issues'] += 1
+            if state['status'] == 'done':
+                summary['domains_done'] += 1
+            else:
+                summary['domains_incomplete'] += 1
+
+        return summary
+
+def reduce_stream(filename):
+    """Сворачивает JSONL файл, возвращает SummaryReducer"""
+    reducer = SummaryReducer()
+    for event in read_events(filename):
+        reducer.feed(event)
+    return reducer
+
+def main():
+    parser = argparse.ArgumentParser(description='Сводка по потоку результатов сканирования (JSONL)')
+    parser.add_argument('stream', help='JSONL файл, записанный сканером с --stream')
+    parser.add_argument('--json', action='store_true', help='Вывести сводку в JSON')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.stream):
+        print(f"❌ Файл не найден: {args.stream}")
+        sys.exit(1)
+
+    reducer = reduce_stream(args.stream)
+    summary = reducer.summary()
+
+    if args.json:
+        print(json.dumps({'summary': summary, 'targets': reducer.targets}, ensure_ascii=False, indent=2))
+        return
+
+    print(f"📊 Целей: {len(reducer.targets)} (завершено: {summary['domains_done']}, "
+          f"не завершено: {summary['domains_incomplete']})")
+    print(f"🚨 Всего проблем: {summary['total_vulnerabilities']} "
+          f"(🔴 {summary['critical_issues']} / 🟠 {summary['high_issues']} / "
+          f"🟡 {summary['medium_issues']} / 🔵 {summary['low_issues']})")
+
+    for url, state in reducer.targets.items():
+        status = {'done': '✅', 'error': '❌'}.get(state['status'], '⏳')
+        print(f"   {status} {url}: {state['total']}")
+
+if __name__ == "__main__":
+    main()
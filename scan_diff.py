@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Сравнение результатов двух запусков сканирования
+Находки обоих файлов индексируются по стабильному идентификатору
+(finding_identity), после чего новые, исправленные и неизменные находки
+определяются за линейное время. Принятые находки из baseline файла скрываются
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+
+from finding_identity import load_scan, iter_findings
+
+def index_findings(scan):
+    """{id: (цель, категория, находка)}, повторы одной находки схлопываются"""
+    return {fid: (target, category, item) for fid, target, category, item in iter_findings(scan)}
+
+def load_baseline(filename):
+    """Принятые находки {id: описание} из baseline файла"""
+    if not filename or not os.path.exists(filename):
+        return {}
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f).get('accepted', {})
+
+def save_baseline(filename, accepted):
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump({'accepted': accepted}, f, ensure_ascii=False, indent=2)
+
+def diff_scans(old_scan, new_scan, accepted=None):
+    """Новые, исправленные и неизменные находки между двумя запусками
+
+    accepted - идентификаторы принятых находок, они не попадают в new/unchanged
+    и считаются в suppressed.
+    """
+    accepted = accepted or {}
+    old_index = index_findings(old_scan)
+    new_index = index_findings(new_scan)
+
+    diff = {'new': [], 'resolved': [], 'unchanged': [], 'suppressed': 0}
+
+    for fid, (target, category, item) in new_index.items():
+        if fid in accepted:
+            diff['suppressed'] += 1
+        elif fid in old_index:
+            diff['unchanged'].append({'id': fid, 'target': target, 'category': category})
+        else:
+            diff['new'].append({'id': fid, 'target': target, 'category': category, 'finding': item})
+
+    for fid, (target, category, item) in old_index.items():
+        if fid not in new_index:
+            diff['resolved'].append({'id': fid, 'target': target, 'category': category, 'finding': item})
+
+    return diff
+
+def describe(entry):
+    """Короткое описание находки для консоли"""
+    finding = entry['finding']
+    if isinstance(finding, dict):
+        location = finding.get('url') or finding.get('action') or finding.get('header') or finding.get('name') or ''
+        severity = finding.get('severity', '')
+    else:
+        location, severity = str(finding), ''
+    return f"[{severity or '-'}] {entry['target']} {entry['category']}: {location}"
+
+def main():
+    parser = argparse.ArgumentParser(description='Сравнение результатов двух запусков сканирования')
+    parser.add_argument('old', help='Результаты предыдущего запуска (JSON или JSONL)')
+    parser.add_argument('new', help='Результаты текущего запуска (JSON или JSONL)')
+    parser.add_argument('--baseline', help='Файл принятых находок, которые не показываются')
+    parser.add_argument('--accept', action='store_true',
+                        help='Добавить все находки текущего запуска в --baseline')
+    parser.add_argument('--output', help='Сохранить результат сравнения в JSON')
+    parser.add_argument('--fail-on-new', action='store_true', help='Код выхода 1, если есть новые находки')
+
+    args = parser.parse_args()
+
+    for filename in (args.old, args.new):
+        if not os.path.exists(filename):
+            print(f"❌ Файл не найден: {filename}")
+            sys.exit(1)
+
+    if args.accept and not args.baseline:
+        parser.error('--accept требует --baseline')
+
+    old_scan = load_scan(args.old)
+    new_scan = load_scan(args.new)
+    accepted = load_baseline(args.baseline)
+
+    diff = diff_scans(old_scan, new_scan, accepted)
+
+    print(f"🆕 Новые: {len(diff['new'])}")
+    for entry in diff['new']:
+        print(f"   {describe(entry)}")
+    print(f"✅ Исправленные: {len(diff['resolved'])}")
+    for entry in diff['resolved']:
+        print(f"   {describe(entry)}")
+    print(f"➖ Без изменений: {len(diff['unchanged'])}")
+    if diff['suppressed']:
+        print(f"🙈 Скрыто принятых: {diff['suppressed']}")
+
+    if args.output:
+        diff['compared'] = {'old': args.old, 'new': args.new, 'timestamp': datetime.now().isoformat()}
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(diff, f, ensure_ascii=False, indent=2)
+        print(f"📄 Сравнение сохранено: {args.output}")
+
+    if args.accept:
+        for fid, target, category, _ in iter_findings(new_scan):
+            accepted.setdefault(fid, {'target': target, 'category': category,
+                                      'accepted': datetime.now().strftime('%Y-%m-%d')})
+        save_baseline(args.baseline, accepted)
+        print(f"📌 Принятых находок в {args.baseline}: {len(accepted)}")
+
+    if args.fail_on_new and diff['new']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
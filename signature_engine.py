@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Движок сигнатур для анализа ответов сканеров
+Регулярные выражения компилируются один раз, а перед поиском тело ответа
+проверяется на литеральные якоря сигнатур, поэтому на ответах без совпадений
+регулярные выражения вообще не запускаются
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+
+def parse_units(pattern):
+    """Разбивает шаблон на элементы: литеральный символ или None для прочих конструкций
+
+    Возвращает список пар (символ или None, квантификатор или '').
+    """
+    units = []
+    i = 0
+
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\' and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            # \d, \s, \w и т.п. - не литерал
+            unit = None if escaped.isalnum() else escaped
+            i += 2
+        elif char == '[':
+            end = pattern.find(']', i + 2)
+            unit = None
+            i = end + 1 if end != -1 else len(pattern)
+        elif char in '.^$':
+            unit = None
+            i += 1
+        else:
+            unit = char
+            i += 1
+
+        quantifier = ''
+        if i < len(pattern) and pattern[i] in '*+?{':
+            if pattern[i] == '{':
+                end = pattern.find('}', i)
+                end = end if end != -1 else len(pattern) - 1
+                quantifier = pattern[i:end + 1]
+                i = end + 1
+            else:
+                quantifier = pattern[i]
+                i += 1
+            # Ленивые и жадные модификаторы квантификатора
+            if i < len(pattern) and pattern[i] in '?+':
+                i += 1
+
+        units.append((unit, quantifier))
+
+    return units
+
+def extract_anchor(pattern):
+    """Самый длинный литеральный фрагмент, без которого шаблон не совпадет
+
+    Для шаблонов с группами и альтернативами якорь не выделяется
+    (возвращается None), такие сигнатуры проверяются всегда.
+    """
+    if '(' in pattern.replace('\\(', '') or '|' in pattern.replace('\\|', ''):
+        return None
+
+    runs = []
+    current = ''
+
+    for unit, quantifier in parse_units(pattern):
+        required = quantifier in ('', '+') or quantifier.startswith('{') and not quantifier.startswith(('{0', '{,'))
+        if unit is None or not required:
+            runs.append(current)
+            current = ''
+            continue
+
+        current += unit
+        if quantifier:
+            # После повторяющегося символа литерал продолжаться не может
+            runs.append(current)
+            current = ''
+
+    runs.append(current)
+    anchor = max(runs, key=len)
+    # Для не-ASCII символов str.lower() и re.IGNORECASE могут расходиться
+    if not anchor or not anchor.isascii():
+        return None
+    return anchor
+
+class Signature:
+    """Одна сигнатура: имя, исходный шаблон, скомпилированное выражение и якорь"""
+
+    def __init__(self, name, pattern, flags=re.IGNORECASE):
+        self.name = name
+        self.pattern = pattern
+        self.regex = re.compile(pattern, flags)
+        self.anchor = extract_anchor(pattern)
+        if self.anchor and flags & re.IGNORECASE:
+            self.anchor = self.anchor.lower()
+
+    def __repr__(self):
+        return f"Signature({self.name!r}, {self.pattern!r})"
+
+class SignatureSet:
+    """Скомпилированный набор сигнатур одной категории
+
+    signatures - список пар (имя, шаблон). Тело ответа приводится к нижнему
+    регистру один раз, и регулярные выражения запускаются только для сигнатур,
+    чей якорь встречается в тексте.
+    """
+
+    def __init__(self, signatures, flags=re.IGNORECASE):
+        self.flags = flags
+        self.signatures = [Signature(name, pattern, flags) for name, pattern in signatures]
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def __iter__(self):
+        return iter(self.signatures)
+
+    def candidates(self, text):
+        """Сигнатуры, прошедшие проверку литеральных якорей"""
+        haystack = text.lower() if self.flags & re.IGNORECASE else text
+        return [
+            signature for signature in self.signatures
+            if signature.anchor is None or signature.anchor in haystack
+        ]
+
+    def scan(self, text):
+        """Все совпавшие сигнатуры в порядке объявления: список (сигнатура, match)"""
+        if not text:
+            return []
+
+        matches = []
+        for signature in self.candidates(text):
+            match = signature.regex.search(text)
+            if match:
+                matches.append((signature, match))
+        return matches
+
+    def search(self, text):
+        """Первая совпавшая сигнатура (сигнатура, match) или None"""
+        if not text:
+            return None
+
+        for signature in self.candidates(text):
+            match = signature.regex.search(text)
+            if match:
+                return signature, match
+        return None
+
+    def matched_names(self, text):
+        """Имена совпавших сигнатур без повторов"""
+        names = []
+        for signature, _ in self.scan(text):
+            if signature.name not in names:
+                names.append(signature.name)
+        return names
+
+def collect_bodies(data):
+    """Собирает все строковые значения из JSON отчета"""
+    if isinstance(data, str):
+        return [data]
+    if isinstance(data, dict):
+        data = list(data.values())
+    if isinstance(data, list):
+        bodies = []
+        for item in data:
+            bodies.extend(collect_bodies(item))
+        return bodies
+    return []
+
+def naive_scan(signatures, text):
+    """Исходный способ: re.search по строковому шаблону для каждой сигнатуры"""
+    return [
+        signature.name for signature in signatures
+        if re.search(signature.pattern, text, signatures.flags)
+    ]
+
+def run_benchmark(signature_sets, bodies, rounds=20):
+    """Сравнивает движок с поочередным re.search, проверяя совпадение результатов
+
+    Возвращает словарь {категория: {'naive': сек, 'engine': сек, 'matches': N}}.
+    """
+    results = {}
+
+    for category, signatures in signature_sets.items():
+        expected = [naive_scan(signatures, body) for body in bodies]
+        actual = [[signature.name for signature, _ in signatures.scan(body)] for body in bodies]
+        if expected != actual:
+            raise AssertionError(f"Результаты движка для {category} расходятся с re.search")
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for body in bodies:
+                naive_scan(signatures, body)
+        naive_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for body in bodies:
+                signatures.scan(body)
+        engine_time = time.perf_counter() - start
+
+        results[category] = {
+            'signatures': len(signatures),
+            'naive': round(naive_time, 4),
+            'engine': round(engine_time, 4),
+            'matches': sum(len(names) for names in actual)
+        }
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк движка сигнатур на сохраненных отчетах')
+    parser.add_argument('reports', nargs='*', default=['security_report.json'],
+                        help='JSON отчеты, из которых берутся тела ответов (по умолчанию security_report.json)')
+    parser.add_argument('--rounds', type=int, default=20, help='Количество повторов (по умолчанию: 20)')
+    parser.add_argument('--signatures', default=None, help='Пакет сигнатур (по умолчанию signature_pack.json)')
+
+    args = parser.parse_args()
+
+    from signature_pack import load_signature_pack
+    pack = load_signature_pack(args.signatures)
+
+    bodies = []
+    for filename in args.reports:
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                bodies.extend(collect_bodies(json.load(f)))
+        except (OSError, ValueError) as e:
+            print(f"❌ Не удалось загрузить {filename}: {e}")
+            sys.exit(1)
+
+    total_size = sum(len(body) for body in bodies)
+    print(f"🗂️  Сигнатуры: {pack.name} {pack.version}")
+    print(f"📄 Тел ответов: {len(bodies)}, общий размер: {total_size} символов, повторов: {args.rounds}")
+
+    results = run_benchmark(pack.signatures, bodies, args.rounds)
+
+    print(f"\n{'Категория':<24} {'Сигнатур':>8} {'re.search':>10} {'движок':>10} {'ускорение':>10}")
+    for category, stats in results.items():
+        speedup = stats['naive'] / stats['engine'] if stats['engine'] else float('inf')
+        print(f"{category:<24} {stats['signatures']:>8} {stats['naive']:>10.4f} {stats['engine']:>10.4f} {speedup:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
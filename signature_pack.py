@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Загрузка пакета сигнатур сканеров
+Пакет (signature_pack.json) содержит версию, payload'ы, списки путей, индикаторы
+и регулярные сигнатуры. Пакет компилируется один раз на процесс для
+каждого содержимого файла (по sha256)
+"""
+
+import re
+import json
+import hashlib
+import threading
+from pathlib import Path
+
+from signature_engine import SignatureSet
+
+DEFAULT_PACK = Path(__file__).with_name('signature_pack.json')
+
+# Разделы, без которых сканеры работать не могут
+REQUIRED_SECTIONS = ('version', 'payloads', 'wordlists', 'indicators', 'signatures')
+
+class SignaturePack:
+    """Загруженный пакет сигнатур
+
+    payloads, wordlists и indicators - словари {имя: список строк},
+    signatures - словарь {категория: SignatureSet}.
+    """
+
+    def __init__(self, data, pack_hash):
+        missing = [section for section in REQUIRED_SECTIONS if section not in data]
+        if missing:
+            raise ValueError(f"В пакете сигнатур нет разделов: {', '.join(missing)}")
+
+        self.name = data.get('name', 'signatures')
+        self.version = str(data['version'])
+        self.pack_hash = pack_hash
+        self.payloads = data['payloads']
+        self.wordlists = data['wordlists']
+        self.indicators = {
+            name: [indicator.lower() for indicator in indicators]
+            for name, indicators in data['indicators'].items()
+        }
+        self.signatures = {
+            category: self.compile_set(category, spec)
+            for category, spec in data['signatures'].items()
+        }
+
+    @staticmethod
+    def compile_set(category, spec):
+        """Компилирует категорию сигнатур: элемент - шаблон или пара [имя, шаблон]"""
+        flags = 0
+        for flag in spec.get('flags', []):
+            flags |= getattr(re, flag)
+
+        signatures = []
+        for entry in spec['patterns']:
+            name, pattern = (entry, entry) if isinstance(entry, str) else entry
+            signatures.append((name, pattern))
+
+        try:
+            return SignatureSet(signatures, flags)
+        except re.error as e:
+            raise ValueError(f"Ошибка в сигнатуре категории {category}: {e}")
+
+    def info(self):
+        """Краткое описание пакета для результатов сканирования"""
+        return {
+            'name': self.name,
+            'version': self.version,
+            'hash': self.pack_hash[:12]
+        }
+
+_loaded_packs = {}
+_load_lock = threading.Lock()
+
+def load_signature_pack(path=None):
+    """Загружает пакет сигнатур, один раз на процесс для каждого файла
+
+    Дискового кэша нет: pickle хранит регулярные выражения как исходные
+    шаблоны и при загрузке компилирует их заново, так что кэш экономил бы
+    только разбор JSON. Повторная загрузка в том же процессе берет пакет
+    из памяти по sha256 содержимого.
+    """
+    path = Path(path or DEFAULT_PACK)
+    raw = path.read_bytes()
+    pack_hash = hashlib.sha256(raw).hexdigest()
+
+    with _load_lock:
+        if pack_hash in _loaded_packs:
+            return _loaded_packs[pack_hash]
+
+        pack = SignaturePack(json.loads(raw.decode('utf-8')), pack_hash)
+        _loaded_packs[pack_hash] = pack
+        return pack
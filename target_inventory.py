@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Загрузка списка целей для сканирования и контрольные точки прогресса
+Формат файла: одна цель на строку, после URL можно указать delay=СЕК и threads=N,
+строки, начинающиеся с #, игнорируются
+"""
+
+import os
+import sys
+import json
+import hashlib
+import threading
+
+def parse_target_line(line):
+    """Разбирает строку инвентаря, возвращает словарь цели или None"""
+    line = line.split('#', 1)[0].strip()
+    if not line:
+        return None
+
+    parts = line.split()
+    url = parts[0].rstrip('/')
+    if '://' not in url:
+        url = 'https://' + url
+
+    target = {'url': url, 'delay': None, 'threads': None}
+
+    for option in parts[1:]:
+        name, _, value = option.partition('=')
+        if name == 'delay':
+            target['delay'] = float(value)
+        elif name == 'threads':
+            target['threads'] = int(value)
+        else:
+            raise ValueError(f"Неизвестный параметр цели '{option}' в строке: {line}")
+
+    return target
+
+def load_inventory(source):
+    """Загружает цели из файла или из stdin (source='-')
+
+    Повторяющиеся URL пропускаются, порядок сохраняется.
+    """
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+    targets = []
+    seen = set()
+
+    for line_number, line in enumerate(lines, 1):
+        try:
+            target = parse_target_line(line)
+        except ValueError as e:
+            raise ValueError(f"{source}:{line_number}: {e}")
+
+        if target and target['url'] not in seen:
+            seen.add(target['url'])
+            targets.append(target)
+
+    return targets
+
+def parse_shard(value):
+    """Разбирает номер шарда в формате 'i/N' (i от 1 до N)"""
+    index, _, count = value.partition('/')
+    index, count = int(index), int(count)
+    if not 1 <= index <= count:
+        raise ValueError(f"Некорректный шард: {value}")
+    return index, count
+
+def select_shard(targets, index, count):
+    """Оставляет цели шарда index из count
+
+    Распределение зависит только от URL, поэтому одна и та же цель всегда
+    попадает в один шард независимо от порядка строк в инвентаре.
+    """
+    if count <= 1:
+        return list(targets)
+
+    return [
+        target for target in targets
+        if int(hashlib.sha1(target['url'].encode('utf-8')).hexdigest(), 16) % count == index - 1
+    ]
+
+class Checkpoint:
+    """Контрольная точка сканирования в формате JSONL
+
+    После каждой цели в файл дописывается строка с ее результатами, поэтому
+    прерванное сканирование можно продолжить с того же места.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Возвращает словарь {url: запись} для уже просканированных целей"""
+        completed = {}
+        if not self.filename or not os.path.exists(self.filename):
+            return completed
+
+        with open(self.filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Последняя строка может быть оборвана при аварийном завершении
+                    continue
+                completed[record['url']] = record
+
+        return completed
+
+    def save(self, url, results):
+        """Дописывает результаты цели"""
+        if not self.filename:
+            return
+
+        line = json.dumps({'url': url, 'results': results}, ensure_ascii=False)
+        with self.lock:
+            with open(self.filename, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
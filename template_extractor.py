@@ -8,13 +8,26 @@ import requests
 import os
 import re
 import time
-from urllib.parse import urljoin, urlparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from urllib.parse import urljoin, urlparse, unquote
 from pathlib import Path
 import json
 import hashlib
+from dns_cache import install_dns_cache
+from probe_engine import AdaptiveRateController, controlled_request
+from crawl_frontier import load_robots, discover_sitemaps
+from autoindex import is_listing, parse_listing, size_matches
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
 
 class TemplateExtractor:
-    def __init__(self, base_url, output_dir='extracted_templates'):
+    def __init__(self, base_url, output_dir='extracted_templates', max_rate=2.0, max_threads=4, listing_depth=3):
         self.base_url = base_url.rstrip('/')
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
@@ -24,6 +37,23 @@ class TemplateExtractor:
         })
         self.extracted_files = []
         self.failed_extractions = []
+        self.max_threads = max_threads
+        self.listing_depth = listing_depth
+        # Темп начинается с 2 запросов/сек (прежняя пауза 0.5 сек), растет до max_rate
+        # и снижается при 429/503 и росте задержки
+        self.rate_control = AdaptiveRateController(min(2.0, max_rate), max_rate, max_concurrency=max_threads,
+                                                   log=self.log)
+        # Общая очередь скачивания всех методов: каждый URL скачивается один раз
+        self.executor = None
+        self.lock = threading.Lock()
+        self.submitted = set()
+        self.claimed_paths = {}
+        self.duplicates = 0
+        self.metadata_path = self.output_dir / 'extraction_metadata.json'
+        # Ход извлечения: по строке JSON на файл, полные метаданные пишутся в конце
+        self.progress_path = self.output_dir / 'extraction_progress.jsonl'
+        self.progress = None
+        self.started = None
         
     def log(self, message, level="INFO"):
         """Логирование"""
@@ -33,53 +63,60 @@ class TemplateExtractor:
     def make_request(self, url, **kwargs):
         """HTTP запрос с обработкой ошибок"""
         try:
-            time.sleep(0.5)  # Задержка между запросами
-            response = self.session.get(url, timeout=10, **kwargs)
+            response = controlled_request(self.rate_control, self.session, 'GET', url, retries=1, timeout=10, **kwargs)
             return response
         except requests.exceptions.RequestException as e:
             self.log(f"Ошибка запроса к {url}: {e}", "ERROR")
             return None
             
-    def extract_from_directory_listing(self, directory_url):
-        """Извлечение файлов из directory listing"""
+    def extract_from_directory_listing(self, directory_url, response=None):
+        """Извлечение файлов из directory listing с обходом подкаталогов до listing_depth
+        
+        response - уже полученный ответ directory_url, чтобы не запрашивать его повторно.
+        """
         self.log(f"Извлечение из directory listing: {directory_url}")
         
-        response = self.make_request(directory_url)
-        if not response or response.status_code != 200:
-            return []
-            
-        # Поиск ссылок на файлы
-        file_links = re.findall(r'href=["\']([^"\']+)["\']', response.text)
-        extracted_files = []
+        downloads = []
+        visited = set()
+        level = [directory_url]
         
-        for link in file_links:
-            if link.startswith('/'):
-                file_url = self.base_url + link
+        # Листинги одного уровня читаются параллельно, файлы сразу уходят в очередь скачивания
+        for depth in range(self.listing_depth + 1):
+            level = [url for url in dict.fromkeys(level) if url not in visited]
+            if not level:
+                break
+            visited.update(level)
+            
+            if depth == 0 and response is not None:
+                pages = [response]
             else:
-                file_url = urljoin(directory_url, link)
-                
-            # Пропускаем ссылки на директории
-            if link.endswith('/') or link in ['../', './']:
-                continue
+                with ThreadPoolExecutor(max_workers=self.max_threads) as pool:
+                    pages = list(pool.map(self.make_request, level))
                 
-            # Извлекаем файл
-            file_content = self.extract_file(file_url)
-            if file_content:
-                extracted_files.append({
-                    'url': file_url,
-                    'filename': os.path.basename(link),
-                    'size': len(file_content),
-                    'method': 'directory_listing'
-                })
+            subdirectories = []
+            for listing_url, response in zip(level, pages):
+                if not response or response.status_code != 200 or not is_listing(response.text):
+                    continue
+                for entry in parse_listing(response.text, listing_url):
+                    if entry['is_dir']:
+                        subdirectories.append(entry['url'])
+                    else:
+                        downloads.append(self.submit_listed(entry))
+            level = subdirectories
+        else:
+            if level:
+                self.log(f"Подкаталоги глубже {self.listing_depth} не обходились: {len(level)}", "WARNING")
                 
-        return extracted_files
+        return downloads
         
-    def extract_file(self, file_url):
-        """Извлечение содержимого файла"""
-        response = self.make_request(file_url)
-        if response and response.status_code == 200:
-            return response.content
-        return None
+    def submit_listed(self, entry):
+        """Файл из листинга сохраняется по своему пути на сервере"""
+        parts = [part for part in unquote(urlparse(entry['url']).path).split('/') if part not in ('', '.', '..')]
+        subdirectory = '/'.join(['directory_listing'] + parts[:-1])
+        info = {'method': 'directory_listing'}
+        if entry['mtime'] is not None:
+            info['last_modified'] = time.strftime('%Y-%m-%d %H:%M', time.gmtime(entry['mtime']))
+        return self.submit(entry['url'], parts[-1], subdirectory, listing=entry, **info)
         
     def save_file(self, content, filename, subdirectory=''):
         """Сохранение файла на диск"""
@@ -99,6 +136,122 @@ class TemplateExtractor:
             self.log(f"Ошибка сохранения файла {filename}: {e}", "ERROR")
             return None
             
+    def claim_path(self, url, filename, subdirectory):
+        """Путь для файла; одноименные файлы с разных URL не перезаписывают друг друга"""
+        save_dir = self.output_dir / subdirectory if subdirectory else self.output_dir
+        save_dir.mkdir(parents=True, exist_ok=True)
+        file_path = save_dir / filename
+        with self.lock:
+            if self.claimed_paths.setdefault(str(file_path), url) != url:
+                stem, ext = os.path.splitext(filename)
+                file_path = save_dir / f"{stem}_{hashlib.md5(url.encode()).hexdigest()[:8]}{ext}"
+                self.claimed_paths[str(file_path)] = url
+        return file_path
+        
+    def claim_url(self, url):
+        """True, если URL еще не запрашивался ни одним методом"""
+        with self.lock:
+            if url in self.submitted:
+                self.duplicates += 1
+                return False
+            self.submitted.add(url)
+            return True
+            
+    def submit(self, url, filename, subdirectory='', listing=None, **info):
+        """Ставит URL в общую очередь скачивания, повторный URL не скачивается"""
+        if not self.claim_url(url):
+            return None
+        return self.executor.submit(self.download, url, filename, subdirectory, info, listing)
+        
+    def download(self, url, filename, subdirectory, info, listing=None):
+        """Скачивает файл потоком на диск, считая sha256 и размер
+        
+        listing - запись directory listing: локальная копия с тем же размером и
+        временем изменения не скачивается, скачанному файлу ставится время из листинга.
+        """
+        if listing and listing['mtime'] is not None:
+            file_path = self.claim_path(url, filename, subdirectory)
+            if file_path.is_file():
+                stat = file_path.stat()
+                if (int(stat.st_mtime) == listing['mtime']
+                        and size_matches(stat.st_size, listing['size'], listing['size_exact'])):
+                    return self.record({
+                        'url': url,
+                        'filename': file_path.name,
+                        'path': str(file_path),
+                        'size': stat.st_size,
+                        'sha256': file_sha256(file_path),
+                        'unchanged': True,
+                        **info
+                    })
+                    
+        try:
+            response = self.make_request(url, stream=True)
+            if not response:
+                return None
+            with response:
+                if response.status_code != 200:
+                    return None
+                file_path = self.claim_path(url, filename, subdirectory)
+                temp_path = file_path.with_name(file_path.name + '.part')
+                sha256 = hashlib.sha256()
+                size = 0
+                with open(temp_path, 'wb') as f:
+                    for chunk in response.iter_content(64 * 1024):
+                        sha256.update(chunk)
+                        size += len(chunk)
+                        f.write(chunk)
+                os.replace(temp_path, file_path)
+                if listing and listing['mtime'] is not None:
+                    os.utime(file_path, (listing['mtime'], listing['mtime']))
+        except (OSError, requests.exceptions.RequestException) as e:
+            self.log(f"Ошибка скачивания {url}: {e}", "ERROR")
+            failure = {'url': url, 'error': str(e)}
+            with self.lock:
+                self.failed_extractions.append(failure)
+                self.append_progress(failure)
+            return None
+            
+        return self.record({
+            'url': url,
+            'filename': file_path.name,
+            'path': str(file_path),
+            'size': size,
+            'sha256': sha256.hexdigest(),
+            **info
+        })
+        
+    def record(self, file_info):
+        """Добавляет файл в метаданные и дописывает его строкой в extraction_progress.jsonl"""
+        with self.lock:
+            self.extracted_files.append(file_info)
+            self.append_progress(file_info)
+        return file_info
+        
+    def append_progress(self, item):
+        """Одна строка на файл: при прерывании скачанное остается описанным (вызывается под lock)"""
+        if self.progress:
+            self.progress.write(json.dumps(item, ensure_ascii=False) + '\n')
+            self.progress.flush()
+            
+    def write_metadata(self, complete=False):
+        metadata = {
+            'base_url': self.base_url,
+            'extraction_time': self.started,
+            'complete': complete,
+            'total_files': len(self.extracted_files),
+            'duplicates_skipped': self.duplicates,
+            'files': self.extracted_files
+        }
+        if self.failed_extractions:
+            metadata['failed'] = self.failed_extractions
+            
+        # Файл всегда целый, даже если извлечение прервано
+        temp_path = self.metadata_path.with_name(self.metadata_path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.metadata_path)
+            
     def extract_templates_from_source(self):
         """Извлечение шаблонов из исходного кода страниц"""
         self.log("Поиск шаблонов в исходном коде...")
@@ -114,7 +267,7 @@ class TemplateExtractor:
         image_links = re.findall(r'src=["\']([^"\']*\.(?:jpg|jpeg|png|gif|svg)[^"\']*)["\']', response.text)
         
         all_links = css_links + js_links + image_links
-        extracted_files = []
+        downloads = []
         
         for link in all_links:
             if link.startswith('http'):
@@ -124,34 +277,23 @@ class TemplateExtractor:
             else:
                 file_url = urljoin(self.base_url, link)
                 
-            file_content = self.extract_file(file_url)
-            if file_content:
-                filename = os.path.basename(urlparse(file_url).path)
-                if not filename:
-                    filename = f"file_{hashlib.md5(file_url.encode()).hexdigest()[:8]}"
-                    
-                # Определяем тип файла
-                if link.endswith('.css'):
-                    file_type = 'css'
-                elif link.endswith('.js'):
-                    file_type = 'js'
-                elif any(link.endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.svg']):
-                    file_type = 'images'
-                else:
-                    file_type = 'other'
-                    
-                saved_path = self.save_file(file_content, filename, file_type)
-                if saved_path:
-                    extracted_files.append({
-                        'url': file_url,
-                        'filename': filename,
-                        'path': saved_path,
-                        'size': len(file_content),
-                        'type': file_type,
-                        'method': 'source_extraction'
-                    })
+            filename = os.path.basename(urlparse(file_url).path)
+            if not filename:
+                filename = f"file_{hashlib.md5(file_url.encode()).hexdigest()[:8]}"
+                
+            # Определяем тип файла
+            if link.endswith('.css'):
+                file_type = 'css'
+            elif link.endswith('.js'):
+                file_type = 'js'
+            elif any(link.endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.svg']):
+                file_type = 'images'
+            else:
+                file_type = 'other'
+                
+            downloads.append(self.submit(file_url, filename, file_type, type=file_type, method='source_extraction'))
                     
-        return extracted_files
+        return downloads
         
     def extract_from_common_paths(self):
         """Извлечение из общих путей"""
@@ -164,79 +306,69 @@ class TemplateExtractor:
             '/admin/templates/', '/admin/css/', '/admin/js/'
         ]
         
-        extracted_files = []
+        # Пути проверяются в общей очереди наравне со скачиванием файлов
+        return [self.executor.submit(self.extract_common_path, path)
+                for path in common_paths if self.claim_url(self.base_url + path)]
         
-        for path in common_paths:
-            url = self.base_url + path
-            response = self.make_request(url)
-            
-            if response and response.status_code == 200:
-                # Проверяем, является ли это directory listing
-                if any(indicator in response.text.lower() for indicator in [
-                    'index of', 'parent directory', 'directory listing'
-                ]):
-                    files = self.extract_from_directory_listing(url)
-                    extracted_files.extend(files)
-                else:
-                    # Сохраняем содержимое как файл
-                    filename = f"index_{path.replace('/', '_').strip('_')}.html"
-                    saved_path = self.save_file(response.content, filename, 'directories')
-                    if saved_path:
-                        extracted_files.append({
-                            'url': url,
-                            'filename': filename,
-                            'path': saved_path,
-                            'size': len(response.content),
-                            'method': 'common_path'
-                        })
-                        
-        return extracted_files
+    def extract_common_path(self, path):
+        """Один общий путь: directory listing обходится, иначе страница сохраняется"""
+        url = self.base_url + path
+        response = self.make_request(url)
+        
+        if response and response.status_code == 200:
+            # Проверяем, является ли это directory listing
+            if is_listing(response.text):
+                return self.extract_from_directory_listing(url, response)
+                
+            # Сохраняем содержимое как файл
+            filename = f"index_{path.replace('/', '_').strip('_')}.html"
+            saved_path = self.save_file(response.content, filename, 'directories')
+            if saved_path:
+                return self.record({
+                    'url': url,
+                    'filename': filename,
+                    'path': saved_path,
+                    'size': len(response.content),
+                    'sha256': hashlib.sha256(response.content).hexdigest(),
+                    'method': 'common_path'
+                })
+        return None
+        
+    def resolve(self, items):
+        """Готовые файлы из результатов очереди: задача возвращает файл, None или новые задачи"""
+        files = []
+        for item in items:
+            if isinstance(item, Future):
+                item = item.result()
+            if isinstance(item, list):
+                files.extend(self.resolve(item))
+            elif item:
+                files.append(item)
+        return files
         
     def extract_from_sitemap(self):
         """Извлечение из sitemap.xml"""
         self.log("Поиск sitemap.xml...")
         
-        sitemap_urls = [
-            '/sitemap.xml',
-            '/sitemap_index.xml',
-            '/sitemaps.xml',
-            '/sitemap/sitemap.xml'
-        ]
+        # Sitemap'ы из robots.txt и стандартных путей, вложенные индексы и .xml.gz раскрываются
+        robots = load_robots(self.make_request, self.base_url)
+        urls = discover_sitemaps(self.make_request, self.base_url, robots)
         
-        extracted_files = []
+        downloads = []
         
-        for sitemap_url in sitemap_urls:
-            url = self.base_url + sitemap_url
-            response = self.make_request(url)
-            
-            if response and response.status_code == 200:
-                # Извлекаем URL из sitemap
-                urls = re.findall(r'<loc>(.*?)</loc>', response.text)
-                
-                for url in urls:
-                    if url.startswith(self.base_url):
-                        # Проверяем, является ли это файлом шаблона
-                        if any(url.endswith(ext) for ext in ['.css', '.js', '.html', '.php', '.tpl']):
-                            file_content = self.extract_file(url)
-                            if file_content:
-                                filename = os.path.basename(urlparse(url).path)
-                                saved_path = self.save_file(file_content, filename, 'sitemap')
-                                if saved_path:
-                                    extracted_files.append({
-                                        'url': url,
-                                        'filename': filename,
-                                        'path': saved_path,
-                                        'size': len(file_content),
-                                        'method': 'sitemap'
-                                    })
+        for url in urls:
+            if url.startswith(self.base_url):
+                # Проверяем, является ли это файлом шаблона
+                if any(url.endswith(ext) for ext in ['.css', '.js', '.html', '.php', '.tpl']):
+                    filename = os.path.basename(urlparse(url).path)
+                    downloads.append(self.submit(url, filename, 'sitemap', method='sitemap'))
                                     
-        return extracted_files
+        return downloads
         
     def run_extraction(self):
         """Запуск полного извлечения"""
         self.log(f"Начинаем извлечение шаблонов с {self.base_url}")
-        
-        all_extracted = []
+        self.started = time.strftime('%Y-%m-%d %H:%M:%S')
         
         # Различные методы извлечения
         methods = [
@@ -245,26 +377,33 @@ class TemplateExtractor:
             self.extract_from_sitemap
         ]
         
-        for method in methods:
-            try:
-                files = method()
-                all_extracted.extend(files)
-                self.log(f"Извлечено {len(files)} файлов методом {method.__name__}")
-            except Exception as e:
-                self.log(f"Ошибка в методе {method.__name__}: {e}", "ERROR")
+        # Методы ищут файлы одновременно и ставят их в одну очередь скачивания,
+        # файлы сохраняются по мере готовности
+        self.progress = open(self.progress_path, 'w', encoding='utf-8')
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_threads) as self.executor:
+                with ThreadPoolExecutor(max_workers=len(methods)) as discovery:
+                    searches = {method: discovery.submit(method) for method in methods}
+                    
+                for method, search in searches.items():
+                    try:
+                        files = self.resolve(search.result())
+                        self.log(f"Извлечено {len(files)} файлов методом {method.__name__}")
+                    except Exception as e:
+                        self.log(f"Ошибка в методе {method.__name__}: {e}", "ERROR")
+        finally:
+            with self.lock:
+                self.progress.close()
+                self.progress = None
                 
-        # Сохраняем метаданные
-        metadata = {
-            'base_url': self.base_url,
-            'extraction_time': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'total_files': len(all_extracted),
-            'files': all_extracted
-        }
-        
-        metadata_path = self.output_dir / 'extraction_metadata.json'
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        # Полные метаданные записываются один раз, журнал хода больше не нужен
+        with self.lock:
+            self.write_metadata(complete=True)
+            all_extracted = list(self.extracted_files)
+        self.progress_path.unlink()
             
+        if self.duplicates:
+            self.log(f"Повторных URL пропущено: {self.duplicates}")
         self.log(f"Извлечение завершено. Всего файлов: {len(all_extracted)}")
         self.log(f"Результаты сохранены в {self.output_dir}")
         
@@ -302,15 +441,20 @@ def main():
     parser = argparse.ArgumentParser(description='Извлечение шаблонов с сайта')
     parser.add_argument('--url', default='https://100200.ru', help='URL для извлечения')
     parser.add_argument('--output', default='extracted_templates', help='Директория для сохранения')
+    parser.add_argument('--max-rate', type=float, default=2.0, help='Потолок темпа запросов (запросов/сек, по умолчанию: 2)')
+    parser.add_argument('--threads', type=int, default=4, help='Одновременных скачиваний (по умолчанию: 4)')
+    parser.add_argument('--listing-depth', type=int, default=3,
+                        help='Глубина обхода подкаталогов directory listing (по умолчанию: 3)')
     
     args = parser.parse_args()
+    install_dns_cache()
     
     print("📁 Извлечение шаблонов с сайта")
     print(f"🎯 Цель: {args.url}")
     print(f"📂 Сохранение в: {args.output}")
     print("-" * 60)
     
-    extractor = TemplateExtractor(args.url, args.output)
+    extractor = TemplateExtractor(args.url, args.output, args.max_rate, args.threads, args.listing_depth)
     
     try:
         extracted_files = extractor.run_extraction()
@@ -318,6 +462,9 @@ def main():
         
     except KeyboardInterrupt:
         print("\n❌ Извлечение прервано пользователем")
+        # Метаданные уже скачанного с complete=false
+        with extractor.lock:
+            extractor.write_metadata()
     except Exception as e:
         print(f"\n❌ Критическая ошибка: {e}")
 
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Параллельная проверка TLS и DNS
+Разрешение имен и TLS рукопожатия выполняются в пуле потоков. Адреса хостов
+берутся из общего кэша dns_cache. Проверка сертификата кэшируется по
+(IP, SNI, порт), а перебор версий протокола и шифров - по (IP, порт), поэтому
+поддомены на одном адресе не повторяют перебор. Неудачные соединения не
+кэшируются
+"""
+
+import ssl
+import sys
+import json
+import socket
+import hashlib
+import argparse
+import warnings
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from dns_cache import DNS_CACHE
+
+# Версии протоколов, поддержка которых проверяется отдельно
+PROTOCOL_VERSIONS = {
+    'TLSv1': ssl.TLSVersion.TLSv1,
+    'TLSv1.1': ssl.TLSVersion.TLSv1_1,
+    'TLSv1.2': ssl.TLSVersion.TLSv1_2,
+    'TLSv1.3': ssl.TLSVersion.TLSv1_3
+}
+
+# Устаревшие версии, поддержка которых считается проблемой конфигурации
+DEPRECATED_VERSIONS = ('TLSv1', 'TLSv1.1')
+
+# Группы слабых шифров OpenSSL (проверяются на TLS 1.2 и ниже)
+WEAK_CIPHER_GROUPS = ('NULL', 'aNULL', 'EXPORT', 'RC4', 'DES', '3DES')
+
+def client_hello_possible(context):
+    """Может ли локальный OpenSSL начать рукопожатие с этим контекстом (без сети)"""
+    sslobj = context.wrap_bio(ssl.MemoryBIO(), ssl.MemoryBIO(), server_hostname='localhost')
+    try:
+        sslobj.do_handshake()
+    except ssl.SSLWantReadError:
+        # ClientHello сформирован, ждем ответа сервера
+        return True
+    except ssl.SSLError:
+        return False
+    return True
+
+class TlsProbe:
+    """Кэширующий DNS и TLS проверщик
+
+    Один экземпляр разделяется всеми сканерами процесса (TLS_PROBE), кэши
+    потокобезопасны и живут до конца процесса.
+    """
+
+    def __init__(self, timeout=10, max_workers=8):
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.handshake_cache = {}
+        self.protocol_cache = {}
+        self.lock = threading.Lock()
+        self.stats = {'handshake_hits': 0, 'handshake_misses': 0}
+
+    def resolve(self, hostname, port=443):
+        """Список IP адресов хоста из общего кэша DNS_CACHE"""
+        return DNS_CACHE.resolve(hostname)
+
+    def handshake(self, ip, server_name, port=443, context=None):
+        """Одно TLS рукопожатие, возвращает сведения о соединении и сертификате"""
+        context = context or ssl.create_default_context()
+        with socket.create_connection((ip, port), timeout=self.timeout) as sock:
+            with context.wrap_socket(sock, server_hostname=server_name) as ssock:
+                der = ssock.getpeercert(binary_form=True)
+                return {
+                    'certificate': ssock.getpeercert(),
+                    'certificate_sha256': hashlib.sha256(der).hexdigest() if der else None,
+                    'cipher_suite': ssock.cipher(),
+                    'protocol_version': ssock.version()
+                }
+
+    def probe(self, hostname, port=443):
+        """Рукопожатие с проверкой сертификата, результат кэшируется по (IP, SNI, порт)"""
+        ip = self.resolve(hostname, port)[0]
+        key = (ip, hostname, port)
+
+        with self.lock:
+            if key in self.handshake_cache:
+                self.stats['handshake_hits'] += 1
+                return self.handshake_cache[key]
+            self.stats['handshake_misses'] += 1
+
+        result = {'hostname': hostname, 'ip_address': ip, 'port': port}
+        try:
+            result.update(self.handshake(ip, hostname, port))
+            result['certificate_valid'] = True
+        except ssl.SSLCertVerificationError as e:
+            # Сертификат не прошел проверку, но сведения о соединении все равно нужны
+            result['certificate_valid'] = False
+            result['error'] = e.verify_message or str(e)
+            try:
+                result.update(self.handshake(ip, hostname, port, self.unverified_context()))
+            except (OSError, ssl.SSLError):
+                pass
+        except (OSError, ssl.SSLError) as e:
+            # Таймаут или сбой соединения может быть временным, такой результат не кэшируется
+            result['certificate_valid'] = False
+            result['error'] = str(e)
+            return result
+
+        with self.lock:
+            self.handshake_cache[key] = result
+        return result
+
+    def unverified_context(self, version=None, ciphers=None):
+        """Контекст без проверки сертификата для проверки версий и шифров"""
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        # Уровень 0 разрешает локальному OpenSSL устаревшие протоколы и шифры
+        context.set_ciphers((ciphers or 'ALL') + ':@SECLEVEL=0')
+        if version:
+            # Устаревшие версии проверяются намеренно
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', DeprecationWarning)
+                context.minimum_version = version
+                context.maximum_version = version
+        elif ciphers:
+            context.maximum_version = ssl.TLSVersion.TLSv1_2
+        return context
+
+    def accepts(self, ip, hostname, port, **context_options):
+        """(принято ли соединение, ошибка) для контекста с заданной версией/шифрами
+
+        None - проверка не выполнена: локальный OpenSSL не умеет эту версию или
+        шифр, либо соединение не удалось (таймаут, сброс).
+        """
+        try:
+            context = self.unverified_context(**context_options)
+        except ssl.SSLError as e:
+            return None, f"не поддерживается локально: {e}"
+        if not client_hello_possible(context):
+            # Например, TLSv1 отключен в конфигурации OpenSSL клиента
+            return None, "не поддерживается локально"
+        try:
+            self.handshake(ip, hostname, port, context)
+            return True, None
+        except ssl.SSLError as e:
+            # Сервер отказал в рукопожатии
+            return False, str(e)
+        except OSError as e:
+            return None, str(e)
+
+    def probe_protocols(self, hostname, port=443, versions=None, cipher_groups=WEAK_CIPHER_GROUPS):
+        """Параллельная проверка версий протокола и групп слабых шифров
+
+        Возвращает {'protocols': {версия: True/False/None}, 'weak_ciphers': {группа: ...}},
+        None - не проверено (см. accepts). Поддержка версий и шифров - свойство
+        сервера на адресе, поэтому результат общий для всех имен на этом IP.
+        """
+        ip = self.resolve(hostname, port)[0]
+        versions = versions or list(PROTOCOL_VERSIONS)
+        key = (ip, port, tuple(versions), tuple(cipher_groups))
+
+        with self.lock:
+            if key in self.protocol_cache:
+                self.stats['handshake_hits'] += 1
+                return self.protocol_cache[key]
+            self.stats['handshake_misses'] += 1
+
+        checks = [('protocols', name, {'version': PROTOCOL_VERSIONS[name]}) for name in versions]
+        checks += [('weak_ciphers', group, {'ciphers': group}) for group in cipher_groups]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            outcomes = list(executor.map(lambda check: self.accepts(ip, hostname, port, **check[2]), checks))
+
+        result = {'protocols': {}, 'weak_ciphers': {}}
+        for (section, name, _), (accepted, _error) in zip(checks, outcomes):
+            result[section][name] = accepted
+
+        # Сбой соединения (None не из-за локального OpenSSL) может быть временным
+        if not any(accepted is None and not error.startswith('не поддерживается локально')
+                   for accepted, error in outcomes):
+            with self.lock:
+                self.protocol_cache[key] = result
+        return result
+
+    def analyze(self, hostname, port=443, protocols=True):
+        """Рукопожатие и (при protocols=True) проверка версий/шифров одновременно"""
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            handshake = executor.submit(self.probe, hostname, port)
+            support = executor.submit(self.probe_protocols, hostname, port) if protocols else None
+            result = dict(handshake.result())
+            if support:
+                try:
+                    result.update(support.result())
+                except OSError as e:
+                    result['protocols_error'] = str(e)
+        return result
+
+    def analyze_many(self, hostnames, port=443, protocols=True):
+        """Параллельный анализ списка хостов {хост: результат}"""
+        def analyze_one(hostname):
+            try:
+                return self.analyze(hostname, port, protocols)
+            except OSError as e:
+                return {'hostname': hostname, 'certificate_valid': False, 'error': str(e)}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(zip(hostnames, executor.map(analyze_one, hostnames)))
+
+# Общий экземпляр процесса: сканеры разных доменов разделяют кэши
+TLS_PROBE = TlsProbe()
+
+def main():
+    parser = argparse.ArgumentParser(description='Параллельная проверка TLS/DNS хостов')
+    parser.add_argument('hosts', nargs='+', help='Хосты или URL')
+    parser.add_argument('--port', type=int, default=443, help='Порт (по умолчанию: 443)')
+    parser.add_argument('--no-protocols', action='store_true', help='Не проверять версии протокола и шифры')
+    parser.add_argument('--threads', type=int, default=8, help='Параллельных проверок')
+
+    args = parser.parse_args()
+
+    hostnames = [urlsplit(host).hostname if '://' in host else host for host in args.hosts]
+    probe = TlsProbe(max_workers=args.threads)
+    results = probe.analyze_many(hostnames, args.port, not args.no_protocols)
+
+    json.dump({'results': results, 'stats': probe.stats, 'dns': DNS_CACHE.stats}, sys.stdout, ensure_ascii=False, indent=2, default=str)
+    print()
+
+if __name__ == "__main__":
+    main()
@@ -15,10 +15,26 @@ import argparse
 import sys
 from pathlib import Path
 
+from probe_engine import (AdaptiveRateController, controlled_request, read_limited, response_size,
+                          size_fields, PROBE_MAX_BYTES)
+from signature_pack import load_signature_pack
+from dns_cache import install_dns_cache
+
+# Потолок темпа адаптивного режима, если --max-rate не указан (запросов в секунду)
+DEFAULT_MAX_RATE = 10.0
+
 class VulnerabilityScanner:
-    def __init__(self, base_url, delay=1):
+    def __init__(self, base_url, delay=1, signature_pack=None, adaptive=False, max_rate=None):
         self.base_url = base_url.rstrip('/')
         self.delay = delay
+        # В адаптивном режиме пауза между запросами подстраивается под ответы сервера
+        self.rate_control = None
+        if adaptive:
+            max_rate = max_rate or DEFAULT_MAX_RATE
+            self.rate_control = AdaptiveRateController(1.0 / delay if delay > 0 else max_rate, max_rate,
+                                                       max_concurrency=1, log=self.log)
+        # Пути, payload'ы и индикаторы общие с EnhancedSecurityScanner
+        self.pack = load_signature_pack(signature_pack)
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -29,6 +45,7 @@ class VulnerabilityScanner:
             'admin_panels': [],
             'sensitive_files': [],
             'template_files': [],
+            'signature_pack': self.pack.info(),
             'errors': []
         }
         
@@ -37,11 +54,21 @@ class VulnerabilityScanner:
         timestamp = time.strftime("%H:%M:%S")
         print(f"[{timestamp}] {level}: {message}")
         
-    def make_request(self, url, method='GET', **kwargs):
-        """Безопасный HTTP запрос с обработкой ошибок"""
+    def make_request(self, url, method='GET', max_bytes=None, **kwargs):
+        """Безопасный HTTP запрос с обработкой ошибок
+        
+        max_bytes - режим пробы: читается только начало тела, полный размер
+        доступен через response_size()
+        """
         try:
-            time.sleep(self.delay)  # Задержка между запросами
-            response = self.session.request(method, url, timeout=10, **kwargs)
+            if self.rate_control:
+                response = controlled_request(self.rate_control, self.session, method, url, retries=1,
+                                              timeout=10, stream=bool(max_bytes), **kwargs)
+            else:
+                time.sleep(self.delay)  # Задержка между запросами
+                response = self.session.request(method, url, timeout=10, stream=bool(max_bytes), **kwargs)
+            if max_bytes:
+                response = read_limited(response, max_bytes)
             return response
         except requests.exceptions.RequestException as e:
             self.log(f"Ошибка запроса к {url}: {e}", "ERROR")
@@ -52,29 +79,19 @@ class VulnerabilityScanner:
         self.log("Проверка на directory listing...")
         
         # Общие директории для проверки
-        directories = [
-            '/admin/', '/wp-admin/', '/administrator/', '/phpmyadmin/',
-            '/backup/', '/backups/', '/config/', '/includes/',
-            '/templates/', '/themes/', '/uploads/', '/files/',
-            '/images/', '/css/', '/js/', '/assets/',
-            '/logs/', '/tmp/', '/temp/', '/cache/',
-            '/.git/', '/.svn/', '/.env/', '/.htaccess'
-        ]
+        directories = self.pack.wordlists['directories']
         
         for directory in directories:
             url = self.base_url + directory
-            response = self.make_request(url)
+            response = self.make_request(url, max_bytes=PROBE_MAX_BYTES)
             
             if response and response.status_code == 200:
                 # Проверяем признаки directory listing
-                if any(indicator in response.text.lower() for indicator in [
-                    'index of', 'parent directory', 'directory listing',
-                    '[dir]', '[file]', 'name</th>', 'last modified'
-                ]):
+                if any(indicator in response.text.lower() for indicator in self.pack.indicators['directory_listing']):
                     self.results['directory_listing'].append({
                         'url': url,
                         'status_code': response.status_code,
-                        'content_length': len(response.text)
+                        **size_fields(response)
                     })
                     self.log(f"Найден directory listing: {url}", "WARNING")
                     
@@ -83,16 +100,10 @@ class VulnerabilityScanner:
         self.log("Проверка на path traversal...")
         
         # Паттерны для path traversal
-        traversal_patterns = [
-            '../../../etc/passwd',
-            '..\\..\\..\\windows\\system32\\drivers\\etc\\hosts',
-            '....//....//....//etc/passwd',
-            '%2e%2e%2f%2e%2e%2f%2e%2e%2fetc%2fpasswd',
-            '..%252f..%252f..%252fetc%252fpasswd'
-        ]
+        traversal_patterns = self.pack.payloads['path_traversal']
         
         # Параметры для тестирования
-        test_params = ['file', 'path', 'page', 'include', 'template', 'view']
+        test_params = self.pack.wordlists['traversal_params']
         
         for param in test_params:
             for pattern in traversal_patterns:
@@ -101,10 +112,7 @@ class VulnerabilityScanner:
                 
                 if response and response.status_code == 200:
                     # Проверяем признаки успешного path traversal
-                    if any(indicator in response.text.lower() for indicator in [
-                        'root:x:', 'bin/bash', 'localhost', '127.0.0.1',
-                        'windows', 'system32', 'drivers'
-                    ]):
+                    if any(indicator in response.text.lower() for indicator in self.pack.indicators['path_traversal']):
                         self.results['path_traversal'].append({
                             'url': url,
                             'pattern': pattern,
@@ -116,23 +124,15 @@ class VulnerabilityScanner:
         """Поиск административных панелей"""
         self.log("Поиск административных панелей...")
         
-        admin_paths = [
-            '/admin', '/wp-admin', '/administrator', '/phpmyadmin',
-            '/admin.php', '/login.php', '/admin/login', '/dashboard',
-            '/control', '/manage', '/panel', '/cpanel', '/webmail',
-            '/admin/index.php', '/admin/login.php', '/admin/dashboard.php'
-        ]
+        admin_paths = self.pack.wordlists['admin_paths']
         
         for path in admin_paths:
             url = self.base_url + path
-            response = self.make_request(url)
+            response = self.make_request(url, max_bytes=PROBE_MAX_BYTES)
             
             if response and response.status_code in [200, 401, 403]:
                 # Проверяем признаки админ панели
-                if any(indicator in response.text.lower() for indicator in [
-                    'login', 'password', 'username', 'admin', 'dashboard',
-                    'control panel', 'administration', 'wp-login'
-                ]):
+                if any(indicator in response.text.lower() for indicator in self.pack.indicators['admin_panel']):
                     self.results['admin_panels'].append({
                         'url': url,
                         'status_code': response.status_code,
@@ -144,24 +144,17 @@ class VulnerabilityScanner:
         """Поиск чувствительных файлов"""
         self.log("Поиск чувствительных файлов...")
         
-        sensitive_files = [
-            '/.env', '/.htaccess', '/.htpasswd', '/web.config',
-            '/robots.txt', '/sitemap.xml', '/crossdomain.xml',
-            '/phpinfo.php', '/info.php', '/test.php', '/config.php',
-            '/database.php', '/db.php', '/settings.php', '/config.ini',
-            '/.git/config', '/.svn/entries', '/composer.json',
-            '/package.json', '/yarn.lock', '/package-lock.json'
-        ]
+        sensitive_files = self.pack.wordlists['sensitive_files']
         
         for file_path in sensitive_files:
             url = self.base_url + file_path
-            response = self.make_request(url)
+            response = self.make_request(url, max_bytes=PROBE_MAX_BYTES)
             
             if response and response.status_code == 200:
                 self.results['sensitive_files'].append({
                     'url': url,
                     'status_code': response.status_code,
-                    'content_length': len(response.text),
+                    **size_fields(response),
                     'content_preview': response.text[:200] + '...' if len(response.text) > 200 else response.text
                 })
                 self.log(f"Найден чувствительный файл: {url}", "WARNING")
@@ -170,8 +163,7 @@ class VulnerabilityScanner:
         """Поиск файлов шаблонов"""
         self.log("Поиск файлов шаблонов...")
         
-        template_extensions = ['.php', '.html', '.htm', '.tpl', '.twig', '.blade.php']
-        template_dirs = ['/templates/', '/themes/', '/views/', '/layouts/', '/includes/']
+        template_dirs = self.pack.wordlists['template_dirs']
         
         for directory in template_dirs:
             url = self.base_url + directory
@@ -183,17 +175,31 @@ class VulnerabilityScanner:
                 
                 for link in template_links:
                     template_url = urllib.parse.urljoin(url, link)
-                    template_response = self.make_request(template_url)
+                    template_response, size = self.probe_size(template_url)
                     
                     if template_response and template_response.status_code == 200:
                         self.results['template_files'].append({
                             'url': template_url,
                             'status_code': template_response.status_code,
-                            'content_length': len(template_response.text),
+                            'content_length': size,
                             'file_type': Path(link).suffix
                         })
                         self.log(f"Найден файл шаблона: {template_url}", "INFO")
                         
+    def probe_size(self, url):
+        """Статус и размер файла без загрузки тела
+        
+        Сначала HEAD, если сервер его не поддерживает - GET с ограничением
+        тела. Возвращает (response, размер или None).
+        """
+        response = self.make_request(url, method='HEAD', allow_redirects=True)
+        if response is not None and response.status_code not in (405, 501):
+            content_length = response.headers.get('Content-Length', '')
+            return response, int(content_length) if content_length.isdigit() else None
+            
+        response = self.make_request(url, max_bytes=PROBE_MAX_BYTES)
+        return response, response_size(response) if response is not None else None
+        
     def extract_title(self, html_content):
         """Извлечение заголовка страницы"""
         title_match = re.search(r'<title[^>]*>(.*?)</title>', html_content, re.IGNORECASE | re.DOTALL)
@@ -265,8 +271,13 @@ def main():
     parser.add_argument('--url', default='https://100200.ru', help='URL для сканирования')
     parser.add_argument('--delay', type=float, default=1.0, help='Задержка между запросами (сек)')
     parser.add_argument('--output', default='scan_results.json', help='Файл для сохранения результатов')
+    parser.add_argument('--signatures', default=None, help='Пакет сигнатур (по умолчанию signature_pack.json)')
+    parser.add_argument('--adaptive', action='store_true', help='Подстраивать паузу между запросами под сервер')
+    parser.add_argument('--max-rate', type=float, default=None,
+                        help=f'Потолок темпа адаптивного режима (по умолчанию: {DEFAULT_MAX_RATE} запросов/сек)')
     
     args = parser.parse_args()
+    install_dns_cache()
     
     print("🔍 Сканер уязвимостей для сайта 100200.ru")
     print("⚠️  ВНИМАНИЕ: Используйте только на собственных сайтах!")
@@ -274,7 +285,7 @@ def main():
     print(f"⏱️  Задержка: {args.delay} сек")
     print("-" * 60)
     
-    scanner = VulnerabilityScanner(args.url, args.delay)
+    scanner = VulnerabilityScanner(args.url, args.delay, args.signatures, args.adaptive, args.max_rate)
     
     try:
         scanner.run_full_scan()